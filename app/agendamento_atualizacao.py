@@ -1,9 +1,63 @@
 from apscheduler.schedulers.blocking import BlockingScheduler
-from app.data_apis.conect_post.conect_post_cambio import verificar_dados_cambio
-from app.data_apis.conect_post.conect_post_ipca import verificar_dados_ipca
-from app.data_apis.conect_post.conect_post_selic import verificar_dados_selic
+from app.data_apis.bcb_async import SERIES_SGS
+from app.data_apis.conect_post.database import lock_consultivo
+from app.series.derivadas import DERIVADAS
 import logging
 import sys
+import time
+
+# Intervalo (segundos) entre tentativas de assumir a liderança do agendador
+INTERVALO_LIDERANCA = 60
+
+# Séries do SGS do BCB: atualizadas todas juntas, em uma única rodada em
+# que cada série tem a sua thread (downloads simultâneos)
+SERIES_BCB = tuple(SERIES_SGS)
+
+# Séries do SIDRA/IBGE, atualizadas em outra rodada diária
+SERIES_SIDRA = ('pib_br', 'pib_pb', 'desocupacao', 'desocupacao_pb')
+
+logger = logging.getLogger(__name__)
+
+
+def nome_lock_etl(serie):
+    """Nome do advisory lock que protege a atualização de uma série"""
+    return f"etl:{serie}"
+
+
+def com_derivadas(series):
+    """Séries informadas mais as derivadas calculadas a partir delas"""
+    series = list(series)
+    return series + [
+        serie for serie, definicao in DERIVADAS.items()
+        if serie not in series and set(definicao['bases']) & set(series)
+    ]
+
+
+def executar_rodada(series=None, parallel=4):
+    """
+    Rodada de ETL pelo executor do worker (app.etl_worker.executar_etl).
+
+    Todos os jobs do agendador passam por aqui: cada série roda sob o seu
+    advisory lock, com timeout, e as derivadas só depois das suas bases
+    (e não quando uma base falha ou é pulada). Falhas são registradas e
+    não interrompem o agendador.
+
+    Args:
+        series (list, optional): Séries a atualizar (padrão: todas)
+        parallel (int): Número de séries atualizadas simultaneamente
+
+    Returns:
+        dict | None: Resultado por série, ou None se a rodada não pôde rodar
+    """
+    # Importação tardia: app.etl_worker importa este módulo
+    from app.etl_worker import executar_etl
+
+    try:
+        return executar_etl(series, parallel)
+    except Exception as e:
+        logger.error(f"❌ Erro na rodada de ETL ({', '.join(series or ['todas as séries'])}): {e}", exc_info=True)
+        return None
+
 
 def start_etl_scheduler():
     # Configurar logging
@@ -15,8 +69,19 @@ def start_etl_scheduler():
         ]
     )
     
-    logger = logging.getLogger(__name__)
-    
+    # Somente o processo que detém o lock do agendador executa os jobs;
+    # os demais ficam em espera para assumir caso o líder caia
+    while True:
+        with lock_consultivo('etl:agendador') as lider:
+            if lider:
+                logger.info("👑 Este processo é o líder do agendador de ETL")
+                _executar_agendador(logger)
+                return
+        logger.info(f"⏸️ Agendador já ativo em outro processo; nova tentativa em {INTERVALO_LIDERANCA}s")
+        time.sleep(INTERVALO_LIDERANCA)
+
+
+def _executar_agendador(logger):
     # Criar agendador
     scheduler = BlockingScheduler()
     
@@ -25,27 +90,11 @@ def start_etl_scheduler():
     logger.info("🔄 INICIANDO EXECUÇÃO IMEDIATA DAS TAREFAS DE ATUALIZAÇÃO")
     logger.info("="*80)
     
-    try:
-        # Executar verificação de IPCA imediatamente
-        logger.info("\n🔍 INICIANDO ATUALIZAÇÃO DO IPCA")
-        resultado_ipca = verificar_dados_ipca()
-        logger.info(f"✅ RESULTADO DA ATUALIZAÇÃO DO IPCA: {'SUCESSO' if resultado_ipca else 'FALHA'}")
-        
-        # Executar verificação de Câmbio imediatamente
-        logger.info("\n🔍 INICIANDO ATUALIZAÇÃO DO CÂMBIO")
-        resultado_cambio = verificar_dados_cambio()
-        logger.info(f"✅ RESULTADO DA ATUALIZAÇÃO DO CÂMBIO: {'SUCESSO' if resultado_cambio else 'FALHA'}")
-        
-        # Executar verificação de Selic imediatamente
-        logger.info("\n🔍 INICIANDO ATUALIZAÇÃO DA SELIC")
-        resultado_selic = verificar_dados_selic()
-        logger.info(f"✅ RESULTADO DA ATUALIZAÇÃO DA SELIC: {'SUCESSO' if resultado_selic else 'FALHA'}")
-        
+    # Atualização completa de todas as séries (bases e derivadas) ao iniciar
+    resultados = executar_rodada()
+    if resultados is not None:
         logger.info("\n✅ TODAS AS ATUALIZAÇÕES FORAM CONCLUÍDAS")
         logger.info("="*80 + "\n")
-        
-    except Exception as e:
-        logger.error(f"❌ ERRO DURANTE A EXECUÇÃO DAS TAREFAS: {str(e)}", exc_info=True)
     
     # Agendar execuções futuras (agendamento normal)
     try:
@@ -53,37 +102,32 @@ def start_etl_scheduler():
         logger.info("⏰ CONFIGURANDO AGENDADOR PARA EXECUÇÕES FUTURAS")
         logger.info("="*80)
         
-        # Agendamento diário para Câmbio
+        # Agendamento diário das séries do BCB (câmbio, IPCA, Selic, BCPB,
+        # DIVLIQ) e suas derivadas: uma rodada, todas as séries ao mesmo
+        # tempo. IPCA e Selic só consultam a API quando o último dado
+        # gravado tem mais de 30 dias
+        series_bcb = com_derivadas(SERIES_BCB)
         scheduler.add_job(
-            verificar_dados_cambio, 
-            'cron', 
-            hour=1,  # Às 1 da manhã
+            executar_rodada,
+            'cron',
+            args=[series_bcb],
+            kwargs={'parallel': len(series_bcb)},
+            hour=1,  # À 1 da manhã
             minute=0,
-            name='Atualização Diária - Câmbio'
+            name='Atualização Diária - BCB'
         )
-        logger.info("✅ Agendada atualização diária do CÂMBIO para 1:00 AM")
+        logger.info(f"✅ Agendada atualização diária de {', '.join(SERIES_BCB)} para 1:00 AM")
         
-        # Agendamento mensal para IPCA (dia 1 de cada mês às 3:15 AM)
+        # Agendamento diário das séries do SIDRA e suas derivadas
         scheduler.add_job(
-            verificar_dados_ipca, 
-            'cron', 
-            day=1,
-            hour=3,
-            minute=15,
-            name='Atualização Mensal - IPCA'
-        )
-        logger.info("✅ Agendada atualização mensal do IPCA para o dia 1 de cada mês às 3:15 AM")
-        
-        # Agendamento mensal para Selic (dia 1 de cada mês às 3:30 AM)
-        scheduler.add_job(
-            verificar_dados_selic, 
-            'cron', 
-            day=1,
-            hour=3,
-            minute=30,
-            name='Atualização Mensal - Selic'
+            executar_rodada,
+            'cron',
+            args=[com_derivadas(SERIES_SIDRA)],
+            hour=2,
+            minute=0,
+            name='Atualização Diária - SIDRA'
         )
-        logger.info("✅ Agendada atualização mensal da SELIC para o dia 1 de cada mês às 3:30 AM")
+        logger.info(f"✅ Agendada atualização diária de {', '.join(SERIES_SIDRA)} para 2:00 AM")
         
         # Iniciar o agendador
         logger.info("\n🚀 AGENDADOR INICIADO COM SUCESSO!")
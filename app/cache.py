@@ -1,12 +1,304 @@
 # app/cache.py
-from functools import lru_cache
+"""
+Cache em memória das séries servidas pela API.
+
+As chaves são tuplas cujo primeiro elemento é o id da série, por exemplo
+('ipca',) ou ('cambio', '2020-01-01', None), ou a tupla de ids quando a
+entrada combina várias séries (ex.: séries alinhadas). Cada entrada expira após um
+TTL e pode ser invalidada explicitamente pelo ETL depois do commit
+(notificar_atualizacao). O limite de memória é medido em bytes do valor
+serializado em JSON, não em número de entradas: quando o total passa do
+limite, as entradas menos usadas recentemente são descartadas (LRU).
+
+Cargas são coalescidas por chave (single-flight): quando várias requisições
+(greenlets) pedem a mesma chave ausente, só uma executa a consulta e as
+demais esperam o seu resultado. Depois do TTL, a entrada ainda pode ser
+servida por mais STALE_PADRAO segundos enquanto uma única recarga roda em
+segundo plano (stale-while-revalidate). Entradas invalidadas pelo ETL são
+removidas de imediato e nunca servidas como antigas.
+"""
+import json
+import logging
+import os
+import threading
 import time
+from collections import OrderedDict
+
+# Limite padrão: 32 MB de payload serializado
+MAX_BYTES_PADRAO = int(os.getenv('CACHE_MAX_BYTES', 32 * 1024 * 1024))
+
+# Os dados mudam no máximo uma vez por dia
+TTL_PADRAO = int(os.getenv('CACHE_TTL', 6 * 60 * 60))
+
+# Tempo, após o TTL, em que a entrada ainda é servida enquanto é recarregada
+STALE_PADRAO = int(os.getenv('CACHE_STALE', 6 * 60 * 60))
+
+# Espera máxima pelo resultado de uma carga feita por outra requisição;
+# depois disso a requisição carrega por conta própria
+ESPERA_VOO = float(os.getenv('CACHE_ESPERA_VOO', 30))
+
+
+def tamanho_serializado(valor):
+    """Tamanho do valor serializado em JSON, em bytes"""
+    if isinstance(valor, (bytes, bytearray, memoryview)):
+        return len(valor)
+    # Objetos que já sabem seu tamanho em memória (ex.: Payload)
+    if hasattr(valor, 'nbytes'):
+        return valor.nbytes
+    return len(json.dumps(valor, default=str, ensure_ascii=False).encode('utf-8'))
+
+
+class _Entrada:
+    __slots__ = ('valor', 'tamanho', 'expira_em', 'descarta_em')
+
+    def __init__(self, valor, tamanho, expira_em, descarta_em):
+        self.valor = valor
+        self.tamanho = tamanho
+        self.expira_em = expira_em
+        self.descarta_em = descarta_em
+
+
+class Voo:
+    """Carga em andamento de uma chave, compartilhada pelas requisições que a esperam"""
+
+    __slots__ = ('evento', 'valor', 'erro', 'invalidacoes')
+
+    def __init__(self, invalidacoes):
+        self.evento = threading.Event()
+        self.valor = None
+        self.erro = None
+        # Contador de invalidações do cache quando a carga começou
+        self.invalidacoes = invalidacoes
+
+
+class CacheSeries:
+    """
+    Cache LRU com TTL, limitado pelo total de bytes serializados.
+
+    Args:
+        max_bytes (int): Limite de memória (soma dos tamanhos serializados)
+        ttl (float): Tempo de vida padrão das entradas, em segundos
+        stale (float): Tempo após o TTL em que a entrada ainda pode ser
+            servida durante a recarga (0 desativa)
+    """
+
+    def __init__(self, max_bytes=MAX_BYTES_PADRAO, ttl=TTL_PADRAO, stale=STALE_PADRAO):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stale = stale
+        self._entradas = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._voos = {}
+        self._invalidacoes = 0
+        self.hits = 0
+        self.misses = 0
+        self.descartes = 0
+        self.antigas = 0
+        self.coalescidas = 0
+
+    def get(self, chave):
+        """Retorna o valor em cache (dentro do TTL) ou None (conta hit/miss)"""
+        return self.consultar(chave)
+
+    def consultar(self, chave, revalidar=None, ttl=None):
+        """
+        Retorna o valor em cache dentro do TTL.
+
+        Com revalidar, uma entrada vencida mas ainda na janela stale é
+        devolvida e revalidar() é executada em segundo plano (uma única vez
+        por chave) para substituí-la.
+
+        Returns:
+            O valor ou None (ausente, vencido ou descartado)
+        """
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            agora = time.monotonic()
+            if entrada is not None and entrada.expira_em > agora:
+                self._entradas.move_to_end(chave)
+                self.hits += 1
+                return entrada.valor
+            if entrada is not None and entrada.descarta_em <= agora:
+                self._remover(chave)
+                entrada = None
+            if entrada is None or revalidar is None:
+                self.misses += 1
+                return None
+            self._entradas.move_to_end(chave)
+            self.antigas += 1
+            valor = entrada.valor
 
-@lru_cache(maxsize=100)
-def cached_data_retrieval(data_type, last_updated=None):
+        self._revalidar(chave, revalidar, ttl)
+        return valor
+
+    def set(self, chave, valor, ttl=None):
+        """Armazena o valor; valores maiores que o limite não são guardados"""
+        tamanho = tamanho_serializado(valor)
+        if tamanho > self.max_bytes:
+            logging.warning(f"Valor de {chave} ({tamanho} bytes) excede o limite do cache; não armazenado")
+            return
+
+        with self._lock:
+            if chave in self._entradas:
+                self._remover(chave)
+            expira_em = time.monotonic() + (self.ttl if ttl is None else ttl)
+            self._entradas[chave] = _Entrada(valor, tamanho, expira_em, expira_em + self.stale)
+            self._bytes += tamanho
+
+            # Descarta as entradas menos usadas até caber no limite
+            while self._bytes > self.max_bytes:
+                chave_antiga = next(iter(self._entradas))
+                self._remover(chave_antiga)
+                self.descartes += 1
+
+    def obter(self, chave, carregar, ttl=None):
+        """
+        Retorna o valor em cache ou o carrega com carregar() e armazena.
+
+        Requisições simultâneas pela mesma chave ausente esperam uma única
+        execução de carregar(); uma entrada vencida dentro da janela stale
+        é servida enquanto é recarregada em segundo plano. Resultados None
+        (falha na carga) não são armazenados.
+        """
+        valor = self.consultar(chave, carregar, ttl)
+        if valor is not None:
+            return valor
+
+        voo, lider = self.iniciar_voo(chave)
+        if not lider:
+            valor = self.aguardar_voo(voo)
+            # Espera esgotada: carrega por conta própria
+            return carregar() if valor is None and not voo.evento.is_set() else valor
+        try:
+            valor = carregar()
+        except Exception as e:
+            self.concluir_voo(chave, voo, erro=e)
+            raise
+        self.concluir_voo(chave, voo, valor, ttl)
+        return valor
+
+    # ----------------- Single-flight -----------------------------------------
+
+    def iniciar_voo(self, chave, contar=True):
+        """
+        Registra a carga de uma chave.
+
+        Returns:
+            tuple: (Voo, True se quem chamou deve carregar; False se outra
+                requisição já está carregando e basta aguardar_voo)
+        """
+        with self._lock:
+            voo = self._voos.get(chave)
+            if voo is not None:
+                if contar:
+                    self.coalescidas += 1
+                return voo, False
+            voo = self._voos[chave] = Voo(self._invalidacoes)
+            return voo, True
+
+    def concluir_voo(self, chave, voo, valor=None, ttl=None, erro=None):
+        """
+        Publica o resultado de uma carga e libera quem a aguarda.
+
+        O valor só vai para o cache se nenhuma invalidação ocorreu durante a
+        carga (senão ele pode ser anterior aos dados que o ETL acabou de gravar).
+        """
+        voo.valor, voo.erro = valor, erro
+        with self._lock:
+            if valor is not None and erro is None and voo.invalidacoes == self._invalidacoes:
+                self.set(chave, valor, ttl)
+            if self._voos.get(chave) is voo:
+                del self._voos[chave]
+        voo.evento.set()
+
+    def aguardar_voo(self, voo, espera=ESPERA_VOO):
+        """Resultado da carga feita por outra requisição (re-lança o erro dela)"""
+        if not voo.evento.wait(espera):
+            logging.warning(f"Carga em andamento não terminou em {espera}s")
+            return None
+        if voo.erro is not None:
+            raise voo.erro
+        return voo.valor
+
+    def _revalidar(self, chave, carregar, ttl):
+        voo, lider = self.iniciar_voo(chave, contar=False)
+        if lider:
+            threading.Thread(
+                target=self._recarregar, args=(chave, voo, carregar, ttl),
+                name=f"revalidar-{chave[0]}", daemon=True
+            ).start()
+
+    def _recarregar(self, chave, voo, carregar, ttl):
+        try:
+            self.concluir_voo(chave, voo, carregar(), ttl)
+        except Exception as e:
+            logging.error(f"Erro ao recarregar {chave} em segundo plano: {e}")
+            self.concluir_voo(chave, voo, erro=e)
+
+    def invalidar(self, serie=None):
+        """Remove todas as entradas que usam uma série (ou todo o cache se serie=None)"""
+        with self._lock:
+            # Cargas em andamento não gravam resultados anteriores a esta invalidação
+            self._invalidacoes += 1
+            if serie is None:
+                removidas = len(self._entradas)
+                self._entradas.clear()
+                self._bytes = 0
+            else:
+                chaves = [
+                    chave for chave in self._entradas
+                    if chave[0] == serie or (isinstance(chave[0], tuple) and serie in chave[0])
+                ]
+                for chave in chaves:
+                    self._remover(chave)
+                removidas = len(chaves)
+        logging.info(f"🧹 Cache invalidado ({serie or 'todas as séries'}): {removidas} entradas")
+        return removidas
+
+    def estatisticas(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entradas': len(self._entradas),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'descartes': self.descartes,
+                'antigas': self.antigas,
+                'coalescidas': self.coalescidas,
+                'cargas_em_andamento': len(self._voos),
+                'taxa_acerto': round(self.hits / total, 4) if total else None,
+            }
+
+    def _remover(self, chave):
+        entrada = self._entradas.pop(chave)
+        self._bytes -= entrada.tamanho
+
+
+# Cache compartilhado pelas rotas do processo
+cache_series = CacheSeries()
+
+# Funções chamadas (com o id da série) depois que o ETL materializa uma nova versão
+_hooks_atualizacao = [cache_series.invalidar]
+
+
+def registrar_hook_atualizacao(funcao):
+    """Registra uma função a ser chamada quando o ETL atualizar uma série"""
+    _hooks_atualizacao.append(funcao)
+    return funcao
+
+
+def notificar_atualizacao(serie):
     """
-    Cacheia resultados de consultas frequentes
+    Hook chamado pelo ETL depois que o payload materializado de uma série muda.
+
+    Invalida o cache local e executa os demais hooks registrados; falhas
+    em um hook não afetam os outros nem a carga de dados.
     """
-    current_time = time.time()
-    # Lógica para buscar e cachear dados
-    return data
\ No newline at end of file
+    for hook in list(_hooks_atualizacao):
+        try:
+            hook(serie)
+        except Exception as e:
+            logging.error(f"Erro no hook de atualização {getattr(hook, '__name__', hook)} ({serie}): {e}")
@@ -0,0 +1,164 @@
+# app/data_apis/bcb_async.py
+"""
+Busca concorrente (asyncio) de séries do SGS do Banco Central.
+
+As janelas de datas de uma série são baixadas ao mesmo tempo, com um
+semáforo limitando a concorrência. As requisições passam pelo cliente HTTP
+compartilhado (pool de conexões, timeout, retry e limite de requisições
+simultâneas por host para o processo todo), executado em threads pelo
+event loop. Séries diferentes rodam em paralelo nas threads do executor
+do ETL (app.executor_etl), cada uma com a sua busca incremental: o
+agendador atualiza todas as séries de SERIES_SGS em uma única rodada,
+com uma thread por série.
+
+Uso síncrono (ex.: nas funções get_*_data):
+    df = buscar_serie_sgs(433, '2020-01-01')  # colunas 'data' (datetime64) e 'valor' (float64)
+"""
+import asyncio
+import threading
+from datetime import date, timedelta
+
+import pandas as pd
+import requests
+
+from app.data_apis import http_client
+
+URL_SGS = "https://api.bcb.gov.br/dados/serie/bcdata.sgs.{codigo}/dados"
+
+# Códigos SGS das séries usadas pela aplicação
+SERIES_SGS = {
+    'ipca': 433,
+    'selic': 4390,
+    'cambio': 1,
+    'bcpb': 13352,
+    'divliq': 15543,
+}
+
+# A API do SGS limita consultas com período a janelas de no máximo 10 anos
+ANOS_POR_JANELA = 10
+
+# Janelas baixadas ao mesmo tempo por série (o limite por host do
+# http_client vale para todas as séries do processo)
+LIMITE_POR_SERIE = http_client.LIMITE_POR_HOST
+
+
+def _para_data(valor):
+    if valor is None or isinstance(valor, date):
+        return valor
+    return pd.to_datetime(valor).date()
+
+
+def janelas_sgs(inicio, fim=None, anos=ANOS_POR_JANELA):
+    """
+    Divide o período [inicio, fim] em janelas aceitas pela API do SGS.
+
+    Returns:
+        list: Pares (inicio, fim) de datetime.date; [(None, None)] quando
+            nenhum início é informado (série completa em uma requisição)
+    """
+    inicio, fim = _para_data(inicio), _para_data(fim)
+    if inicio is None:
+        return [(None, fim)]
+
+    fim = fim or date.today()
+    janelas = []
+    atual = inicio
+    while atual <= fim:
+        try:
+            limite = atual.replace(year=atual.year + anos) - timedelta(days=1)
+        except ValueError:  # 29/02
+            limite = atual.replace(year=atual.year + anos, day=28)
+        limite = min(limite, fim)
+        janelas.append((atual, limite))
+        atual = limite + timedelta(days=1)
+    return janelas
+
+
+def dataframe_sgs(registros):
+    """
+    Converte a resposta JSON do SGS em DataFrame colunar.
+
+    Returns:
+        pd.DataFrame: Colunas 'data' (datetime64) e 'valor' (float64),
+            ordenado por data e sem datas repetidas
+    """
+    if not registros:
+        return pd.DataFrame({'data': pd.Series(dtype='datetime64[ns]'),
+                             'valor': pd.Series(dtype='float64')})
+
+    df = pd.DataFrame(registros, columns=['data', 'valor'])
+    df['data'] = pd.to_datetime(df['data'], format='%d/%m/%Y', errors='coerce')
+    df['valor'] = pd.to_numeric(df['valor'].astype(str).str.replace(',', '.'), errors='coerce')
+    return (
+        df.dropna(subset=['data', 'valor'])
+        .drop_duplicates(subset='data', keep='last')
+        .sort_values('data')
+        .reset_index(drop=True)
+    )
+
+
+def _baixar_janela(codigo, inicio, fim):
+    """Baixa uma janela de uma série (bloqueante, roda em thread)"""
+    params = {'formato': 'json'}
+    if inicio is not None:
+        params['dataInicial'] = inicio.strftime('%d/%m/%Y')
+    if fim is not None:
+        params['dataFinal'] = fim.strftime('%d/%m/%Y')
+
+    try:
+        return http_client.get_json(URL_SGS.format(codigo=codigo), params=params)
+    except requests.HTTPError as e:
+        # O SGS responde 404 quando não há valores no período
+        if e.response is not None and e.response.status_code == 404:
+            return []
+        raise
+
+
+async def buscar_serie_sgs_async(codigo, inicio=None, fim=None):
+    """
+    Baixa uma série do SGS, com as janelas de datas em paralelo.
+
+    Args:
+        codigo (int): Código da série no SGS
+        inicio, fim (date | str, optional): Período; sem início baixa tudo
+
+    Returns:
+        pd.DataFrame: Colunas 'data' e 'valor'
+    """
+    semaforo = asyncio.Semaphore(LIMITE_POR_SERIE)
+
+    async def baixar(janela):
+        async with semaforo:
+            return await asyncio.to_thread(_baixar_janela, codigo, *janela)
+
+    respostas = await asyncio.gather(*(baixar(janela) for janela in janelas_sgs(inicio, fim)))
+    registros = [registro for resposta in respostas for registro in resposta]
+    return dataframe_sgs(registros)
+
+
+def _executar(corrotina):
+    """Executa a corrotina mesmo se a thread atual já tiver um loop ativo"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(corrotina)
+
+    resultado = {}
+
+    def alvo():
+        try:
+            resultado['valor'] = asyncio.run(corrotina)
+        except BaseException as e:
+            resultado['erro'] = e
+
+    thread = threading.Thread(target=alvo)
+    thread.start()
+    thread.join()
+    if 'erro' in resultado:
+        raise resultado['erro']
+    return resultado['valor']
+
+
+def buscar_serie_sgs(codigo, inicio=None, fim=None):
+    """Versão síncrona de buscar_serie_sgs_async (levanta exceção em caso de erro)"""
+    return _executar(buscar_serie_sgs_async(codigo, inicio, fim))
@@ -1,7 +1,9 @@
 from sqlalchemy import Column, Date, Float
 from sqlalchemy.ext.declarative import declarative_base
-from app.data_apis.sidra import get_desocupacao_data
+from app.data_apis.sidra import get_desocupacao_data, periodos_desde
 from app.data_apis.conect_post.database import Session, engine
+from app.data_apis.otimizacao import bulk_upsert
+from app.data_apis.conect_post.leitura import ler_serie
 import logging
 import pandas as pd
 
@@ -20,71 +22,48 @@ Base.metadata.create_all(engine)
 def upsert_desocupacao_data(desocupacao_data):
     session = Session()
     try:
-        # Converter o DataFrame para lista de dicionários
-        records = [
-            {'data': index, 'desocupacao': row['des']} 
-            for index, row in desocupacao_data.iterrows()
-        ]
+        # Converter o índice (data) em coluna e renomear o valor para a coluna do modelo
+        df = desocupacao_data.rename_axis('data').reset_index().rename(columns={'des': 'desocupacao'})
         
-        # Inserir ou atualizar registros
-        for record in records:
-            existing = session.query(DesocupacaoModel).filter_by(data=record['data']).first()
-            
-            if existing:
-                # Atualizar registro existente
-                existing.desocupacao = record['desocupacao']
-            else:
-                # Criar novo registro
-                new_record = DesocupacaoModel(**record)
-                session.add(new_record)
-        
-        session.commit()
-        logging.info(f"Dados de Desocupação inseridos/atualizados: {len(records)} registros")
+        # Inserir ou atualizar registros em lote
+        alterados = bulk_upsert(session, DesocupacaoModel, df, 'desocupacao')
+        logging.info(f"Dados de Desocupação inseridos/atualizados: {alterados} de {len(df)} registros")
     except Exception as e:
         session.rollback()
         logging.error(f"Erro ao inserir dados de Desocupação: {e}")
+        raise
     finally:
         session.close()
 
-def get_desocupacao_data_from_db():
-    session = Session()
+def get_desocupacao_data_from_db(session=None, intervalo=None):
+    sessao_propria = session is None
+    session = session or Session()
     try:
-        # Verificar conexão com o banco
-        connection = session.connection()
-        logging.info("Conexão com o banco estabelecida com sucesso")
-        
-        # Buscar todos os registros ordenados por data
-        desocupacao_records = session.query(DesocupacaoModel).order_by(DesocupacaoModel.data).all()
-        
-        # Log detalhado
-        logging.info(f"Número de registros encontrados: {len(desocupacao_records)}")
-        
+        # Datas e valores montados pelo Postgres em uma única consulta
+        data = ler_serie(session, DesocupacaoModel.__table__, 'desocupacao', intervalo)
+
         # Verificar se há registros
-        if not desocupacao_records:
-            logging.warning("Nenhum registro encontrado na tabela Desocupação")
+        if data is None:
+            logging.warning("Nenhum registro encontrado na tabela de Desocupação")
             return None
-        
-        # Converter para dicionário mantendo o formato original
-        formatted_data = {
-            'dates': [record.data.strftime('%Y-%m-%d') for record in desocupacao_records],
-            'values': [float(record.desocupacao) for record in desocupacao_records],
+
+        logging.info(f"Dados da Desocupação recuperados: {len(data['dates'])} registros")
+
+        data.update({
             'label': 'Taxa de Desocupação',
             'unit': '%',
             'format': 'date'  # Adicionar um campo para indicar o formato
-        }
-        
-        # Log dos dados
-        ## logging.info(f"Datas originais: {formatted_data['dates']}")
-        ##logging.info(f"Valores: {formatted_data['values']}")
-        
-        return formatted_data
+        })
+        return data
     except Exception as e:
         logging.error(f"Erro ao buscar dados da Desocupação: {e}")
         import traceback
         logging.error(traceback.format_exc())
         return None
     finally:
-        session.close()
+        if sessao_propria:
+            session.close()
+
 
 def popular_desocupacao_se_vazia():
     session = Session()
@@ -110,42 +89,33 @@ def popular_desocupacao_se_vazia():
 if __name__ == "__main__":
     popular_desocupacao_se_vazia()
 
-def verificar_dados_desocupacao():
+def verificar_dados_desocupacao(backfill=False):
     session = Session()
     try:
-        # Buscar dados mais recentes da API
-        desocupacao_data = get_desocupacao_data()
+        # Encontrar o último registro na base de dados
+        ultimo_registro = session.query(DesocupacaoModel).order_by(DesocupacaoModel.data.desc()).first()
+        
+        # Buscar na API apenas os trimestres recentes (/p/last N), ou a tabela
+        # completa se estiver vazia ou no backfill
+        if ultimo_registro and not backfill:
+            desocupacao_data = get_desocupacao_data(periodos_desde(ultimo_registro.data))
+        else:
+            desocupacao_data = get_desocupacao_data()
         
         if desocupacao_data is None:
             logging.warning("Não foi possível obter dados de desocupação da API")
             return False
         
-        # Converter o DataFrame para lista de dicionários
-        records = [
-            {'data': index, 'desocupacao': row['des']} 
-            for index, row in desocupacao_data.iterrows()
-        ]
-        
-        # Encontrar o último registro na base de dados
-        ultimo_registro = session.query(DesocupacaoModel).order_by(DesocupacaoModel.data.desc()).first()
-        
-        # Filtrar apenas registros mais novos que o último registro
-        if ultimo_registro:
-            records = [
-                record for record in records 
-                if pd.Timestamp(record['data']).date() > ultimo_registro.data
-            ]
-        
-        # Inserir novos registros
-        for record in records:
-            new_record = DesocupacaoModel(**record)
-            session.add(new_record)
+        # Converter o índice (data) em coluna e renomear o valor para a coluna do modelo
+        df = desocupacao_data.rename_axis('data').reset_index().rename(columns={'des': 'desocupacao'})
         
-        session.commit()
+        # Inserir/mesclar registros em lote (valores iguais são ignorados)
+        inseridos = bulk_upsert(session, DesocupacaoModel, df, 'desocupacao')
         
-        logging.info(f"Novos registros de Desocupação inseridos: {len(records)}")
+        logging.info(f"Registros de Desocupação inseridos/alterados: {inseridos}")
         
-        return len(records) > 0
+        # Sem trimestre novo também é sucesso
+        return True
     except Exception as e:
         session.rollback()
         logging.error(f"Erro ao verificar e atualizar dados de Desocupação: {e}")
@@ -1,9 +1,11 @@
 
-from sqlalchemy import create_engine, Column, Date, Float
+from sqlalchemy import create_engine, Column, Date, Float, func
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 from dotenv import load_dotenv
+from app.data_apis.otimizacao import bulk_upsert
+from app.data_apis.conect_post.leitura import ler_serie
 
 # Carregar variáveis de ambiente
 load_dotenv()
@@ -38,59 +40,38 @@ def upsert_pib_data(df):
         # Converter o índice (data) de volta para coluna
         df_reset = df.reset_index()
         
-        # Inserir ou atualizar cada registro
-        for _, row in df_reset.iterrows():
-            existing = session.query(PIBModel).filter_by(data=row['data']).first()
-            
-            if existing:
-                # Atualizar se já existir
-                existing.pib = row['pib']
-            else:
-                # Inserir novo registro
-                new_record = PIBModel(data=row['data'], pib=row['pib'])
-                session.add(new_record)
+        # Inserir ou atualizar todos os registros em lote
+        alterados = bulk_upsert(session, PIBModel, df_reset, 'pib')
         
-        session.commit()
-        print(f"Inseridos/Atualizados {len(df_reset)} registros de PIB")
+        print(f"Inseridos/Atualizados {alterados} de {len(df_reset)} registros de PIB")
     except Exception as e:
         session.rollback()
         print(f"Erro ao inserir dados: {e}")
+        raise
     finally:
         session.close()
 
 
 
 # app/data_apis/conect_post/conect_post.py
-def get_pib_data_from_db():
-    session = Session()
+def get_pib_data_from_db(session=None, intervalo=None):
+    sessao_propria = session is None
+    session = session or Session()
     try:
-        # Verificar conexão com o banco
-        connection = session.connection()
-        print("Conexão com o banco estabelecida com sucesso")
-        
-        # Buscar todos os registros ordenados por data
-        pib_records = session.query(PIBModel).order_by(PIBModel.data).all()
-        
-        # Log detalhado
-        print(f"Número de registros encontrados: {len(pib_records)}")
-        
+        # Datas e valores montados pelo Postgres em uma única consulta
+        data = ler_serie(session, PIBModel.__table__, 'pib', intervalo)
+
         # Verificar se há registros
-        if not pib_records:
+        if data is None:
             print("Nenhum registro encontrado na tabela PIB")
             return None
-        
-        # Converter para dicionário
-        data = {
-            'dates': [record.data.strftime('%Y-%m-%d') for record in pib_records],
-            'values': [float(record.pib) for record in pib_records],
+
+        print(f"Número de registros encontrados: {len(data['dates'])}")
+
+        data.update({
             'label': 'PIB do Brasil',
             'unit': '%'
-        }
-        
-        # Log dos dados
-        print(f"Datas: {data['dates']}")
-        print(f"Valores: {data['values']}")
-        
+        })
         return data
     except Exception as e:
         print(f"Erro ao buscar dados do PIB: {e}")
@@ -98,20 +79,36 @@ def get_pib_data_from_db():
         print(traceback.format_exc())
         return None
     finally:
-        session.close()
+        if sessao_propria:
+            session.close()
 
 
 # app/data_apis/conect_post/conect_post.py
-def popular_tabela_pib():
-    from app.data_apis.sidra import get_pib_data
+def popular_tabela_pib(backfill=False):
+    from app.data_apis.sidra import get_pib_data, periodos_desde
+    
+    # Busca incremental: só os trimestres desde o último gravado (com sobreposição);
+    # a tabela completa apenas se estiver vazia ou no backfill
+    session = Session()
+    try:
+        ultima_data = session.query(func.max(PIBModel.data)).scalar()
+    finally:
+        session.close()
+    
+    periodos = 'all' if backfill or ultima_data is None else periodos_desde(ultima_data)
     
     # Buscar dados do PIB
-    pib_data = get_pib_data()
+    pib_data = get_pib_data(periodos)
+    
+    if pib_data is None:
+        print("Não foi possível obter dados do PIB")
+        return False
     
     # Inserir dados
     upsert_pib_data(pib_data)
     
     print("Tabela PIB populada com sucesso!")
+    return True
 
 # Você pode chamar esta função no terminal ou adicionar ao seu script de inicialização
 if __name__ == "__main__":
@@ -5,8 +5,10 @@ from sqlalchemy import Column, Date, Float
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import func
-from app.data_apis.bcb import get_cambio_data
+from app.data_apis.bcb import get_cambio_data, inicio_incremental
 from app.data_apis.conect_post.database import Session, engine
+from app.data_apis.otimizacao import bulk_upsert
+from app.data_apis.conect_post.leitura import ler_serie, Intervalo
 
 
 
@@ -22,86 +24,47 @@ class CambioModel(Base):
 # Cria tabela se não existir
 Base.metadata.create_all(engine)
 
+# Série diária: alguns dias de sobreposição bastam para capturar correções
+SOBREPOSICAO_CAMBIO = timedelta(days=7)
+
 
 # Inserir os dados no banco
 def upsert_cambio_data(cambio_data):
     session = Session()
     try:
-        # Converter o DataFrame para lista de dicionários
-        records = [
-            {'data': index, 'cambio': row['valor']} 
-            for index, row in cambio_data.iterrows()
-        ]
+        # Converter o índice (data) em coluna e renomear o valor para a coluna do modelo
+        df = cambio_data.rename_axis('data').reset_index().rename(columns={'valor': 'cambio'})
         
-        # Inserir ou atualizar registros
-        for record in records:
-            existing = session.query(CambioModel).filter_by(data=record['data']).first() or session.query(CambioModel).filter_by(data=record['data']).first()
-            
-            if existing:
-                # Atualizar registro existente
-                existing.cambio = record['cambio']
-            else:
-                # Criar novo registro
-                new_record = CambioModel(**record)
-                session.add(new_record)
-        session.commit()
+        # Inserir ou atualizar registros em lote
+        alterados = bulk_upsert(session, CambioModel, df, 'cambio')
 
-        logging.info(f"Dados do Cambio inseridos/atualizados: {len(records)} registros")        
+        logging.info(f"Dados do Cambio inseridos/atualizados: {alterados} de {len(df)} registros")        
     except Exception as e:
         session.rollback()
         logging.error(f"Erro ao inserir dados do Cambio: {e}")
+        raise
     finally:
         session.close()            
 
 # Baixa os dados do CAMBIO do  post
-def get_cambio_data_from_db():
-    session = Session()
+def get_cambio_data_from_db(session=None, intervalo=None):
+    sessao_propria = session is None
+    session = session or Session()
     try:
-        # Verificar conexão com o banco
-        connection = session.connection()
-        logging.info("Conexão com o banco estabelecida com sucesso")
-        
-        # Obter a última data disponível na tabela
-        last_record_date = session.query(func.max(CambioModel.data)).scalar()
-        
-        if last_record_date is None:
-            logging.warning("Nenhum registro encontrado na tabela de câmbio.")
-            return None
+        # Padrão: últimos 30 dias antes da última data gravada, na mesma consulta
+        data = ler_serie(session, CambioModel.__table__, 'cambio', intervalo or Intervalo(janela='30d'))
 
-        # Calcular a data inicial como 30 dias antes da última data
-        start_date = last_record_date - timedelta(days=30)
-        
-        # Buscar registros dos últimos 30 dias
-        cambio_records = (
-            session.query(CambioModel)
-            .filter(CambioModel.data >= start_date)
-            .order_by(CambioModel.data)
-            .all()
-        )
-        
-        logging.info(f"Registros filtrados: {len(cambio_records)}")
-        
         # Verificar se há registros
-        if not cambio_records:
-            logging.warning("Nenhum registro encontrado na tabela CAMBIO após filtragem")
+        if data is None:
+            logging.warning("Nenhum registro encontrado na tabela CAMBIO")
             return None
-        
-        # Imprimir detalhes dos últimos registros
-        for record in cambio_records[-5:]:  # Mostrar os últimos 5 registros
-            logging.info(f"Último registro: Data={record.data}, cambio={record.cambio}")
-        
-        # Converter para dicionário
-        data = {
-            'dates': [record.data.strftime('%Y-%m-%d') for record in cambio_records],
-            'values': [float(record.cambio) for record in cambio_records],
+
+        logging.info(f"Dados da CAMBIO recuperados: {len(data['dates'])} registros")
+
+        data.update({
             'label': 'CÂMBIO',
             'unit': 'U$/R$'
-        }
-        
-        logging.info(f"📊 Dados do Câmbio processados:")
-        logging.info(f"   Primeiro registro: {data['dates'][0]}, valor: {data['values'][0]}")
-        logging.info(f"   Último registro: {data['dates'][-1]}, valor: {data['values'][-1]}")
-        
+        })
         return data
     except Exception as e:
         logging.error(f"Erro ao buscar dados da CAMBIO: {e}")
@@ -109,12 +72,17 @@ def get_cambio_data_from_db():
         logging.error(traceback.format_exc())
         return None
     finally:
-        session.close()
+        if sessao_propria:
+            session.close()
 
 
 
 # Verifica e atualiza dados do Cambio
-def verificar_dados_cambio():
+# A busca é incremental (última data gravada menos alguns dias); backfill=True
+# baixa e regrava a série completa. Retorna True se a verificação foi
+# concluída (mesmo sem dados novos) e False se a API não devolveu dados;
+# erros de banco são propagados.
+def verificar_dados_cambio(backfill=False):
     try:
         # Conexão com o banco de dados
         session = Session()
@@ -128,11 +96,16 @@ def verificar_dados_cambio():
         data_atual = date.today()
         
         # Se não há registros, ou o último registro é de mais de um dia atrás
-        if not ultimo_registro or (data_atual - ultimo_registro.data).days >= 1:
+        if backfill or not ultimo_registro or (data_atual - ultimo_registro.data).days >= 1:
             logging.info("🔄 Iniciando atualização dos dados de Câmbio")
             
-            # Buscar novos dados
-            dados_cambio = get_cambio_data()
+            # Buscar novos dados (incremental, ou série completa no backfill)
+            if ultimo_registro and not backfill:
+                dados_cambio = get_cambio_data(
+                    start_date=inicio_incremental(ultimo_registro.data, SOBREPOSICAO_CAMBIO)
+                )
+            else:
+                dados_cambio = get_cambio_data(backfill=True)
             
             if dados_cambio:
                 # Processar e inserir dados
@@ -144,23 +117,19 @@ def verificar_dados_cambio():
                 # Converter datas para datetime.date
                 df_cambio['data'] = pd.to_datetime(df_cambio['data']).dt.date
                 
-                # Inserir dados no banco
-                for index, row in df_cambio.iterrows():
-                    registro_existente = session.query(CambioModel).filter_by(data=row['data']).first()
-                    
-                    if not registro_existente:
-                        novo_registro = CambioModel(data=row['data'], cambio=row['cambio'])
-                        session.add(novo_registro)
-                
-                session.commit()
-                logging.info(f"✅ Dados de Câmbio atualizados: {len(df_cambio)} registros")
+                # Inserir dados no banco em lote
+                alterados = bulk_upsert(session, CambioModel, df_cambio, 'cambio')
+                logging.info(f"✅ Dados de Câmbio atualizados: {alterados} de {len(df_cambio)} registros")
             else:
                 logging.warning("❌ Nenhum dado de Câmbio encontrado para atualização")
+                session.close()
+                return False
         
         else:
             logging.info("✔️ Dados de Câmbio já estão atualizados")
         
         session.close()
+        return True
     
     except Exception as e:
         logging.error(f"❌ Erro ao verificar dados do Câmbio: {e}")
@@ -0,0 +1,91 @@
+from sqlalchemy import Column, Date, Float, String, func, select
+from sqlalchemy.ext.declarative import declarative_base
+from app.data_apis.conect_post.database import Session, engine
+from app.data_apis.conect_post.leitura import ler_serie
+from app.data_apis.otimizacao import bulk_upsert
+import logging
+
+
+# Séries derivadas (IPCA 12 meses, variação anual, juro real...) calculadas
+# pelo ETL a partir das séries base, todas na mesma tabela
+Base = declarative_base()
+
+class SerieDerivadaModel(Base):
+    __tablename__ = 'series_derivadas'
+
+    serie = Column(String(50), primary_key=True)
+    data = Column(Date, primary_key=True)
+    valor = Column(Float)
+
+# Cria tabela se não existir
+Base.metadata.create_all(engine)
+
+
+def ultima_data_derivada(conexao, serie):
+    """Última data gravada de uma série derivada (None se ainda não existe)"""
+    return conexao.execute(
+        select(func.max(SerieDerivadaModel.data)).where(SerieDerivadaModel.serie == serie)
+    ).scalar()
+
+
+def upsert_serie_derivada(serie, valores):
+    """
+    Grava os valores calculados de uma série derivada.
+
+    Args:
+        serie (str): Id da série derivada
+        valores (pd.Series): Valores indexados por data
+
+    Returns:
+        int: Linhas inseridas ou alteradas
+    """
+    registros = [
+        {'serie': serie, 'data': data.date(), 'valor': float(valor)}
+        for data, valor in valores.items()
+    ]
+    session = Session()
+    try:
+        return bulk_upsert(session, SerieDerivadaModel, registros, 'valor', chaves=('serie', 'data'))
+    except Exception as e:
+        session.rollback()
+        logging.error(f"Erro ao gravar série derivada {serie}: {e}")
+        raise
+    finally:
+        session.close()
+
+
+def carregador_serie_derivada(serie, label, unit):
+    """
+    Cria a função de leitura de uma série derivada, no mesmo formato das
+    get_*_data_from_db das séries base.
+    """
+    def get_serie_derivada_from_db(session=None, intervalo=None):
+        sessao_propria = session is None
+        session = session or Session()
+        try:
+            data = ler_serie(session, SerieDerivadaModel.__table__, 'valor', intervalo,
+                             filtro=SerieDerivadaModel.serie == serie)
+
+            # Verificar se há registros
+            if data is None:
+                logging.warning(f"Nenhum registro encontrado para a série derivada {serie}")
+                return None
+
+            logging.info(f"Dados da série derivada {serie} recuperados: {len(data['dates'])} registros")
+
+            data.update({
+                'label': label,
+                'unit': unit
+            })
+            return data
+        except Exception as e:
+            logging.error(f"Erro ao buscar dados da série derivada {serie}: {e}")
+            import traceback
+            logging.error(traceback.format_exc())
+            return None
+        finally:
+            if sessao_propria:
+                session.close()
+
+    get_serie_derivada_from_db.__name__ = f"get_{serie}_data_from_db"
+    return get_serie_derivada_from_db
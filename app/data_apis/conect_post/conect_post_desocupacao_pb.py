@@ -1,7 +1,9 @@
 from sqlalchemy import Column, Date, Float
 from sqlalchemy.ext.declarative import declarative_base
-from app.data_apis.sidra import get_desocupacao_pb_data
+from app.data_apis.sidra import get_desocupacao_pb_data, periodos_desde
 from app.data_apis.conect_post.database import Session, engine
+from app.data_apis.otimizacao import bulk_upsert
+from app.data_apis.conect_post.leitura import ler_serie
 import logging
 from datetime import datetime, timedelta  # Adicionando importações
 
@@ -21,66 +23,37 @@ Base.metadata.create_all(engine)
 def upsert_desocupacao_pb_data(desocupacao_pb_data):
     session = Session()
     try:
-        # Converter o DataFrame para lista de dicionários
-        records = [
-            {'data': index, 'desocupacao_pb': row['des']} 
-            for index, row in desocupacao_pb_data.iterrows()
-        ]
+        # Converter o índice (data) em coluna e renomear o valor para a coluna do modelo
+        df = desocupacao_pb_data.rename_axis('data').reset_index().rename(columns={'des': 'desocupacao_pb'})
         
-        # Inserir ou atualizar registros
-        for record in records:
-            existing = session.query(DesocupacaoPbModel).filter_by(data=record['data']).first()
-            
-            if existing:
-                # Atualizar registro existente
-                existing.desocupacao_pb = record['desocupacao_pb']
-            else:
-                # Criar novo registro
-                new_record = DesocupacaoPbModel(**record)
-                session.add(new_record)
-        
-        session.commit()
-        logging.info(f"Dados de Desocupação da Paraíba inseridos/atualizados: {len(records)} registros")
+        # Inserir ou atualizar registros em lote
+        alterados = bulk_upsert(session, DesocupacaoPbModel, df, 'desocupacao_pb')
+        logging.info(f"Dados de Desocupação da Paraíba inseridos/atualizados: {alterados} de {len(df)} registros")
     except Exception as e:
         session.rollback()
         logging.error(f"Erro ao inserir dados de Desocupação da Paraíba: {e}")
+        raise
     finally:
         session.close()
 
-def get_desocupacao_pb_data_from_db():
-    session = Session()
+def get_desocupacao_pb_data_from_db(session=None, intervalo=None):
+    sessao_propria = session is None
+    session = session or Session()
     try:
-        # Verificar conexão com o banco
-        connection = session.connection()
-        logging.info("Conexão com o banco estabelecida com sucesso")
-        
-        # Buscar todos os registros ordenados por data
-        desocupacao_pb_records = session.query(DesocupacaoPbModel).order_by(DesocupacaoPbModel.data).all()
-        
-        # Log detalhado
-        logging.info(f"Número de registros encontrados: {len(desocupacao_pb_records)}")
-        
-        # Imprimir detalhes de cada registro
-        for record in desocupacao_pb_records[:5]:  # Mostrar os primeiros 5 registros
-            logging.info(f"Registro: Data={record.data}, Desocupação={record.desocupacao_pb}")
-        
+        # Datas e valores montados pelo Postgres em uma única consulta
+        data = ler_serie(session, DesocupacaoPbModel.__table__, 'desocupacao_pb', intervalo)
+
         # Verificar se há registros
-        if not desocupacao_pb_records:
-            logging.warning("Nenhum registro encontrado na tabela Desocupação PB")
+        if data is None:
+            logging.warning("Nenhum registro encontrado na tabela de Desocupação da Paraíba")
             return None
-        
-        # Converter para dicionário
-        data = {
-            'dates': [record.data.strftime('%Y-%m-%d') for record in desocupacao_pb_records],
-            'values': [float(record.desocupacao_pb) for record in desocupacao_pb_records],
+
+        logging.info(f"Dados da Desocupação da Paraíba recuperados: {len(data['dates'])} registros")
+
+        data.update({
             'label': 'Taxa de Desocupação da Paraíba',
             'unit': '%'
-        }
-        
-        # Log dos dados
-        logging.info(f"Datas: {data['dates']}")
-        logging.info(f"Valores: {data['values']}")
-        
+        })
         return data
     except Exception as e:
         logging.error(f"Erro ao buscar dados da Desocupação da Paraíba: {e}")
@@ -88,7 +61,9 @@ def get_desocupacao_pb_data_from_db():
         logging.error(traceback.format_exc())
         return None
     finally:
-        session.close()
+        if sessao_propria:
+            session.close()
+
 
 def popular_desocupacao_pb_se_vazia():
     session = Session()
@@ -114,29 +89,29 @@ def popular_desocupacao_pb_se_vazia():
 if __name__ == "__main__":
     popular_desocupacao_pb_se_vazia()
 
-def verificar_dados_desocupacao_pb():
+def verificar_dados_desocupacao_pb(backfill=False):
     session = Session()
     try:
         # Buscar o último registro
         ultimo_registro = session.query(DesocupacaoPbModel).order_by(DesocupacaoPbModel.data.desc()).first()
 
-        # Definir data de início dinamicamente
-        if ultimo_registro:
-            # Pega a última data e subtrai 10 anos
-            data_inicio = ultimo_registro.data - timedelta(days=365 * 10)
+        # Buscar na API apenas os trimestres recentes (/p/last N), ou a tabela
+        # completa se estiver vazia ou no backfill
+        if ultimo_registro and not backfill:
+            desocupacao_pb_data = get_desocupacao_pb_data(periodos=periodos_desde(ultimo_registro.data))
         else:
-            # Se não há registros, define uma data padrão
-            data_inicio = datetime(2011, 10, 1).date()
-
-        # Buscar dados a partir da data de início
-        desocupacao_pb_data = get_desocupacao_pb_data(start_date=data_inicio)
+            desocupacao_pb_data = get_desocupacao_pb_data(start_date=datetime(2011, 10, 1).date())
         
-        # Inserir dados
-        upsert_desocupacao_pb_data(desocupacao_pb_data)
+        if desocupacao_pb_data is None:
+            logging.warning("Não foi possível obter dados de Desocupação da Paraíba da API")
+            return False
         
-        # Resto do código de verificação...
+        # Inserir dados (sem trimestre novo também é sucesso)
+        upsert_desocupacao_pb_data(desocupacao_pb_data)
+        return True
     except Exception as e:
         logging.error(f"Erro ao verificar dados de Desocupação da Paraíba: {e}")
+        return False
     finally:
         session.close()
 
@@ -1,7 +1,9 @@
 from sqlalchemy import Column, Date, Float
 from sqlalchemy.ext.declarative import declarative_base
-from app.data_apis.bcb import get_divliq_data
+from app.data_apis.bcb import get_divliq_data, inicio_incremental
 from app.data_apis.conect_post.database import Session, engine
+from app.data_apis.otimizacao import bulk_upsert
+from app.data_apis.conect_post.leitura import ler_serie
 import logging
 import pandas as pd
 from datetime import datetime, timedelta
@@ -22,29 +24,17 @@ Base.metadata.create_all(engine)
 def upsert_divliq_data(divliq_data):
     session = Session()
     try:
-        # Converter o DataFrame para lista de dicionários
-        records = [
-            {'data': row['data'], 'divliq': float(row['divliq'])} 
-            for _, row in divliq_data.iterrows()
-        ]
+        # Garantir valores numéricos (a API do BCB devolve texto)
+        divliq_data = divliq_data.assign(divliq=pd.to_numeric(divliq_data['divliq'], errors='coerce'))
         
-        # Inserir ou atualizar registros
-        for record in records:
-            existing = session.query(DivLiqModel).filter_by(data=record['data']).first()
-            
-            if existing:
-                # Atualizar registro existente
-                existing.divliq = record['divliq']
-            else:
-                # Criar novo registro
-                new_record = DivLiqModel(**record)
-                session.add(new_record)
-        session.commit()
-
-        logging.info(f"Dados da DIVLIQ inseridos/atualizados: {len(records)} registros")        
+        # Inserir ou atualizar registros em lote
+        alterados = bulk_upsert(session, DivLiqModel, divliq_data, 'divliq')
+
+        logging.info(f"Dados da DIVLIQ inseridos/atualizados: {alterados} de {len(divliq_data)} registros")        
     except Exception as e:
         session.rollback()
         logging.error(f"Erro ao inserir dados da DIVLIQ: {e}", exc_info=True)
+        raise
     finally:
         session.close()
 
@@ -60,8 +50,8 @@ def popular_divliq_se_vazia():
         logging.info(f"🔍 Verificando tabela DIVLIQ. Total de registros: {count}")
         
         # Sempre buscar e tentar inserir dados, independente de estar vazia
-        # Buscar dados da API
-        divliq_data = get_divliq_data()
+        # Buscar a série completa da API
+        divliq_data = get_divliq_data(backfill=True)
         
         # Imprimir detalhes completos dos dados recebidos
         logging.info(f"📊 Dados DIVLIQ recebidos: {divliq_data}")
@@ -72,7 +62,7 @@ def popular_divliq_se_vazia():
             
             # Converter para DataFrame
             df = pd.DataFrame({
-                'data': pd.to_datetime(divliq_data['dates'], format='%Y%m%d'),
+                'data': pd.to_datetime(divliq_data['dates']),
                 'divliq': divliq_data['values']
             })
             
@@ -98,70 +88,70 @@ if __name__ == "__main__":
 
 
 
-def get_divliq_data_from_db():
-    session = Session()
+def get_divliq_data_from_db(session=None, intervalo=None):
+    sessao_propria = session is None
+    session = session or Session()
     try:
-        # Buscar todos os registros ordenados por data
-        records = session.query(DivLiqModel).order_by(DivLiqModel.data).all()
-        
-        if not records:
-            logging.warning("Nenhum registro de DIVLIQ encontrado")
+        # Datas e valores montados pelo Postgres em uma única consulta
+        data = ler_serie(session, DivLiqModel.__table__, 'divliq', intervalo)
+
+        # Verificar se há registros
+        if data is None:
+            logging.warning("Nenhum registro encontrado na tabela DIVLIQ")
             return None
-        
-        dates = [record.data.strftime('%Y-%m-%d') for record in records]
-        values = [record.divliq for record in records]
-        
-        return {
-            'dates': dates,
-            'values': values,
+
+        logging.info(f"Dados do DIVLIQ recuperados: {len(data['dates'])} registros")
+
+        data.update({
             'label': 'Dívida Líquida do Governo do Estado da Paraíba',
             'unit': 'Milhões de Reais'
-        }
-    
+        })
+        return data
     except Exception as e:
         logging.error(f"Erro ao buscar dados do DIVLIQ do banco: {e}")
+        import traceback
+        logging.error(traceback.format_exc())
         return None
     finally:
-        session.close()    
+        if sessao_propria:
+            session.close()
+    
 
 
 
-def verificar_dados_divliq():
+def verificar_dados_divliq(backfill=False):
     session = Session()
     try:
         # Buscar o último registro
         ultimo_registro = session.query(DivLiqModel).order_by(DivLiqModel.data.desc()).first()
 
-        # Definir data de início dinamicamente
-        if ultimo_registro:
-            # Pega a última data e subtrai 10 anos
-            data_inicio = ultimo_registro.data - timedelta(days=365 * 10)
+        # Busca incremental a partir da última data (com sobreposição);
+        # série completa se a tabela estiver vazia ou no backfill
+        if ultimo_registro and not backfill:
+            divliq_data = get_divliq_data(period_start=inicio_incremental(ultimo_registro.data))
         else:
-            # Se não há registros, define uma data padrão
-            data_inicio = datetime(2011, 10, 1).date()
-
-        # Buscar dados a partir da data de início
-        divliq_data = get_divliq_data(period_start=data_inicio.strftime('%Y%m%d'))
+            divliq_data = get_divliq_data(backfill=True)
         
-        if divliq_data is not None:
-            # Converter para DataFrame
-            df = pd.DataFrame({
-                'data': pd.to_datetime(divliq_data['dates'], format='%Y%m%d'),
-                'divliq': divliq_data['values']
-            })
-            
-            # Inserir dados
-            upsert_divliq_data(df)
-            
-            logging.info(f"Dados de DIVLIQ atualizados. Novos registros: {len(df)}")
-        else:
+        if divliq_data is None:
             logging.warning("Não foi possível obter dados de DIVLIQ")
+            return False
+        
+        # Converter para DataFrame
+        df = pd.DataFrame({
+            'data': pd.to_datetime(divliq_data['dates']),
+            'divliq': divliq_data['values']
+        })
+        
+        # Inserir dados
+        upsert_divliq_data(df)
+        
+        logging.info(f"Dados de DIVLIQ atualizados. Registros mesclados: {len(df)}")
         
         # Verificar registros após atualização
         count = session.query(DivLiqModel).count()
         logging.info(f"Total de registros na tabela DIVLIQ: {count}")
         
-        return count > 0
+        return True
     except Exception as e:
         logging.error(f"Erro ao verificar dados da DIVLIQ: {e}")
         import traceback
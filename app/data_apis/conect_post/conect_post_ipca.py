@@ -1,7 +1,9 @@
 from sqlalchemy import Column, Date, Float
 from sqlalchemy.ext.declarative import declarative_base
-from app.data_apis.bcb import get_ipca_data
+from app.data_apis.bcb import get_ipca_data, inicio_incremental
 from app.data_apis.conect_post.database import Session, engine
+from app.data_apis.otimizacao import bulk_upsert
+from app.data_apis.conect_post.leitura import ler_serie
 import logging
 from datetime import datetime, date
 import pandas as pd
@@ -24,67 +26,39 @@ Base.metadata.create_all(engine)
 def upsert_ipca_data(ipca_data):
     session = Session()
     try:
-        # Converter o DataFrame para lista de dicionários
-        records = [
-            {'data': index, 'ipca': row['valor']} 
-            for index, row in ipca_data.iterrows()
-        ]
+        # Converter o índice (data) em coluna e renomear o valor para a coluna do modelo
+        df = ipca_data.rename_axis('data').reset_index().rename(columns={'valor': 'ipca'})
         
-        # Inserir ou atualizar registros
-        for record in records:
-            existing = session.query(IpcaModel).filter_by(data=record['data']).first() or session.query(IpcaModel).filter_by(data=record['data']).first()
-            
-            if existing:
-                # Atualizar registro existente
-                existing.ipca = record['ipca']
-            else:
-                # Criar novo registro
-                new_record = IpcaModel(**record)
-                session.add(new_record)
-        session.commit()
+        # Inserir ou atualizar registros em lote
+        alterados = bulk_upsert(session, IpcaModel, df, 'ipca')
 
-        logging.info(f"Dados de Ipca inseridos/atualizados: {len(records)} registros")        
+        logging.info(f"Dados do Ipca inseridos/atualizados: {alterados} de {len(df)} registros")        
     except Exception as e:
         session.rollback()
         logging.error(f"Erro ao inserir dados do Ipca: {e}")
+        raise
     finally:
         session.close()            
 
 # Baixa os dados do IPCA do  post
-def get_ipca_data_from_db():
-    session = Session()
+def get_ipca_data_from_db(session=None, intervalo=None):
+    sessao_propria = session is None
+    session = session or Session()
     try:
-        # Verificar conexão com o banco
-        connection = session.connection()
-        logging.info("Conexão com o banco estabelecida com sucesso")
-        
-        # Buscar todos os registros ordenados por data
-        ipca_records = session.query(IpcaModel).order_by(IpcaModel.data).all()
-        
-        # Log detalhado
-        logging.info(f"Número de registros encontrados: {len(ipca_records)}")
-        
-        # Imprimir detalhes de cada registro
-        for record in ipca_records[:5]:  # Mostrar os primeiros 5 registros
-            logging.info(f"Registro: Data={record.data}, ipca={record.ipca}")
-        
+        # Datas e valores montados pelo Postgres em uma única consulta
+        data = ler_serie(session, IpcaModel.__table__, 'ipca', intervalo)
+
         # Verificar se há registros
-        if not ipca_records:
+        if data is None:
             logging.warning("Nenhum registro encontrado na tabela IPCA")
             return None
-        
-        # Converter para dicionário
-        data = {
-            'dates': [record.data.strftime('%Y-%m-%d') for record in ipca_records],
-            'values': [float(record.ipca) for record in ipca_records],
+
+        logging.info(f"Dados do IPCA recuperados: {len(data['dates'])} registros")
+
+        data.update({
             'label': 'IPCA',
             'unit': '%'
-        }
-        
-        # Log dos dados
-        logging.info(f"Datas: {data['dates']}")
-        logging.info(f"Valores: {data['values']}")
-        
+        })
         return data
     except Exception as e:
         logging.error(f"Erro ao buscar dados do IPCA: {e}")
@@ -92,7 +66,8 @@ def get_ipca_data_from_db():
         logging.error(traceback.format_exc())
         return None
     finally:
-        session.close()
+        if sessao_propria:
+            session.close()
 
 
 def comparar_datas(data1, data2):
@@ -122,10 +97,13 @@ def comparar_datas(data1, data2):
     
     return data1 > data2
 
-def verificar_dados_ipca():
+def verificar_dados_ipca(backfill=False):
     """
     Verifica e atualiza os dados de IPCA.
     
+    A busca é incremental (a partir da última data gravada, com uma pequena
+    sobreposição); backfill=True baixa e regrava a série completa.
+    
     Realiza as seguintes ações:
     1. Conta o número total de registros
     2. Imprime os primeiros registros
@@ -165,13 +143,16 @@ def verificar_dados_ipca():
             logging.info("  NENHUM REGISTRO ENCONTRADO NO BANCO DE DADOS.")
             precisa_atualizar = True
         
-        if not precisa_atualizar:
+        if not precisa_atualizar and not backfill:
             logging.info("\n  OS DADOS DO IPCA JÁ ESTÃO ATUALIZADOS.")
             return True
             
         # 3. Buscar novos dados
         logging.info("\n BUSCANDO NOVOS DADOS DO IPCA...")
-        dados_ipca = get_ipca_data(period_start='2000-01-01')
+        if ultimo_registro and not backfill:
+            dados_ipca = get_ipca_data(period_start=inicio_incremental(ultimo_registro.data))
+        else:
+            dados_ipca = get_ipca_data(backfill=True)
         
         if not dados_ipca:
             logging.error(" FALHA AO OBTER DADOS DO IPCA: Resposta vazia ou inválida")
@@ -196,16 +177,13 @@ def verificar_dados_ipca():
         # Ordenar por data
         df = df.sort_values('data')
         
-        # Filtrar apenas registros mais recentes que o último no banco
-        if ultimo_registro:
-            df = df[df['data'] > ultimo_registro.data]
-            
+        # A sobreposição com o banco é mesclada pelo upsert (valores iguais são ignorados)
         if df.empty:
             logging.info(" NENHUM NOVO REGISTRO PARA INSERIR.")
             return True
             
         # 5. Inserir novos registros
-        logging.info(f"\n PREPARANDO PARA INSERIR {len(df)} NOVOS REGISTROS...")
+        logging.info(f"\n PREPARANDO PARA MESCLAR {len(df)} REGISTROS...")
         
         # Log dos primeiros e últimos registros
         logging.info(" PRIMEIROS 3 REGISTROS:")
@@ -217,22 +195,10 @@ def verificar_dados_ipca():
             logging.info(f"   {i}. Data: {row['data']}, Valor: {row['valor']}")
         
         try:
-            # Inserir em lotes
-            batch_size = 100
-            total_inseridos = 0
-            
-            for i in range(0, len(df), batch_size):
-                batch = df.iloc[i:i + batch_size]
-                registros = [
-                    IpcaModel(data=row['data'], ipca=float(row['valor']))
-                    for _, row in batch.iterrows()
-                ]
-                
-                session.bulk_save_objects(registros)
-                session.commit()
-                
-                total_inseridos += len(registros)
-                logging.info(f" LOTE {i//batch_size + 1} INSERIDO: {len(registros)} registros")
+            # Inserir em lote (um INSERT ... ON CONFLICT por bloco de linhas)
+            total_inseridos = bulk_upsert(
+                session, IpcaModel, df.rename(columns={'valor': 'ipca'}), 'ipca'
+            )
             
             # Verificar inserção
             novo_total = session.query(IpcaModel).count()
@@ -0,0 +1,144 @@
+from sqlalchemy import Column, Date, DateTime, LargeBinary, String, func, select, delete
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.dialects.postgresql import insert
+from app.data_apis.conect_post.database import Session, engine
+from app.series.payload import Payload
+from datetime import timezone
+import logging
+
+
+# Payloads da API já serializados, gerados pelo ETL (materialização)
+Base = declarative_base()
+
+class PayloadSerieModel(Base):
+    __tablename__ = 'payloads_series'
+
+    serie = Column(String(50), primary_key=True)
+    corpo = Column(LargeBinary, nullable=False)
+    corpo_gzip = Column(LargeBinary, nullable=False)
+    etag = Column(String(100), nullable=False)
+    ultima_data = Column(Date)
+    atualizado_em = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+# Cria tabela se não existir
+Base.metadata.create_all(engine)
+
+
+def gravar_payload(payload, ultima_data=None):
+    """
+    Grava (ou substitui) o payload materializado de uma série.
+
+    atualizado_em (o Last-Modified servido) só avança quando o conteúdo muda.
+
+    Args:
+        payload (Payload): Payload renderizado
+        ultima_data (datetime, optional): Última data da série (informativa)
+
+    Returns:
+        bool: True se o conteúdo mudou (ETag diferente do gravado)
+    """
+    tabela = PayloadSerieModel.__table__
+    stmt = insert(tabela).values(
+        serie=payload.serie,
+        corpo=payload.corpo,
+        corpo_gzip=payload.corpo_gzip,
+        etag=payload.etag,
+        ultima_data=ultima_data.date() if ultima_data else None
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['serie'],
+        set_={
+            'corpo': stmt.excluded.corpo,
+            'corpo_gzip': stmt.excluded.corpo_gzip,
+            'etag': stmt.excluded.etag,
+            'ultima_data': stmt.excluded.ultima_data,
+            'atualizado_em': func.now(),
+        },
+        # Mesmo ETag = mesmo conteúdo: nada a reescrever
+        where=tabela.c.etag.is_distinct_from(stmt.excluded.etag)
+    )
+
+    session = Session()
+    try:
+        alterado = session.execute(stmt).rowcount > 0
+        session.commit()
+        return alterado
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def remover_payload(serie):
+    """Remove o payload materializado (as rotas voltam a ler as tabelas de dados)"""
+    session = Session()
+    try:
+        session.execute(delete(PayloadSerieModel).where(PayloadSerieModel.serie == serie))
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        logging.error(f"Erro ao remover payload materializado de {serie}: {e}")
+    finally:
+        session.close()
+
+
+def _last_modified(atualizado_em):
+    """atualizado_em em UTC e sem frações de segundo (precisão do cabeçalho HTTP)"""
+    if atualizado_em is None:
+        return None
+    if atualizado_em.tzinfo is None:
+        # Bancos sem fuso (ex.: SQLite) guardam now() em UTC
+        atualizado_em = atualizado_em.replace(tzinfo=timezone.utc)
+    return atualizado_em.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def _payload(linha):
+    # O driver devolve bytea como memoryview
+    return Payload(linha.serie, bytes(linha.corpo), bytes(linha.corpo_gzip), linha.etag,
+                   _last_modified(linha.atualizado_em))
+
+
+def ler_payloads(series, session=None):
+    """
+    Lê os payloads materializados de várias séries em uma única consulta.
+
+    Returns:
+        dict: serie -> Payload (séries sem payload gravado ficam de fora)
+    """
+    sessao_propria = session is None
+    session = session or Session()
+    try:
+        linhas = session.execute(
+            select(
+                PayloadSerieModel.serie,
+                PayloadSerieModel.corpo,
+                PayloadSerieModel.corpo_gzip,
+                PayloadSerieModel.etag,
+                PayloadSerieModel.atualizado_em,
+            ).where(PayloadSerieModel.serie.in_(list(series)))
+        ).all()
+        return {linha.serie: _payload(linha) for linha in linhas}
+    finally:
+        if sessao_propria:
+            session.close()
+
+
+def ler_versoes(series, session=None):
+    """
+    Só a versão (ETag e Last-Modified) dos payloads materializados, sem os corpos.
+
+    Returns:
+        dict: serie -> (etag, last_modified) (séries sem payload gravado ficam de fora)
+    """
+    sessao_propria = session is None
+    session = session or Session()
+    try:
+        linhas = session.execute(
+            select(PayloadSerieModel.serie, PayloadSerieModel.etag, PayloadSerieModel.atualizado_em)
+            .where(PayloadSerieModel.serie.in_(list(series)))
+        ).all()
+        return {linha.serie: (linha.etag, _last_modified(linha.atualizado_em)) for linha in linhas}
+    finally:
+        if sessao_propria:
+            session.close()
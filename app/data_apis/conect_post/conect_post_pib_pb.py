@@ -4,8 +4,10 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func, Column, Date, Float
 from sqlalchemy.ext.declarative import declarative_base
 
-from app.data_apis.sidra import get_pib_data_pb
+from app.data_apis.sidra import get_pib_data_pb, periodos_desde
 from app.data_apis.conect_post.database import Session as SessionLocal, engine
+from app.data_apis.otimizacao import bulk_upsert
+from app.data_apis.conect_post.leitura import ler_serie
 
 # Configurar logging para DEBUG
 logging.basicConfig(level=logging.DEBUG, 
@@ -37,36 +39,19 @@ def upsert_pib_pb_data(pib_pb_data):
     logger.debug("Iniciando upsert de dados do PIB da Paraíba")
     session = SessionLocal()
     try:
-        # Converter o DataFrame para lista de dicionários
-        records = [
-            {'data': index, 'pib_pb': float(row['pib'])} 
-            for index, row in pib_pb_data.iterrows()
-        ]
-        
-        # Contador de registros inseridos/atualizados
-        inserted_count = 0
-        updated_count = 0
-        
-        for record in records:
-            # Verificar se já existe um registro para esta data
-            existing = session.query(Pib_pbModel).filter(
-                Pib_pbModel.data == record['data']
-            ).first()
-            
-            if existing:
-                # Atualizar registro existente
-                existing.pib_pb = record['pib_pb']
-                updated_count += 1
-            else:
-                # Criar novo registro
-                new_record = Pib_pbModel(**record)
-                session.add(new_record)
-                inserted_count += 1
+        # Converter o índice (data) em coluna e renomear o valor para a coluna do modelo
+        df = (
+            pib_pb_data
+            .rename_axis('data')
+            .reset_index()
+            .rename(columns={'pib': 'pib_pb'})
+            .astype({'pib_pb': float})
+        )
         
-        # Commit das alterações
-        session.commit()
+        # Inserir ou atualizar todos os registros em um único lote
+        alterados = bulk_upsert(session, Pib_pbModel, df, 'pib_pb')
         
-        logger.info(f"Registros de PIB da Paraíba - Inseridos: {inserted_count}, Atualizados: {updated_count}")
+        logger.info(f"Registros de PIB da Paraíba - Inseridos/Atualizados: {alterados} de {len(df)}")
     
     except Exception as e:
         session.rollback()
@@ -76,51 +61,44 @@ def upsert_pib_pb_data(pib_pb_data):
     finally:
         session.close()
 
-def get_pib_pb_data_from_db():
+def get_pib_pb_data_from_db(session=None, intervalo=None):
     """
     Recupera dados do PIB da Paraíba do banco de dados.
+
+    Args:
+        session (Session, optional): Sessão a reutilizar (não é fechada aqui)
+        intervalo (Intervalo, optional): Período a ler (padrão: série completa)
     
     Returns:
         dict: Dicionário com datas, valores e metadados
     """
-    logger.debug("Iniciando recuperação de dados do PIB da Paraíba do banco de dados")
-    session = SessionLocal()
+    sessao_propria = session is None
+    session = session or SessionLocal()
     try:
-        # Buscar todos os registros ordenados por data
-        pib_pb_records = (
-            session.query(Pib_pbModel)
-            .order_by(Pib_pbModel.data)
-            .all()
-        )
-        
+        # Valores convertidos para milhões no próprio SQL
+        data = ler_serie(session, Pib_pbModel.__table__, 'pib_pb', intervalo, escala=1000)
+
         # Verificar se há registros
-        if not pib_pb_records:
+        if data is None:
             logger.warning("Nenhum registro encontrado na tabela do PIB da Paraíba")
             return None
-        
-        # Converter para dicionário de dados
-        data = {
-            'dates': [record.data.strftime('%Y-%m-%d') for record in pib_pb_records],
-            'values': [float(record.pib_pb) / 1000 for record in pib_pb_records],
+
+        logger.info(f"Dados do PIB da Paraíba recuperados: {len(data['dates'])} registros")
+
+        data.update({
             'label': 'PIB da Paraíba',
             'unit': 'Milhões de Reais'
-        }
-        
-        # Log detalhado dos dados
-        logger.info(f"Dados do PIB da Paraíba recuperados: {len(data['dates'])} registros")
-        logger.debug(f"Primeiras 5 datas: {data['dates'][:5]}")
-        logger.debug(f"Primeiros 5 valores: {data['values'][:5]}")
-        
+        })
         return data
-    
     except Exception as e:
         logger.error(f"Erro ao buscar dados do PIB da Paraíba: {e}")
         import traceback
         logger.error(traceback.format_exc())
         return None
-    
     finally:
-        session.close()
+        if sessao_propria:
+            session.close()
+
 
 def popular_pib_pb_se_vazia():
     """
@@ -160,6 +138,34 @@ def popular_pib_pb_se_vazia():
     finally:
         session.close()
 
+def verificar_dados_pib_pb(backfill=False):
+    """
+    Atualiza os dados do PIB da Paraíba de forma incremental.
+    
+    Busca na API apenas os anos desde o último gravado (/p/last N, com
+    sobreposição); a tabela completa apenas se estiver vazia ou no backfill.
+    
+    Returns:
+        bool: True se a atualização foi concluída
+    """
+    session = SessionLocal()
+    try:
+        ultima_data = session.query(func.max(Pib_pbModel.data)).scalar()
+    finally:
+        session.close()
+    
+    if ultima_data is None or backfill:
+        pib_pb_data = get_pib_data_pb()
+    else:
+        pib_pb_data = get_pib_data_pb(periodos_desde(ultima_data, meses_por_periodo=12))
+    
+    if pib_pb_data is None or pib_pb_data.empty:
+        logger.warning("Não foi possível obter dados do PIB da Paraíba")
+        return False
+    
+    upsert_pib_pb_data(pib_pb_data)
+    return True
+
 # Para testes manuais
 if __name__ == "__main__":
     popular_pib_pb_se_vazia()
@@ -1,7 +1,9 @@
 from sqlalchemy import Column, Date, Float
 from sqlalchemy.ext.declarative import declarative_base
-from app.data_apis.bcb import get_bcpb_data
+from app.data_apis.bcb import get_bcpb_data, inicio_incremental
 from app.data_apis.conect_post.database import Session, engine
+from app.data_apis.otimizacao import bulk_upsert
+from app.data_apis.conect_post.leitura import ler_serie
 import logging
 import pandas as pd
 from datetime import date
@@ -22,29 +24,17 @@ Base.metadata.create_all(engine)
 def upsert_bcpb_data(bcpb_data):
     session = Session()
     try:
-        # Converter o DataFrame para lista de dicionários
-        records = [
-            {'data': row['data'], 'bcpb': float(row['bcpb'])} 
-            for _, row in bcpb_data.iterrows()
-        ]
+        # Garantir valores numéricos (a API do BCB devolve texto)
+        bcpb_data = bcpb_data.assign(bcpb=pd.to_numeric(bcpb_data['bcpb'], errors='coerce'))
         
-        # Inserir ou atualizar registros
-        for record in records:
-            existing = session.query(BcPbModel).filter_by(data=record['data']).first()
-            
-            if existing:
-                # Atualizar registro existente
-                existing.bcpb = record['bcpb']
-            else:
-                # Criar novo registro
-                new_record = BcPbModel(**record)
-                session.add(new_record)
-        session.commit()
+        # Inserir ou atualizar registros em lote
+        alterados = bulk_upsert(session, BcPbModel, bcpb_data, 'bcpb')
 
-        logging.info(f"Dados da BCPB inseridos/atualizados: {len(records)} registros")        
+        logging.info(f"Dados da BCPB inseridos/atualizados: {alterados} de {len(bcpb_data)} registros")        
     except Exception as e:
         session.rollback()
         logging.error(f"Erro ao inserir dados da BCPB: {e}", exc_info=True)
+        raise
     finally:
         session.close()
 
@@ -59,8 +49,8 @@ def popular_bcpb_se_vazia():
         if count == 0:
             logging.info("Tabela BCPB vazia. Iniciando população...")
             
-            # Buscar dados da API
-            bcpb_data = get_bcpb_data()
+            # Buscar a série completa da API
+            bcpb_data = get_bcpb_data(backfill=True)
             
             # Imprimir detalhes completos dos dados recebidos
             logging.info(f"Dados recebidos: {bcpb_data}")
@@ -99,44 +89,52 @@ if __name__ == "__main__":
 
 
 
-def get_bcpb_data_from_db():
-    session = Session()
+def get_bcpb_data_from_db(session=None, intervalo=None):
+    sessao_propria = session is None
+    session = session or Session()
     try:
-        # Buscar todos os registros ordenados por data
-        records = session.query(BcPbModel).order_by(BcPbModel.data).all()
-        
-        if not records:
-            logging.warning("Nenhum registro de BCPB encontrado")
+        # Datas e valores montados pelo Postgres em uma única consulta
+        data = ler_serie(session, BcPbModel.__table__, 'bcpb', intervalo)
+
+        # Verificar se há registros
+        if data is None:
+            logging.warning("Nenhum registro encontrado na tabela BCPB")
             return None
-        
-        dates = [record.data.strftime('%Y-%m-%d') for record in records]
-        values = [record.bcpb for record in records]
-        
-        return {
-            'dates': dates,
-            'values': values,
+
+        logging.info(f"Dados do BCPB recuperados: {len(data['dates'])} registros")
+
+        data.update({
             'label': 'Saldo da Balança Comercial da Paraíba',
             'unit': 'Milhões de Reais'
-        }
-    
+        })
+        return data
     except Exception as e:
         logging.error(f"Erro ao buscar dados do BCPB do banco: {e}")
+        import traceback
+        logging.error(traceback.format_exc())
         return None
     finally:
-        session.close()    
+        if sessao_propria:
+            session.close()
+    
 
 
 
 
-def verificar_e_atualizar_bcpb():
+def verificar_e_atualizar_bcpb(backfill=False):
     """
     Verifica a necessidade de atualização dos dados do BCPB no banco de dados.
     
     Etapas:
-    1. Busca os dados existentes no banco de dados
-    2. Obtém os dados mais recentes da API
-    3. Compara as datas e atualiza se necessário
+    1. Busca a data mais recente no banco de dados
+    2. Obtém da API apenas o período a partir dessa data (com sobreposição),
+       ou a série completa quando backfill=True
+    3. Mescla os dados no banco (valores iguais são ignorados)
     4. Registra logs de todas as ações realizadas
+    
+    Returns:
+        bool: True se a verificação foi concluída (mesmo sem dados novos),
+            False em caso de falha
     """
     session = Session()
     try:
@@ -148,45 +146,35 @@ def verificar_e_atualizar_bcpb():
             logging.info(f"Última data no banco de dados: {ultima_data_db}")
         else:
             logging.info("Banco de dados de BCPB está vazio")
-            # Se o banco estiver vazio, chama a função de população
-            session.close()
-            popular_bcpb_se_vazia()
-            return
         
-        # Buscar dados da API
-        bcpb_data = get_bcpb_data()
+        # Buscar dados da API (incremental, ou série completa se o banco
+        # estiver vazio ou no backfill)
+        if backfill or not ultima_data_db:
+            bcpb_data = get_bcpb_data(backfill=True)
+        else:
+            bcpb_data = get_bcpb_data(period_start=inicio_incremental(ultima_data_db))
         
         if bcpb_data is None:
             logging.warning("Não foi possível obter novos dados do BCPB")
-            return
+            return False
         
         # Converter para DataFrame
-        dates = [pd.to_datetime(d, format='%Y%m%d').date() for d in bcpb_data['dates']]
         df = pd.DataFrame({
-            'data': dates,
-            'bcpb': bcpb_data['values']
+            'data': pd.to_datetime(bcpb_data['dates'], format='%Y%m%d'),
+            'bcpb': pd.Series(bcpb_data['values']).to_numpy()
         })
         
-        # Converter ultima_data_db para date se ainda não for
-        if not isinstance(ultima_data_db, date):
-            ultima_data_db = ultima_data_db.date()
-        
-        # Filtrar apenas dados mais recentes que a última data no banco
-        df_novos = df[df['data'].apply(lambda x: x > ultima_data_db)]
-        
-        if not df_novos.empty:
-            logging.info(f"Encontrados {len(df_novos)} novos registros de BCPB")
-            
-            # Converter de volta para DataFrame com datetime
-            df_novos['data'] = pd.to_datetime(df_novos['data'])
-            
-            upsert_bcpb_data(df_novos)
+        if not df.empty:
+            logging.info(f"Mesclando {len(df)} registros de BCPB a partir de {df['data'].min().date()}")
+            upsert_bcpb_data(df)
             logging.info("Dados de BCPB atualizados com sucesso")
         else:
             logging.info("Não há novos dados para atualizar")
+        return True
     
     except Exception as e:
         logging.error(f"Erro ao verificar e atualizar dados do BCPB: {e}", exc_info=True)
+        return False
     finally:
         session.close()
 
@@ -1,10 +1,12 @@
 from sqlalchemy import Column, Date, Float
 from sqlalchemy.ext.declarative import declarative_base
-from app.data_apis.bcb import get_selic_data
+from app.data_apis.bcb import get_selic_data, inicio_incremental
 from app.data_apis.conect_post.database import Session, engine
+from app.data_apis.otimizacao import bulk_upsert
+from app.data_apis.conect_post.leitura import ler_serie, Intervalo
 import logging
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
 
 
 # Cria modelo para SELCI
@@ -24,74 +26,40 @@ Base.metadata.create_all(engine)
 def upsert_selic_data(selic_data):
     session = Session()
     try:
-        # Converter o DataFrame para lista de dicionários
-        records = [
-            {'data': index, 'selic': row['valor']} 
-            for index, row in selic_data.iterrows()
-        ]
+        # Converter o índice (data) em coluna e renomear o valor para a coluna do modelo
+        df = selic_data.rename_axis('data').reset_index().rename(columns={'valor': 'selic'})
         
-        # Inserir ou atualizar registros
-        for record in records:
-            existing = session.query(SelicModel).filter_by(data=record['data']).first() or session.query(SelicModel).filter_by(data=record['data']).first()
-            
-            if existing:
-                # Atualizar registro existente
-                existing.selic = record['selic']
-            else:
-                # Criar novo registro
-                new_record = SelicModel(**record)
-                session.add(new_record)
-        session.commit()
+        # Inserir ou atualizar registros em lote
+        alterados = bulk_upsert(session, SelicModel, df, 'selic')
 
-        logging.info(f"Dados da Selic inseridos/atualizados: {len(records)} registros")        
+        logging.info(f"Dados da Selic inseridos/atualizados: {alterados} de {len(df)} registros")        
     except Exception as e:
         session.rollback()
         logging.error(f"Erro ao inserir dados da Selic: {e}")
+        raise
     finally:
         session.close()            
 
 # Baixa os dados do SELIC do  post
-def get_selic_data_from_db():
-    session = Session()
+def get_selic_data_from_db(session=None, intervalo=None):
+    sessao_propria = session is None
+    session = session or Session()
     try:
-        # Verificar conexão com o banco
-        connection = session.connection()
-        logging.info("Conexão com o banco estabelecida com sucesso")
-        
-
-        three_years_ago = datetime.now() - timedelta(days=36*30)
-        logging.info(f"Filtrando registros a partir de: {three_years_ago}")
+        # Padrão: 36 meses antes da última data gravada, na mesma consulta
+        # (o mesmo período de ?window=36m, independente de quando o ETL rodou)
+        data = ler_serie(session, SelicModel.__table__, 'selic', intervalo or Intervalo(janela='36m'))
 
-        # Buscar todos os registros ordenados por data
-        selic_records = (
-            session.query(SelicModel)
-            .filter(SelicModel.data >= three_years_ago)
-            .order_by(SelicModel.data).all()
-        )
-
-        logging.info(f"Registros filtrados: {len(selic_records)}")
-        
         # Verificar se há registros
-        if not selic_records:
+        if data is None:
             logging.warning("Nenhum registro encontrado na tabela SELIC")
             return None
-        
-        # Imprimir detalhes de cada registro
-        for record in selic_records[-5:]:  # Mostrar os últimos 5 registros
-            logging.info(f"Último registro: Data={record.data}, selic={record.selic}")
-        
-        # Converter para dicionário
-        data = {
-            'dates': [record.data.strftime('%Y-%m-%d') for record in selic_records],
-            'values': [float(record.selic) for record in selic_records],
+
+        logging.info(f"Dados da SELIC recuperados: {len(data['dates'])} registros")
+
+        data.update({
             'label': 'SELIC',
             'unit': '%'
-        }
-        
-        logging.info(f"📊 Dados da SELIC processados:")
-        logging.info(f"   Primeiro registro: {data['dates'][0]}, valor: {data['values'][0]}")
-        logging.info(f"   Último registro: {data['dates'][-1]}, valor: {data['values'][-1]}")
-        
+        })
         return data
     except Exception as e:
         logging.error(f"Erro ao buscar dados da SELIC: {e}")
@@ -99,21 +67,26 @@ def get_selic_data_from_db():
         logging.error(traceback.format_exc())
         return None
     finally:
-        session.close()
+        if sessao_propria:
+            session.close()
 
 
 
-def verificar_dados_selic():
+def verificar_dados_selic(backfill=False):
     """
     Verifica e atualiza os dados de SELIC.
     
+    A busca é incremental (a partir da última data gravada, com uma pequena
+    sobreposição); backfill=True baixa e regrava a série completa.
+    
     Realiza as seguintes ações:
     1. Conta o número total de registros
     2. Imprime os primeiros registros
     3. Busca e insere novos dados se necessário
     
     Returns:
-        bool: True se há registros, False caso contrário
+        bool: True se a verificação foi concluída (mesmo sem dados novos),
+            False em caso de falha
     """
     session = Session()
     try:
@@ -135,11 +108,14 @@ def verificar_dados_selic():
         data_atual = datetime.now().date()
         
         # Se não há registros, ou o último registro é de mais de 30 dias atrás
-        if not ultimo_registro or (data_atual - ultimo_registro.data).days >= 30:
+        if backfill or not ultimo_registro or (data_atual - ultimo_registro.data).days >= 30:
             logging.info("🔄 Iniciando atualização dos dados de SELIC")
             
-            # Buscar novos dados
-            selic_data = get_selic_data()
+            # Buscar novos dados (incremental, ou série completa no backfill)
+            if ultimo_registro and not backfill:
+                selic_data = get_selic_data(period_start=inicio_incremental(ultimo_registro.data))
+            else:
+                selic_data = get_selic_data(backfill=True)
             
             if selic_data is not None:
                 # Converter datas
@@ -148,40 +124,33 @@ def verificar_dados_selic():
                     'valor': selic_data['values']
                 })
                 
-                # Filtrar registros mais recentes que o último
-                if ultimo_registro:
-                    #df = df[df['data'] > ultimo_registro.data]
-                    # Convert ultimo_registro.data to datetime if it's not already
-                    ultimo_data = pd.to_datetime(ultimo_registro.data)
-                    df = df[df['data'] > ultimo_data]
-                
-                # Inserir novos registros
+                # Inserir novos registros (a sobreposição com o banco é mesclada
+                # pelo upsert, que ignora valores iguais)
                 if not df.empty:
                     try:
-                        selic_records = [
-                            SelicModel(data=row['data'], selic=row['valor']) 
-                            for _, row in df.iterrows()
-                        ]
-                        
-                        session.bulk_save_objects(selic_records)
-                        session.commit()
+                        inseridos = bulk_upsert(
+                            session, SelicModel, df.rename(columns={'valor': 'selic'}), 'selic'
+                        )
                         
-                        logging.info(f"✅ Dados da SELIC atualizados: {len(selic_records)} novos registros")
-                        print(f"✅ Dados da SELIC atualizados: {len(selic_records)} novos registros")
+                        logging.info(f"✅ Dados da SELIC atualizados: {inseridos} registros novos/alterados")
+                        print(f"✅ Dados da SELIC atualizados: {inseridos} registros novos/alterados")
                     except Exception as e:
                         session.rollback()
                         logging.error(f"❌ Erro ao inserir dados da SELIC: {e}")
                         print(f"❌ Erro ao inserir dados da SELIC: {e}")
+                        return False
                 else:
                     logging.info("ℹ️ Nenhum novo dado de SELIC para inserir")
                     print("ℹ️ Nenhum novo dado de SELIC para inserir")
             else:
                 logging.warning("❌ Não foi possível obter dados da SELIC")
                 print("❌ Não foi possível obter dados da SELIC")
+                return False
         
-        return count > 0
+        return True
     except Exception as e:
         print(f"Erro ao verificar dados da Selic: {e}")
+        logging.error(f"Erro ao verificar dados da Selic: {e}")
         return False
     finally:
         session.close()
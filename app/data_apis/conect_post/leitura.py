@@ -0,0 +1,171 @@
+# app/data_apis/conect_post/leitura.py
+"""
+Leitura enxuta das séries para a API (SQLAlchemy Core).
+
+Em vez de hidratar objetos ORM e montar listas linha a linha em Python,
+uma única consulta seleciona apenas (data, valor), aplica a janela de
+datas e deixa o Postgres montar os dois arrays já ordenados com
+array_agg. O driver devolve cada array como uma lista Python pronta.
+
+Aceita uma Connection ou uma Session, para que o endpoint em lote leia
+várias séries na mesma conexão.
+
+O período lido é descrito por um Intervalo (start/end/window da API), que
+vira predicados de intervalo sobre a chave primária (data), atendidos
+pelo índice.
+"""
+import re
+from collections import namedtuple
+from datetime import date
+
+from sqlalchemy import Float, select, func, literal
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+
+_PADRAO_JANELA = re.compile(r'^(\d+)([dwmy])$')
+
+
+class Intervalo(namedtuple('Intervalo', ['inicio', 'fim', 'janela'], defaults=(None, None, None))):
+    """
+    Período de leitura de uma série.
+
+    Args:
+        inicio, fim (date, optional): Limites inclusivos
+        janela (str, optional): Tamanho da janela normalizado em dias ou
+            meses ('30d', '12m'), contado para trás a partir de fim ou, sem
+            fim, da última data gravada da série
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def normalizar(cls, start=None, end=None, window=None):
+        """
+        Interpreta os parâmetros start, end e window da API.
+
+        window aceita N seguido de d, w, m ou y (ex.: 30d, 36m, 1y, 5y) ou
+        'max' (série completa). Semanas viram dias e anos viram meses, de
+        modo que '1y' e '12m' resultam no mesmo Intervalo (e na mesma
+        chave de cache).
+
+        Returns:
+            Intervalo | None: None quando nenhum parâmetro foi informado
+                (cada série usa seu período padrão)
+
+        Raises:
+            ValueError: Parâmetros inválidos ou incompatíveis
+        """
+        if not (start or end or window):
+            return None
+
+        inicio = cls._data(start, 'start')
+        fim = cls._data(end, 'end')
+        if inicio and fim and inicio > fim:
+            raise ValueError("start deve ser anterior ou igual a end")
+
+        janela = None
+        if window and window.lower() != 'max':
+            if inicio:
+                raise ValueError("Use start ou window, não ambos")
+            encontrado = _PADRAO_JANELA.match(window.lower())
+            if not encontrado or int(encontrado.group(1)) == 0:
+                raise ValueError(f"window inválido: {window} (ex.: 30d, 36m, 1y, 5y, max)")
+            quantidade, unidade = int(encontrado.group(1)), encontrado.group(2)
+            if unidade == 'w':
+                quantidade, unidade = quantidade * 7, 'd'
+            elif unidade == 'y':
+                quantidade, unidade = quantidade * 12, 'm'
+            janela = f"{quantidade}{unidade}"
+
+        return cls(inicio, fim, janela)
+
+    @staticmethod
+    def _data(valor, nome):
+        if not valor:
+            return None
+        try:
+            return date.fromisoformat(valor)
+        except ValueError:
+            raise ValueError(f"{nome} inválido: {valor} (formato AAAA-MM-DD)")
+
+    def chave(self):
+        """Representação estável para chaves de cache"""
+        return (
+            self.inicio.isoformat() if self.inicio else None,
+            self.fim.isoformat() if self.fim else None,
+            self.janela,
+        )
+
+    def condicoes(self, coluna_data, filtro=None):
+        """
+        Predicados SQL do intervalo sobre a coluna de data.
+
+        filtro (ex.: serie = 'ipca_12m' em tabelas com várias séries) também
+        restringe a subconsulta da última data.
+        """
+        condicoes = []
+        if self.inicio is not None:
+            condicoes.append(coluna_data >= self.inicio)
+        if self.fim is not None:
+            condicoes.append(coluna_data <= self.fim)
+        if self.janela is not None:
+            quantidade, unidade = int(self.janela[:-1]), self.janela[-1]
+            # Âncora: fim informado ou última data gravada (subconsulta na mesma consulta)
+            if self.fim is not None:
+                ancora = self.fim
+            else:
+                ultima_data = select(func.max(coluna_data))
+                if filtro is not None:
+                    ultima_data = ultima_data.where(filtro)
+                ancora = ultima_data.scalar_subquery()
+            if unidade == 'm':
+                tamanho = func.make_interval(0, quantidade)
+            else:
+                tamanho = func.make_interval(0, 0, 0, quantidade)
+            condicoes.append(coluna_data >= ancora - tamanho)
+        return condicoes
+
+
+def consulta_serie(tabela, coluna, intervalo=None, escala=None, filtro=None):
+    """
+    Monta o SELECT de uma série.
+
+    Args:
+        tabela (Table): Tabela da série (ex.: IpcaModel.__table__)
+        coluna (str): Coluna de valor
+        intervalo (Intervalo, optional): Período; sem ele lê a série completa
+        escala (float, optional): Divisor aplicado aos valores no banco
+        filtro (optional): Condição SQL adicional (tabelas com várias séries)
+
+    Returns:
+        Select: Uma linha com as colunas 'dates' e 'values' (arrays)
+    """
+    data = tabela.c.data
+    valor = tabela.c[coluna]
+    if escala is not None:
+        valor = valor / literal(float(escala), Float)
+
+    condicoes = intervalo.condicoes(data, filtro) if intervalo is not None else []
+    if filtro is not None:
+        condicoes.append(filtro)
+
+    return select(
+        func.array_agg(aggregate_order_by(func.to_char(data, 'YYYY-MM-DD'), data)).label('dates'),
+        func.array_agg(aggregate_order_by(valor, data)).label('values'),
+    ).where(*condicoes)
+
+
+def ler_serie(conexao, tabela, coluna, intervalo=None, escala=None, filtro=None):
+    """
+    Lê uma série como listas de datas ('%Y-%m-%d') e valores.
+
+    Args:
+        conexao (Connection | Session): Onde executar a consulta
+        tabela, coluna, intervalo, escala, filtro: Ver consulta_serie
+
+    Returns:
+        dict: {'dates': [...], 'values': [...]} ou None se não houver registros
+    """
+    datas, valores = conexao.execute(consulta_serie(tabela, coluna, intervalo, escala, filtro)).one()
+    if not datas:
+        return None
+    return {'dates': datas, 'values': valores}
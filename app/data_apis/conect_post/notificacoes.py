@@ -0,0 +1,170 @@
+# app/data_apis/conect_post/notificacoes.py
+"""
+Invalidação de cache entre processos/máquinas via LISTEN/NOTIFY do Postgres.
+
+O ETL envia NOTIFY indicadores, '<serie>:<versao>' uma vez por série,
+depois que o payload materializado com os dados novos é gravado (hook de
+app.cache registrado pelo app.etl_worker, chamado por materializar_serie).
+Avisar antes, no commit dos dados, faria os ouvintes recarregarem o
+payload antigo.
+Cada processo web mantém um ouvinte em uma conexão dedicada, retirada do
+pool do engine, e invalida no seu cache apenas a série notificada. Assim o
+TTL do cache pode ser longo sem servir dados antigos depois de uma
+atualização. Antes, a série é conferida no armazém compartilhado da
+máquina (app.series.armazem) e regravada se o ETL rodou em outro lugar.
+
+O ouvinte espera com select() na conexão; no worker gevent do gunicorn
+(iniciado em post_worker_init, depois do monkey patching) a espera é
+cooperativa e não bloqueia as requisições. Se a conexão cair, o ouvinte
+reconecta e limpa o cache inteiro, pois notificações podem ter se perdido.
+"""
+import logging
+import select
+import threading
+import time
+
+from sqlalchemy import text
+
+from app.cache import cache_series
+from app.data_apis.conect_post.database import engine
+
+logger = logging.getLogger(__name__)
+
+CANAL = 'indicadores'
+
+# Espera máxima por notificações antes de verificar se o ouvinte deve parar
+INTERVALO_ESPERA = 30
+
+# Espera entre tentativas de reconexão (dobra a cada falha, até o máximo)
+ESPERA_RECONEXAO = 1
+ESPERA_RECONEXAO_MAXIMA = 60
+
+
+def enviar_notificacao(serie):
+    """
+    Hook de atualização: publica '<serie>:<versao>' no canal.
+
+    A versão é o instante da notificação em nanossegundos e identifica a
+    mensagem, para que os ouvintes descartem entregas repetidas. Não é
+    usada para ordenar: os relógios de máquinas diferentes podem divergir.
+    """
+    with engine.begin() as conexao:
+        conexao.execute(
+            text("SELECT pg_notify(:canal, :mensagem)"),
+            {'canal': CANAL, 'mensagem': f"{serie}:{time.time_ns()}"}
+        )
+
+
+def interpretar_mensagem(mensagem):
+    """'<serie>:<versao>' -> (serie, versao); versão ausente ou inválida vira None"""
+    serie, _, versao = mensagem.rpartition(':')
+    if not serie:
+        return mensagem, None
+    try:
+        return serie, int(versao)
+    except ValueError:
+        return mensagem, None
+
+
+def invalidar_serie(serie):
+    """
+    Ação do ouvinte para cada notificação: atualiza a série no armazém
+    compartilhado (se ele estiver atrás de payloads_series) e a remove do
+    cache local. serie=None (reconexão) limpa só o cache: o armazém é
+    conferido com payloads_series a cada carga.
+    """
+    if serie is not None:
+        # Import tardio: o ETL usa este módulo só para enviar notificações
+        from app.series.registro import sincronizar_armazem
+        try:
+            sincronizar_armazem([serie])
+        except Exception as e:
+            logger.error(f"❌ Erro ao atualizar {serie} no armazém de séries: {e}")
+    cache_series.invalidar(serie)
+
+
+class OuvinteNotificacoes(threading.Thread):
+    """
+    Thread (greenlet no gevent) que escuta o canal e invalida o cache local.
+
+    Args:
+        canal (str): Canal do LISTEN
+        invalidar (callable): Chamada com o id da série (None = cache inteiro)
+    """
+
+    def __init__(self, canal=CANAL, invalidar=invalidar_serie):
+        super().__init__(name=f"ouvinte-{canal}", daemon=True)
+        self.canal = canal
+        self.invalidar = invalidar
+        self.versoes = {}
+        self._parar = threading.Event()
+
+    def parar(self):
+        self._parar.set()
+
+    def run(self):
+        espera = ESPERA_RECONEXAO
+        primeira_conexao = True
+        while not self._parar.is_set():
+            conexao = None
+            try:
+                conexao = self._conectar()
+                if not primeira_conexao:
+                    # Notificações enviadas enquanto estávamos desconectados se perderam
+                    self.invalidar(None)
+                primeira_conexao = False
+                espera = ESPERA_RECONEXAO
+                self._escutar(conexao)
+            except Exception as e:
+                logger.error(f"❌ Ouvinte de '{self.canal}' desconectado: {e}; nova tentativa em {espera}s")
+                self._parar.wait(espera)
+                espera = min(espera * 2, ESPERA_RECONEXAO_MAXIMA)
+            finally:
+                if conexao is not None:
+                    try:
+                        conexao.close()
+                    except Exception:
+                        pass
+
+    def _conectar(self):
+        # Conexão retirada do pool (detach): não ocupa um slot das requisições
+        proxy = engine.raw_connection()
+        proxy.detach()
+        conexao = proxy.dbapi_connection
+        conexao.autocommit = True
+        with conexao.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.canal}"')
+        logger.info(f"👂 Ouvindo notificações do canal '{self.canal}'")
+        return conexao
+
+    def _escutar(self, conexao):
+        while not self._parar.is_set():
+            prontos, _, _ = select.select([conexao], [], [], INTERVALO_ESPERA)
+            if not prontos:
+                continue
+            conexao.poll()
+            while conexao.notifies:
+                self._tratar(conexao.notifies.pop(0).payload)
+
+    def _tratar(self, mensagem):
+        serie, versao = interpretar_mensagem(mensagem)
+        if versao is not None:
+            if self.versoes.get(serie) == versao:
+                return
+            self.versoes[serie] = versao
+        logger.info(f"🔔 Série {serie} atualizada em outro processo (versão {versao})")
+        self.invalidar(serie)
+
+
+_ouvinte = None
+_lock_ouvinte = threading.Lock()
+
+
+def iniciar_ouvinte():
+    """Inicia (uma única vez por processo) o ouvinte de notificações"""
+    global _ouvinte
+    with _lock_ouvinte:
+        if _ouvinte is None or not _ouvinte.is_alive():
+            _ouvinte = OuvinteNotificacoes()
+            _ouvinte.start()
+        return _ouvinte
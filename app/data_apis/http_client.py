@@ -0,0 +1,119 @@
+# app/data_apis/http_client.py
+"""
+Cliente HTTP compartilhado pelas buscas no BCB e no SIDRA.
+
+Uma única requests.Session (thread-safe para GETs) mantém um pool de
+conexões keep-alive por host, reaproveitando sockets e sessões TLS entre
+chamadas e entre threads do ETL. Todas as requisições têm timeout, retry
+com backoff exponencial (tenacity) e um limite de requisições simultâneas
+por host, para não sobrecarregar as APIs públicas.
+"""
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
+
+# Timeout padrão: (conexão, leitura) em segundos
+TIMEOUT_PADRAO = (5, 30)
+
+# Número máximo de requisições simultâneas por host
+LIMITE_POR_HOST = int(os.getenv('HTTP_LIMITE_POR_HOST', 4))
+
+# Conexões mantidas abertas por host / número de hosts no pool
+POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', 10))
+POOL_HOSTS = 4
+
+TENTATIVAS = 3
+STATUS_RETRY = {429, 500, 502, 503, 504}
+
+HEADERS_PADRAO = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'application/json',
+}
+
+_sessao = None
+_semaforos = {}
+_lock = threading.Lock()
+
+
+def obter_sessao():
+    """Retorna a sessão HTTP compartilhada (criada na primeira chamada)"""
+    global _sessao
+    if _sessao is None:
+        with _lock:
+            if _sessao is None:
+                sessao = requests.Session()
+                # Retries ficam a cargo do tenacity; o adapter cuida apenas do pool
+                adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_MAXSIZE)
+                sessao.mount('https://', adapter)
+                sessao.mount('http://', adapter)
+                sessao.headers.update(HEADERS_PADRAO)
+                _sessao = sessao
+    return _sessao
+
+
+@contextmanager
+def _limite_host(host):
+    """Limita o número de requisições simultâneas a um mesmo host"""
+    with _lock:
+        semaforo = _semaforos.get(host)
+        if semaforo is None:
+            semaforo = _semaforos[host] = threading.BoundedSemaphore(LIMITE_POR_HOST)
+    with semaforo:
+        yield
+
+
+def _deve_tentar_novamente(erro):
+    """Erros de rede, timeouts e status HTTP transitórios merecem nova tentativa"""
+    if isinstance(erro, requests.HTTPError):
+        return erro.response is not None and erro.response.status_code in STATUS_RETRY
+    return isinstance(erro, (requests.ConnectionError, requests.Timeout))
+
+
+def _registrar_nova_tentativa(retry_state):
+    erro = retry_state.outcome.exception()
+    logging.warning(f"🔁 Tentativa {retry_state.attempt_number} falhou ({erro}); tentando novamente")
+
+
+@retry(
+    retry=retry_if_exception(_deve_tentar_novamente),
+    stop=stop_after_attempt(TENTATIVAS),
+    wait=wait_exponential(multiplier=1, max=10),
+    before_sleep=_registrar_nova_tentativa,
+    reraise=True
+)
+def get(url, params=None, headers=None, timeout=TIMEOUT_PADRAO):
+    """
+    GET com pool de conexões, limite por host, timeout e retry.
+
+    Status transitórios (429/5xx) geram nova tentativa; os demais são
+    devolvidos normalmente para o chamador tratar.
+
+    Args:
+        url (str): URL da requisição
+        params (dict, optional): Parâmetros de query string
+        headers (dict, optional): Headers adicionais
+        timeout (float | tuple): Timeout em segundos
+
+    Returns:
+        requests.Response
+    """
+    host = urlsplit(url).netloc
+    with _limite_host(host):
+        response = obter_sessao().get(url, params=params, headers=headers, timeout=timeout)
+
+    if response.status_code in STATUS_RETRY:
+        response.raise_for_status()
+    return response
+
+
+def get_json(url, params=None, headers=None, timeout=TIMEOUT_PADRAO):
+    """GET que exige status 2xx e devolve o corpo decodificado como JSON"""
+    response = get(url, params=params, headers=headers, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
@@ -1,21 +1,110 @@
-# app/data_apis/otimizacoes.py
+# app/data_apis/otimizacao.py
+import logging
+
+import pandas as pd
 from sqlalchemy.orm import Session
 from sqlalchemy.dialects.postgresql import insert
 
-def bulk_upsert(session: Session, model, records):
+from app.cache import notificar_atualizacao
+
+# Tamanho padrão dos lotes: 1000 linhas x poucas colunas fica bem abaixo
+# do limite de parâmetros por statement do Postgres (65535)
+TAMANHO_LOTE_PADRAO = 1000
+
+
+def preparar_registros(df, colunas):
+    """
+    Converte um DataFrame em lista de dicionários prontos para o INSERT.
+
+    Colunas datetime viram datetime.date e valores nulos (NaN/NaT) viram None,
+    sem percorrer o DataFrame linha a linha.
+
+    Args:
+        df (pd.DataFrame): Dados a serem gravados
+        colunas (list): Colunas do modelo presentes no DataFrame
+
+    Returns:
+        list: Registros no formato {coluna: valor}
+    """
+    df = df[list(colunas)].copy()
+
+    for coluna in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[coluna]):
+            df[coluna] = df[coluna].dt.date
+
+    df = df.astype(object).where(pd.notna(df), None)
+    return df.to_dict('records')
+
+
+def bulk_upsert(session: Session, model, dados, coluna_valor, chaves=('data',),
+                tamanho_lote=TAMANHO_LOTE_PADRAO, notificar=None):
     """
     Realiza inserção ou atualização em lote de forma eficiente
+
+    Cada lote vira um único INSERT ... ON CONFLICT DO UPDATE. Linhas cujo
+    valor não mudou são ignoradas pela cláusula WHERE do UPDATE, então não
+    geram escrita (nem contam no total retornado).
+
+    Por padrão não avisa ninguém: no ETL, a série é notificada uma única
+    vez, depois que o payload materializado é regravado (materializar_serie);
+    avisar aqui faria os outros nós recarregarem o payload antigo.
+
+    Args:
+        session (Session): Sessão do SQLAlchemy (o commit é feito aqui)
+        model: Modelo declarativo de destino
+        dados (pd.DataFrame | list): DataFrame com as colunas do modelo ou
+            lista de dicionários já prontos
+        coluna_valor (str | list): Coluna(s) de valor a atualizar no conflito
+        chaves (tuple): Colunas da chave primária / restrição única
+        tamanho_lote (int): Número de linhas por statement
+        notificar (str, optional): Série informada aos hooks de atualização
+            após o commit, se alguma linha mudou (padrão: nenhuma)
+
+    Returns:
+        int: Número de linhas inseridas ou efetivamente alteradas
     """
+    colunas_valor = [coluna_valor] if isinstance(coluna_valor, str) else list(coluna_valor)
+
+    if isinstance(dados, pd.DataFrame):
+        records = preparar_registros(dados, list(chaves) + colunas_valor)
+    else:
+        records = list(dados or [])
+
     if not records:
-        return
-    
-    stmt = insert(model).values(records)
-    stmt = stmt.on_conflict_do_update(
-        index_elements=['data'],  # Coluna de identificação única
-        set_={
-            'valor': stmt.excluded.valor,
-            # Outros campos para atualizar
-        }
+        return 0
+
+    tabela = model.__table__
+    total = 0
+
+    for inicio in range(0, len(records), tamanho_lote):
+        lote = records[inicio:inicio + tamanho_lote]
+
+        stmt = insert(tabela).values(lote)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(chaves),  # Coluna(s) de identificação única
+            set_={coluna: stmt.excluded[coluna] for coluna in colunas_valor},
+            # Só reescreve a linha se algum valor realmente mudou
+            where=_algum_valor_mudou(tabela, stmt, colunas_valor)
+        )
+        resultado = session.execute(stmt)
+        total += max(resultado.rowcount or 0, 0)
+
+    session.commit()
+
+    logging.info(
+        f"Upsert em lote na tabela {tabela.name}: {len(records)} registros enviados, "
+        f"{total} inseridos/alterados"
     )
-    session.execute(stmt)
-    session.commit()
\ No newline at end of file
+
+    if total and notificar:
+        notificar_atualizacao(notificar)
+    return total
+
+
+def _algum_valor_mudou(tabela, stmt, colunas_valor):
+    """Monta a condição 'algum valor é diferente do que já está gravado'."""
+    condicao = None
+    for coluna in colunas_valor:
+        diferente = tabela.c[coluna].is_distinct_from(stmt.excluded[coluna])
+        condicao = diferente if condicao is None else condicao | diferente
+    return condicao
@@ -2,18 +2,108 @@ import logging
 logging.basicConfig(level=logging.DEBUG)  # Adicione isso no início do seu script
 import requests
 import pandas as pd
-from tenacity import retry, stop_after_attempt, wait_fixed
+from datetime import date
+from urllib.parse import quote
+from app.data_apis import http_client
+
+
+URL_SIDRA = "https://apisidra.ibge.gov.br/values"
+
+
+#---------------------- Montagem das consultas ao SIDRA ---------------------
+
+def _periodos_sidra(periodos):
+    """
+    Converte a especificação de períodos para o formato da API.
+
+    Aceita 'all', um inteiro N (-> 'last N'), uma tupla (inicio, fim) com
+    códigos de período (ex.: ('202301', '202404')), uma lista de códigos
+    ou uma string já no formato do SIDRA.
+    """
+    if periodos is None:
+        return 'all'
+    if isinstance(periodos, int):
+        return f'last {periodos}'
+    if isinstance(periodos, tuple):
+        inicio, fim = periodos
+        return f'{inicio}-{fim}'
+    if isinstance(periodos, list):
+        return ','.join(str(p) for p in periodos)
+    return str(periodos)
+
+
+def montar_url_sidra(tabela, variavel, nivel='n1/all', periodos='all', classificacoes=(),
+                     decimais=None, campos='c', cabecalho=True):
+    """
+    Monta a URL de consulta à API de valores do SIDRA.
+
+    Args:
+        tabela (int): Código da tabela (ex.: 5932)
+        variavel (int | str): Código(s) da variável
+        nivel (str): Nível territorial (ex.: 'n1/all', 'n3/25')
+        periodos: 'all', N (últimos N períodos), (inicio, fim) ou lista de códigos
+        classificacoes (iterable): Filtros de classificação (ex.: 'c11255/90707')
+        decimais (str, optional): Parâmetro /d (ex.: 'v6561 1')
+        campos (str, optional): Projeção /f ('c' só códigos, 'n' só nomes,
+            'u' unidade, 'a' todos); None mantém o padrão da API
+        cabecalho (bool): False adiciona /h/n (sem a linha de cabeçalho)
+
+    Returns:
+        str: URL pronta para a requisição
+    """
+    partes = [f't/{tabela}', nivel, f'v/{variavel}', f'p/{_periodos_sidra(periodos)}']
+    partes.extend(classificacoes)
+    if decimais:
+        partes.append(f'd/{decimais}')
+    if campos:
+        partes.append(f'f/{campos}')
+    if not cabecalho:
+        partes.append('h/n')
+    return f"{URL_SIDRA}/{quote('/'.join(partes), safe='/,-')}?formato=json"
+
+
+def dataframe_sidra(registros, cabecalho=True):
+    """
+    Converte a resposta JSON do SIDRA em DataFrame.
+
+    Com cabeçalho, a primeira linha traz os nomes das colunas
+    (ex.: 'Trimestre (Código)', 'Valor') e é usada para renomeá-las.
+    """
+    df = pd.DataFrame(registros)
+    if cabecalho and not df.empty:
+        # Renomear as colunas usando a primeira linha e removê-la
+        df.columns = df.iloc[0]
+        df = df.iloc[1:]
+    return df
+
+
+def periodos_desde(ultima_data, meses_por_periodo=3, sobreposicao=2):
+    """
+    Número de períodos (/p/last N) necessários para cobrir desde a última
+    data gravada até hoje, mais uma sobreposição para capturar revisões.
+
+    Args:
+        ultima_data (date): Última data presente no banco
+        meses_por_periodo (int): 3 para séries trimestrais, 12 para anuais
+        sobreposicao (int): Períodos extras já gravados a buscar novamente
+    """
+    hoje = date.today()
+    ultima_data = pd.to_datetime(ultima_data)
+    meses = (hoje.year - ultima_data.year) * 12 + hoje.month - ultima_data.month
+    return max(1, meses // meses_por_periodo) + sobreposicao
 
 
 #---------------------- Função para pegar o PIB do Brasil ---------------------
-def get_pib_data():
-    url = pd.read_json("https://apisidra.ibge.gov.br/values/t/5932/n1/all/v/6561/p/all/c11255/90707/d/v6561%201?formato=json")
-    
-    # Renomear as colunas usando a primeira linha
-    url.columns = url.iloc[0]
-    
-    # Remover a primeira linha (que agora são os nomes das colunas)
-    url = url.iloc[1:]
+def get_pib_data(periodos='all'):
+    """
+    Busca o PIB do Brasil no SIDRA.
+
+    Args:
+        periodos: 'all', N (últimos N trimestres) ou (inicio, fim)
+    """
+    url = dataframe_sidra(http_client.get_json(montar_url_sidra(
+        5932, 6561, periodos=periodos, classificacoes=['c11255/90707'], decimais='v6561 1'
+    )))
     
     # Tratar os dados
     pib_br = (
@@ -43,14 +133,20 @@ def get_pib_data():
 #---------------------- Função para pegar o PIB da Paraíba ---------------------
 
 
-def get_pib_data_pb():
+def get_pib_data_pb(periodos='all'):
+    """
+    Busca o PIB da Paraíba no SIDRA.
+
+    Args:
+        periodos: 'all', N (últimos N anos) ou (inicio, fim)
+    """
     try:
         # Log de entrada da função
         print("INÍCIO: Função get_pib_data_pb() chamada")
         logging.info("INÍCIO: Função get_pib_data_pb() chamada")
 
         # URL da API do IBGE para PIB da Paraíba
-        url_api = "http://apisidra.ibge.gov.br/values/t/5938/n3/25/v/37/p/all?formato=json"
+        url_api = montar_url_sidra(5938, 37, nivel='n3/25', periodos=periodos)
         
         # Adicionar headers para evitar bloqueios
         headers = {
@@ -61,8 +157,8 @@ def get_pib_data_pb():
         print(f"Iniciando requisição para URL: {url_api}")
         logging.info(f"Iniciando requisição para URL: {url_api}")
         
-        # Fazer requisição com requests para maior controle
-        response = requests.get(url_api, headers=headers)
+        # Fazer requisição pelo cliente compartilhado (pool, timeout e retry)
+        response = http_client.get(url_api, headers=headers)
         
         # Log do status da resposta
         print(f"Status da resposta: {response.status_code}")
@@ -76,7 +172,7 @@ def get_pib_data_pb():
         logging.info(f"Número total de itens no JSON: {len(raw_json)}")
         
         
-        # Converter JSON para DataFrame
+        # Converter JSON para DataFrame (para diagnóstico)
         url = pd.DataFrame(raw_json)
         
         # Log de depuração
@@ -92,11 +188,8 @@ def get_pib_data_pb():
         
         
         
-        # Renomear as colunas usando a primeira linha
-        url.columns = url.iloc[0]
-        
-        # Remover a primeira linha (que agora são os nomes das colunas)
-        url = url.iloc[1:]
+        # Renomear as colunas usando a primeira linha (cabeçalho) e removê-la
+        url = dataframe_sidra(raw_json)
         
         # Tratar os dados
         pib_pb = (
@@ -146,14 +239,14 @@ def get_pib_data_pb():
 
     # --------------- Função para coletar dados da Desocupação do Brasil ----------
 
-def get_desocupacao_data():
-    url = pd.read_json("https://apisidra.ibge.gov.br/values/t/4099/n1/all/v/4099/p/all?formato=json")
-    
-    # Renomear as colunas usando a primeira linha
-    url.columns = url.iloc[0]
-    
-    # Remover a primeira linha (que agora são os nomes das colunas)
-    url = url.iloc[1:]
+def get_desocupacao_data(periodos='all'):
+    """
+    Busca a taxa de desocupação do Brasil no SIDRA.
+
+    Args:
+        periodos: 'all', N (últimos N trimestres) ou (inicio, fim)
+    """
+    url = dataframe_sidra(http_client.get_json(montar_url_sidra(4099, 4099, periodos=periodos)))
     
     # Tratar os dados
     des_br = (
@@ -180,14 +273,17 @@ def get_desocupacao_data():
 
  # --------------- Função para coletar dados da Desocupação da Paraíba ----------
 
-def get_desocupacao_pb_data(start_date = None):
-    url = pd.read_json("https://apisidra.ibge.gov.br/values/t/4099/n3/25/v/4099/p/all?formato=json")
-    
-    # Renomear as colunas usando a primeira linha
-    url.columns = url.iloc[0]
-    
-    # Remover a primeira linha (que agora são os nomes das colunas)
-    url = url.iloc[1:]
+def get_desocupacao_pb_data(start_date = None, periodos='all'):
+    """
+    Busca a taxa de desocupação da Paraíba no SIDRA.
+
+    Args:
+        start_date (str | date, optional): Filtra datas posteriores a esta
+        periodos: 'all', N (últimos N trimestres) ou (inicio, fim)
+    """
+    url = dataframe_sidra(http_client.get_json(
+        montar_url_sidra(4099, 4099, nivel='n3/25', periodos=periodos)
+    ))
 
     # Se nenhuma data de início for fornecida, use a data padrão
     if start_date is None:
@@ -0,0 +1,200 @@
+# app/etl_worker.py
+"""
+Processo dedicado de ETL (worker), separado do servidor web.
+
+Uso:
+    python -m app.etl_worker run --series ipca,selic --parallel 4
+    python -m app.etl_worker schedule
+
+Os processos do gunicorn apenas leem do banco; toda busca nas APIs
+(BCB/SIDRA) e escrita nas tabelas acontece aqui, incluindo os payloads
+já serializados que as rotas servem (payloads_series).
+"""
+import argparse
+import logging
+import sys
+from functools import partial
+
+from app.agendamento_atualizacao import start_etl_scheduler, nome_lock_etl
+from app.cache import registrar_hook_atualizacao
+from app.data_apis.conect_post.notificacoes import enviar_notificacao
+from app.data_apis.conect_post.database import lock_consultivo
+from app.executor_etl import Tarefa, TarefaPulada, executar_tarefas, SUCESSO, PULADA, TIMEOUT_PADRAO
+from app.series.materializacao import materializar_serie, publicar_armazem
+from app.data_apis.conect_post.conect_post import popular_tabela_pib, verificar_conexao_e_dados
+from app.data_apis.conect_post.condect_post_desocupacao import verificar_dados_desocupacao
+from app.data_apis.conect_post.conect_post_desocupacao_pb import verificar_dados_desocupacao_pb
+from app.data_apis.conect_post.conect_post_divliq_pb import verificar_dados_divliq
+from app.data_apis.conect_post.conect_post_sbcpb import verificar_e_atualizar_bcpb
+from app.data_apis.conect_post.conect_post_selic import verificar_dados_selic
+from app.data_apis.conect_post.conect_post_cambio import verificar_dados_cambio
+from app.data_apis.conect_post.conect_post_ipca import verificar_dados_ipca
+from app.data_apis.conect_post.conect_post_pib_pb import verificar_dados_pib_pb
+from app.series.derivadas import DERIVADAS, atualizar_serie_derivada
+
+logger = logging.getLogger(__name__)
+
+
+def _atualizar_pib_br(backfill=False):
+    """Atualiza dados do PIB_BR e confere a tabela"""
+    atualizado = popular_tabela_pib(backfill)
+    verificar_conexao_e_dados()
+    return atualizado
+
+
+# Série -> função de atualização (verificar_*). Todas buscam de forma
+# incremental, aceitam backfill=True para baixar a série completa e
+# retornam True em caso de sucesso (mesmo sem dados novos); falhas
+# retornam False ou levantam exceção
+SERIES_ETL = {
+    'pib_br': _atualizar_pib_br,
+    'pib_pb': verificar_dados_pib_pb,
+    'desocupacao': verificar_dados_desocupacao,
+    'desocupacao_pb': verificar_dados_desocupacao_pb,
+    'divliq': verificar_dados_divliq,
+    'cambio': verificar_dados_cambio,
+    'selic': verificar_dados_selic,
+    'bcpb': verificar_e_atualizar_bcpb,
+    'ipca': verificar_dados_ipca,
+}
+
+# Séries derivadas: recalculadas a partir das séries base já gravadas
+SERIES_ETL.update({
+    serie: partial(atualizar_serie_derivada, serie) for serie in DERIVADAS
+})
+
+
+# Cada payload materializado que mudou é avisado aos processos web
+# (NOTIFY indicadores), que invalidam a série nos seus caches
+registrar_hook_atualizacao(enviar_notificacao)
+
+
+# Série -> séries das quais ela depende (devem ser atualizadas antes)
+DEPENDENCIAS_ETL = {
+    serie: list(definicao['bases']) for serie, definicao in DERIVADAS.items()
+}
+
+
+class FalhaETL(Exception):
+    """A função verificar_* não informou sucesso (não retornou True)"""
+
+
+def _atualizar_serie(serie, backfill=False):
+    """
+    Atualiza uma série sob o advisory lock da série.
+
+    Returns:
+        str: 'atualizada'
+
+    Raises:
+        TarefaPulada: Outro processo está atualizando a série (as
+            dependentes desta rodada são ignoradas)
+    """
+    # Apenas um processo do cluster atualiza a série por vez
+    with lock_consultivo(nome_lock_etl(serie)) as obtido:
+        if not obtido:
+            raise TarefaPulada(f"{serie} já está sendo atualizada em outro processo")
+
+        logger.info(f"🔍 INICIANDO ATUALIZAÇÃO: {serie}")
+        resultado = SERIES_ETL[serie](backfill=backfill)
+
+        # Só True indica sucesso: rodada sem dados novos também retorna True
+        if resultado is not True:
+            raise FalhaETL(f"Atualização de {serie} retornou falha")
+
+        materializar_serie(serie)
+    return 'atualizada'
+
+
+def executar_etl(series=None, parallel=4, timeout=TIMEOUT_PADRAO, backfill=False):
+    """
+    Executa uma rodada de ETL para as séries informadas.
+
+    Séries independentes rodam em paralelo; dependências declaradas em
+    DEPENDENCIAS_ETL são respeitadas quando ambas as séries fazem parte
+    da rodada (fora dela, considera-se que o dado já está no banco).
+
+    Args:
+        series (list, optional): Séries a atualizar (padrão: todas)
+        parallel (int): Número de séries atualizadas simultaneamente
+        timeout (float): Tempo máximo de cada série, em segundos
+        backfill (bool): Baixa a série completa em vez da busca incremental
+
+    Returns:
+        dict: Resultado por série ({'status', 'resultado', 'erro', 'duracao'})
+    """
+    series = list(series or SERIES_ETL)
+    desconhecidas = [serie for serie in series if serie not in SERIES_ETL]
+    if desconhecidas:
+        raise ValueError(f"Séries desconhecidas: {', '.join(desconhecidas)}")
+
+    logger.info(f"Iniciando ETL de {len(series)} séries (paralelismo: {parallel}, backfill: {backfill})")
+
+    tarefas = [
+        Tarefa(
+            serie,
+            partial(_atualizar_serie, serie, backfill),
+            dependencias=[d for d in DEPENDENCIAS_ETL.get(serie, ()) if d in series],
+            timeout=timeout
+        )
+        for serie in series
+    ]
+    resultados = executar_tarefas(tarefas, max_workers=parallel)
+
+    for serie, resultado in resultados.items():
+        logger.info(f"   {serie}: {resultado['status'].upper()} ({resultado['duracao']:.1f}s)")
+
+    return resultados
+
+
+def _separar_series(valor):
+    return [serie.strip() for serie in valor.split(',') if serie.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='indicadores-etl',
+        description='Worker de ETL dos indicadores (BCB/SIDRA -> Postgres)'
+    )
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    run_parser = subparsers.add_parser('run', help='Executa uma rodada de ETL e encerra')
+    run_parser.add_argument(
+        '--series', type=_separar_series, default=None,
+        help=f"Séries separadas por vírgula ({','.join(SERIES_ETL)}). Padrão: todas"
+    )
+    run_parser.add_argument('--parallel', type=int, default=4,
+                            help='Número de séries atualizadas em paralelo')
+    run_parser.add_argument('--timeout', type=float, default=TIMEOUT_PADRAO,
+                            help='Tempo máximo de cada série, em segundos')
+    run_parser.add_argument('--backfill', action='store_true',
+                            help='Baixa a série completa em vez de apenas o período recente')
+
+    subparsers.add_parser('schedule', help='Inicia o agendador de atualizações (bloqueante)')
+    subparsers.add_parser('armazem', help='Publica o armazém compartilhado de séries a partir dos payloads materializados')
+
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler(sys.stdout)]
+    )
+
+    if args.comando == 'run':
+        try:
+            resultados = executar_etl(args.series, args.parallel, args.timeout, args.backfill)
+        except ValueError as e:
+            parser.error(str(e))
+        return 0 if all(r['status'] in (SUCESSO, PULADA) for r in resultados.values()) else 1
+
+    if args.comando == 'armazem':
+        # Banco sem payloads materializados não é erro: o armazém fica vazio
+        return 1 if publicar_armazem() is None else 0
+
+    start_etl_scheduler()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
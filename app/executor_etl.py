@@ -0,0 +1,202 @@
+# app/executor_etl.py
+"""
+Executor paralelo de tarefas de ETL com dependências.
+
+Tarefas independentes rodam ao mesmo tempo, cada uma em sua própria
+thread, até max_workers simultâneas; uma tarefa só é iniciada depois que
+todas as suas dependências terminaram com sucesso. Cada tarefa tem seu
+próprio timeout, contado a partir do início da sua thread, e falhas ficam
+isoladas: uma série com erro não interrompe as outras, apenas as que
+dependem dela.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+
+logger = logging.getLogger(__name__)
+
+# Status possíveis no resumo de execução
+SUCESSO = 'sucesso'
+FALHA = 'falha'
+TIMEOUT = 'timeout'
+IGNORADA = 'ignorada'  # não executada porque uma dependência não teve sucesso
+PULADA = 'pulada'  # não executada aqui (ex.: outro processo já a executa)
+
+TIMEOUT_PADRAO = 300  # segundos
+
+
+class TarefaPulada(Exception):
+    """
+    Levantada pela tarefa que não foi executada por este processo. Não
+    conta como sucesso: as dependentes são ignoradas, pois o resultado
+    ainda pode não estar gravado.
+    """
+
+
+class Tarefa:
+    """
+    Tarefa de ETL.
+
+    Args:
+        nome (str): Identificador único (ex.: 'ipca')
+        funcao (callable): Função sem argumentos a executar
+        dependencias (iterable): Nomes das tarefas que devem terminar antes
+        timeout (float, optional): Tempo máximo em segundos
+    """
+
+    __slots__ = ('nome', 'funcao', 'dependencias', 'timeout')
+
+    def __init__(self, nome, funcao, dependencias=(), timeout=None):
+        self.nome = nome
+        self.funcao = funcao
+        self.dependencias = tuple(dependencias)
+        self.timeout = timeout
+
+    def __repr__(self):
+        return f"Tarefa({self.nome!r}, dependencias={self.dependencias!r})"
+
+
+def _validar(tarefas):
+    """Garante nomes únicos, dependências conhecidas e ausência de ciclos"""
+    por_nome = {}
+    for tarefa in tarefas:
+        if tarefa.nome in por_nome:
+            raise ValueError(f"Tarefa duplicada: {tarefa.nome}")
+        por_nome[tarefa.nome] = tarefa
+
+    for tarefa in tarefas:
+        desconhecidas = [d for d in tarefa.dependencias if d not in por_nome]
+        if desconhecidas:
+            raise ValueError(f"Dependências desconhecidas em {tarefa.nome}: {', '.join(desconhecidas)}")
+
+    # Detecção de ciclos (DFS com três cores)
+    estado = {}
+
+    def visitar(nome, caminho):
+        if estado.get(nome) == 'visitando':
+            raise ValueError(f"Dependência circular: {' -> '.join(caminho + [nome])}")
+        if estado.get(nome) == 'ok':
+            return
+        estado[nome] = 'visitando'
+        for dependencia in por_nome[nome].dependencias:
+            visitar(dependencia, caminho + [nome])
+        estado[nome] = 'ok'
+
+    for nome in por_nome:
+        visitar(nome, [])
+
+    return por_nome
+
+
+def _executar(tarefa):
+    inicio = time.monotonic()
+    resultado = tarefa.funcao()
+    return resultado, time.monotonic() - inicio
+
+
+def _iniciar(tarefa):
+    """
+    Executa a tarefa em uma thread própria (daemon).
+
+    Uma thread que estoura o timeout não pode ser interrompida; por ser
+    própria da tarefa, ela não ocupa a vaga de outra (como ocuparia em um
+    pool de threads) e, por ser daemon, não impede o processo de encerrar.
+
+    Returns:
+        Future: Resultado de _executar(tarefa)
+    """
+    future = Future()
+    future.set_running_or_notify_cancel()
+
+    def rodar():
+        try:
+            future.set_result(_executar(tarefa))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=rodar, name=f"etl-{tarefa.nome}", daemon=True).start()
+    return future
+
+
+def executar_tarefas(tarefas, max_workers=4, timeout_padrao=TIMEOUT_PADRAO):
+    """
+    Executa as tarefas respeitando dependências, em paralelo.
+
+    Uma tarefa que estoura o timeout é marcada como 'timeout' e suas
+    dependentes são ignoradas; a thread em si não pode ser interrompida e
+    termina em segundo plano, sem contar no limite de max_workers.
+
+    Args:
+        tarefas (list[Tarefa]): Tarefas a executar
+        max_workers (int): Número máximo de tarefas simultâneas
+        timeout_padrao (float): Timeout das tarefas que não definem o seu
+
+    Returns:
+        dict: nome -> {'status', 'resultado', 'erro', 'duracao'}
+    """
+    por_nome = _validar(tarefas)
+    pendentes = dict(por_nome)
+    resultados = {}
+    em_execucao = {}  # future -> (nome, prazo, inicio)
+
+    max_workers = max(1, max_workers)
+    while pendentes or em_execucao:
+        # Ignorar tarefas cujas dependências falharam
+        for nome, tarefa in list(pendentes.items()):
+            falhas = [d for d in tarefa.dependencias
+                      if d in resultados and resultados[d]['status'] != SUCESSO]
+            if falhas:
+                del pendentes[nome]
+                resultados[nome] = {
+                    'status': IGNORADA, 'resultado': None, 'duracao': 0.0,
+                    'erro': f"Dependência sem sucesso: {', '.join(falhas)}"
+                }
+                logger.warning(f"⏭️ {nome} ignorada: dependência sem sucesso ({', '.join(falhas)})")
+
+        # Iniciar tarefas prontas (todas as dependências concluídas com sucesso).
+        # A thread começa junto com o prazo: o timeout nunca corre em uma fila
+        for nome, tarefa in list(pendentes.items()):
+            if len(em_execucao) >= max_workers:
+                break
+            if all(d in resultados for d in tarefa.dependencias):
+                del pendentes[nome]
+                agora = time.monotonic()
+                prazo = agora + (tarefa.timeout or timeout_padrao)
+                em_execucao[_iniciar(tarefa)] = (nome, prazo, agora)
+
+        if not em_execucao:
+            # Só acontece se algo mudou as dependências durante a execução
+            break
+
+        espera = max(0.0, min(prazo for _, prazo, _ in em_execucao.values()) - time.monotonic())
+        concluidas, _ = wait(list(em_execucao), timeout=espera, return_when=FIRST_COMPLETED)
+
+        for future in concluidas:
+            nome, _, inicio = em_execucao.pop(future)
+            try:
+                resultado, duracao = future.result()
+                resultados[nome] = {'status': SUCESSO, 'resultado': resultado,
+                                    'erro': None, 'duracao': duracao}
+                logger.info(f"✅ {nome}: SUCESSO ({duracao:.1f}s)")
+            except TarefaPulada as e:
+                duracao = time.monotonic() - inicio
+                resultados[nome] = {'status': PULADA, 'resultado': None,
+                                    'erro': str(e), 'duracao': duracao}
+                logger.info(f"⏭️ {nome}: PULADA ({e})")
+            except Exception as e:
+                duracao = time.monotonic() - inicio
+                resultados[nome] = {'status': FALHA, 'resultado': None,
+                                    'erro': str(e), 'duracao': duracao}
+                logger.error(f"❌ {nome}: FALHA ({duracao:.1f}s): {e}", exc_info=e)
+
+        agora = time.monotonic()
+        for future, (nome, prazo, inicio) in list(em_execucao.items()):
+            if agora >= prazo:
+                del em_execucao[future]
+                resultados[nome] = {'status': TIMEOUT, 'resultado': None,
+                                    'erro': f"Tempo limite excedido ({prazo - inicio:.1f}s)",
+                                    'duracao': agora - inicio}
+                logger.error(f"⏱️ {nome}: TIMEOUT após {agora - inicio:.1f}s")
+
+    return resultados
@@ -0,0 +1,2 @@
+# app/series/__init__.py
+"""Séries servidas pela API: registro, leitura e transformações."""
@@ -0,0 +1,113 @@
+# app/series/alinhamento.py
+"""
+Alinhamento de várias séries em um índice de datas comum (ex.: desocupação
+do Brasil x da Paraíba, PIB do Brasil x da Paraíba).
+
+Modos:
+- outer: todas as datas de todas as séries (null onde a série não tem valor)
+- inner: só as datas presentes em todas as séries
+- asof: as datas da primeira série; as demais usam o último valor
+  conhecido em cada data (útil para comparar frequências diferentes)
+
+Opcionalmente as séries são rebaseadas para um índice (período base = 100),
+o que permite comparar séries em unidades diferentes. As junções são feitas
+pelo pandas sobre os arrays, sem laços em Python.
+"""
+import numpy as np
+import pandas as pd
+
+MODOS_ALINHAMENTO = ('outer', 'inner', 'asof')
+MODO_PADRAO = 'outer'
+
+# Precisão do período base pelo tamanho do texto: AAAA, AAAA-MM ou AAAA-MM-DD
+_FREQ_BASE = {4: 'Y', 7: 'M', 10: 'D'}
+
+
+def normalizar_alinhamento(modo=None, base=None):
+    """
+    Interpreta os parâmetros mode e rebase da API.
+
+    Returns:
+        tuple: (modo, período base ou None)
+
+    Raises:
+        ValueError: Modo desconhecido ou período base inválido
+    """
+    modo = (modo or MODO_PADRAO).lower()
+    if modo not in MODOS_ALINHAMENTO:
+        raise ValueError(f"mode inválido: {modo} (use {'|'.join(MODOS_ALINHAMENTO)})")
+
+    if not base:
+        return modo, None
+    base = base.strip()
+    freq = _FREQ_BASE.get(len(base))
+    try:
+        if freq is None:
+            raise ValueError
+        periodo = pd.Period(base, freq=freq)
+    except ValueError:
+        raise ValueError(f"rebase inválido: {base} (use AAAA, AAAA-MM ou AAAA-MM-DD)")
+    return modo, str(periodo)
+
+
+def _rebasear(tabela, base):
+    """Divide cada coluna pela sua média no período base e multiplica por 100"""
+    periodo = pd.Period(base, freq=_FREQ_BASE[len(base)])
+    no_periodo = tabela.index.to_period(periodo.freq) == periodo
+    medias = tabela[no_periodo].mean()
+    sem_base = medias.index[medias.isna() | (medias == 0)].tolist()
+    if sem_base:
+        raise ValueError(f"Sem dados no período base {base}: {', '.join(sem_base)}")
+    return tabela / medias * 100
+
+
+def alinhar(series, modo=MODO_PADRAO, base=None):
+    """
+    Alinha várias Series em um índice de datas comum.
+
+    Args:
+        series (dict): id -> Serie, na ordem pedida (a primeira série é a
+            referência do modo asof)
+        modo (str): outer, inner ou asof
+        base (str, optional): Período base do rebase (normalizado)
+
+    Returns:
+        dict: {'dates': [...], 'series': {id: {'values', 'label', 'unit'}},
+            'mode': ..., 'rebase': ...}
+
+    Raises:
+        ValueError: Série sem dados no período base
+    """
+    ids = list(series)
+    colunas = [series[serie].como_pandas() for serie in ids]
+
+    if modo == 'asof':
+        referencia = colunas[0].index
+        tabela = pd.concat(
+            [colunas[0]] + [c.dropna().reindex(referencia, method='ffill') for c in colunas[1:]],
+            axis=1, keys=ids
+        )
+    else:
+        tabela = pd.concat(colunas, axis=1, keys=ids, join=modo).sort_index()
+
+    if base is not None:
+        tabela = _rebasear(tabela, base)
+
+    resultado = {}
+    for serie in ids:
+        valores = tabela[serie].to_numpy(dtype='float64')
+        # NaN não é JSON válido: vira null
+        saida = valores.astype(object)
+        saida[np.isnan(valores)] = None
+        resultado[serie] = {
+            'values': saida.tolist(),
+            'label': series[serie].meta.get('label'),
+            'unit': f"Índice ({base} = 100)" if base is not None else series[serie].meta.get('unit'),
+        }
+
+    return {
+        'dates': tabela.index.strftime('%Y-%m-%d').tolist(),
+        'series': resultado,
+        'mode': modo,
+        'rebase': base,
+    }
@@ -0,0 +1,326 @@
+# app/series/armazem.py
+"""
+Armazém de séries compartilhado entre os workers do gunicorn.
+
+Um arquivo mapeado em memória (mmap) com as séries do período padrão em
+layout fixo, para que todos os workers da máquina leiam as mesmas páginas
+(o page cache do sistema) em vez de cada um manter e aquecer a sua cópia.
+Um worker recém-iniciado já encontra as séries prontas, sem ir ao banco.
+
+Formato (little-endian):
+- cabeçalho: assinatura, versão do formato, número de séries, geração
+- índice: uma entrada de tamanho fixo por série (id, ETag do payload
+  materializado, número de pontos, posição dos arrays e dos metadados)
+- dados: por série, dias int32 e valores float64 (alinhados em 8 bytes)
+  seguidos dos metadados em JSON (label, unit...)
+
+Quem escreve (o ETL que roda na máquina, o master do gunicorn ao iniciar
+e os workers que leram do banco uma versão mais nova) grava uma nova
+geração em um arquivo temporário e a troca atomicamente com os.replace; a
+escrita é serializada por um flock. Quem lê mapeia o arquivo somente para
+leitura e recebe views (np.frombuffer) sem cópia. A troca é percebida por
+os.stat, no máximo uma vez a cada ARMAZEM_VERIFICACAO segundos, e as
+séries cuja versão mudou são invalidadas no cache local do processo.
+Mapeamentos antigos continuam válidos enquanto houver views em uso.
+
+O arquivo é local e pode ficar atrás do banco (ETL em outro processo ou
+máquina): a série só é usada quando o seu ETag é o mesmo gravado em
+payloads_series (ver app.series.registro).
+"""
+import fcntl
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from app.cache import cache_series
+from app.series.serie import Serie
+
+logger = logging.getLogger(__name__)
+
+ARMAZEM_CAMINHO = os.getenv('SERIES_ARMAZEM', os.path.join(tempfile.gettempdir(), 'indicadores_series.bin'))
+
+# Intervalo mínimo (segundos) entre verificações de nova geração do arquivo
+ARMAZEM_VERIFICACAO = float(os.getenv('SERIES_ARMAZEM_VERIFICACAO', 1.0))
+
+_ASSINATURA = b'INDSERIE'
+_VERSAO_FORMATO = 2
+
+# assinatura, versão do formato, número de séries, geração
+_CABECALHO = struct.Struct('<8sIIQ')
+# id, etag, pontos, posição dos dias, posição dos metadados, tamanho dos metadados
+_ENTRADA = struct.Struct('<48s96sQQQI4x')
+
+
+def _alinhar(posicao, alinhamento=8):
+    return (posicao + alinhamento - 1) // alinhamento * alinhamento
+
+
+def _meta_json(serie):
+    return json.dumps(serie.meta, ensure_ascii=False, sort_keys=True, default=str).encode('utf-8')
+
+
+def _campo(valor, tamanho, nome):
+    codificado = valor.encode('utf-8')
+    if len(codificado) > tamanho:
+        raise ValueError(f"{nome} longo demais para o armazém: {valor}")
+    return codificado
+
+
+class _Entrada:
+    __slots__ = ('etag', 'pontos', 'posicao', 'meta')
+
+    def __init__(self, etag, pontos, posicao, meta):
+        self.etag = etag
+        self.pontos = pontos
+        self.posicao = posicao
+        self.meta = meta
+
+
+def _ler_indice(mapa):
+    """Valida o cabeçalho e lê o índice. Returns: (geração, dict id -> _Entrada)"""
+    assinatura, versao_formato, quantidade, geracao = _CABECALHO.unpack_from(mapa, 0)
+    if assinatura != _ASSINATURA or versao_formato != _VERSAO_FORMATO:
+        raise ValueError("arquivo não é um armazém de séries compatível")
+
+    indice = {}
+    for i in range(quantidade):
+        serie, etag, pontos, posicao, posicao_meta, tamanho_meta = _ENTRADA.unpack_from(
+            mapa, _CABECALHO.size + i * _ENTRADA.size
+        )
+        meta = json.loads(bytes(mapa[posicao_meta:posicao_meta + tamanho_meta]))
+        indice[serie.rstrip(b'\0').decode('utf-8')] = _Entrada(
+            etag.rstrip(b'\0').decode('utf-8'), pontos, posicao, meta
+        )
+    return geracao, indice
+
+
+def _serie_do_mapa(mapa, entrada):
+    """Serie com views (somente leitura) sobre o arquivo mapeado"""
+    dias = np.frombuffer(mapa, dtype=np.int32, count=entrada.pontos, offset=entrada.posicao)
+    posicao_valores = _alinhar(entrada.posicao + dias.nbytes)
+    valores = np.frombuffer(mapa, dtype=np.float64, count=entrada.pontos, offset=posicao_valores)
+    return Serie(dias, valores, entrada.meta)
+
+
+def escrever_armazem(series, caminho=ARMAZEM_CAMINHO, geracao=None):
+    """
+    Grava uma nova geração do armazém e a troca atomicamente.
+
+    Args:
+        series (dict): id -> (Serie, ETag do payload materializado)
+        caminho (str): Arquivo do armazém
+        geracao (int, optional): Número da geração (padrão: time.time_ns())
+    """
+    geracao = time.time_ns() if geracao is None else geracao
+    ids = sorted(series)
+    metas = {serie: _meta_json(series[serie][0]) for serie in ids}
+
+    # Layout: cabeçalho + índice, depois os dados de cada série
+    posicao = _alinhar(_CABECALHO.size + len(ids) * _ENTRADA.size)
+    entradas = []
+    for serie in ids:
+        pontos = len(series[serie][0])
+        posicao_valores = _alinhar(posicao + 4 * pontos)
+        posicao_meta = posicao_valores + 8 * pontos
+        entradas.append((serie, pontos, posicao, posicao_valores, posicao_meta))
+        posicao = _alinhar(posicao_meta + len(metas[serie]))
+
+    conteudo = bytearray(posicao)
+    _CABECALHO.pack_into(conteudo, 0, _ASSINATURA, _VERSAO_FORMATO, len(ids), geracao)
+    for i, (serie, pontos, posicao_dias, posicao_valores, posicao_meta) in enumerate(entradas):
+        valores, etag = series[serie]
+        _ENTRADA.pack_into(
+            conteudo, _CABECALHO.size + i * _ENTRADA.size,
+            _campo(serie, 48, 'Id de série'), _campo(etag, 96, 'ETag'),
+            pontos, posicao_dias, posicao_meta, len(metas[serie])
+        )
+        conteudo[posicao_dias:posicao_dias + 4 * pontos] = np.ascontiguousarray(valores.dias, dtype='<i4').tobytes()
+        conteudo[posicao_valores:posicao_valores + 8 * pontos] = np.ascontiguousarray(valores.valores, dtype='<f8').tobytes()
+        conteudo[posicao_meta:posicao_meta + len(metas[serie])] = metas[serie]
+
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    try:
+        with open(temporario, 'wb') as arquivo:
+            arquivo.write(conteudo)
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+        os.replace(temporario, caminho)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+    logger.info(f"🗄️ Armazém de séries publicado: {len(ids)} séries, {len(conteudo)} bytes (geração {geracao})")
+
+
+def ler_armazem(caminho=ARMAZEM_CAMINHO):
+    """Conteúdo atual do armazém como id -> (Serie (cópia), etag), ou {} se não existir"""
+    try:
+        with open(caminho, 'rb') as arquivo, mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+            _, indice = _ler_indice(mapa)
+            series = {}
+            for serie, entrada in indice.items():
+                valores = _serie_do_mapa(mapa, entrada)
+                series[serie] = (Serie(valores.dias.copy(), valores.valores.copy(), valores.meta), entrada.etag)
+                del valores
+            return series
+    except FileNotFoundError:
+        return {}
+    except ValueError as e:
+        # Arquivo de outra versão ou corrompido: a próxima geração o substitui
+        logger.warning(f"⚠️ Armazém de séries {caminho} ignorado: {e}")
+        return {}
+
+
+@contextmanager
+def _lock_escrita(caminho):
+    """Serializa os escritores da máquina (o arquivo é local, o lock também)"""
+    with open(f"{caminho}.lock", 'a') as arquivo:
+        fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(arquivo.fileno(), fcntl.LOCK_UN)
+
+
+def atualizar_armazem(atualizadas, removidas=(), caminho=ARMAZEM_CAMINHO, substituir=False):
+    """
+    Publica uma nova geração com as séries atualizadas (e sem as removidas).
+
+    Args:
+        atualizadas (dict): id -> (Serie, etag) a gravar
+        removidas (iterable): Ids a retirar do armazém
+        substituir (bool): Descarta as demais séries da geração atual
+
+    Returns:
+        bool: True se uma nova geração foi gravada (False se nada mudou ou
+            se a escrita falhou; o armazém é opcional e nunca derruba o ETL)
+    """
+    try:
+        with _lock_escrita(caminho):
+            atuais = {} if substituir else ler_armazem(caminho)
+            novas = {
+                serie: valores for serie, valores in atuais.items()
+                if serie not in removidas and serie not in atualizadas
+            }
+            novas.update(atualizadas)
+
+            mudou = (
+                set(novas) != set(atuais)
+                or any(novas[serie][1] != atuais[serie][1] for serie in atualizadas)
+            )
+            if not mudou:
+                return False
+            escrever_armazem(novas, caminho)
+            return True
+    except Exception as e:
+        logger.error(f"❌ Erro ao publicar o armazém de séries em {caminho}: {e}", exc_info=True)
+        return False
+
+
+class ArmazemSeries:
+    """
+    Leitor do armazém (um por processo).
+
+    Args:
+        caminho (str): Arquivo do armazém
+        verificacao (float): Intervalo mínimo entre verificações de troca
+    """
+
+    def __init__(self, caminho=ARMAZEM_CAMINHO, verificacao=ARMAZEM_VERIFICACAO):
+        self.caminho = caminho
+        self.verificacao = verificacao
+        # (mmap, geração, índice), trocado de uma vez só
+        self._estado = (None, None, {})
+        self._identidade = None
+        self._verificado_em = float('-inf')
+        self._lock = threading.Lock()
+
+    @property
+    def geracao(self):
+        return self._estado[1]
+
+    def obter(self, serie, etag=None):
+        """
+        Serie do armazém (views somente leitura sobre o arquivo) ou None.
+
+        Com etag, só devolve a série se ela for dessa versão do payload.
+        """
+        self._verificar()
+        mapa, _, indice = self._estado
+        entrada = indice.get(serie)
+        if entrada is None or (etag is not None and entrada.etag != etag):
+            return None
+        return _serie_do_mapa(mapa, entrada)
+
+    def series(self):
+        self._verificar()
+        return list(self._estado[2])
+
+    def _verificar(self):
+        agora = time.monotonic()
+        if agora - self._verificado_em < self.verificacao:
+            return
+        with self._lock:
+            if agora - self._verificado_em < self.verificacao:
+                return
+            self._verificado_em = agora
+            try:
+                estado = os.stat(self.caminho)
+            except FileNotFoundError:
+                if self._identidade is not None:
+                    self._identidade = None
+                    self._trocar((None, None, {}))
+                return
+            identidade = (estado.st_ino, estado.st_mtime_ns, estado.st_size)
+            if identidade != self._identidade:
+                self._mapear(identidade)
+
+    def _mapear(self, identidade):
+        try:
+            with open(self.caminho, 'rb') as arquivo:
+                mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+            geracao, indice = _ler_indice(mapa)
+        except Exception as e:
+            logger.error(f"❌ Erro ao mapear o armazém de séries {self.caminho}: {e}")
+            return
+        self._identidade = identidade
+        self._trocar((mapa, geracao, indice))
+
+    def _trocar(self, estado):
+        # O mapeamento anterior não é fechado: views em uso o mantêm vivo e
+        # ele é liberado pelo coletor quando não houver mais referências
+        anterior = self._estado[2]
+        self._estado = estado
+        indice = estado[2]
+
+        # Séries alteradas por outro processo saem do cache local
+        alteradas = [
+            serie for serie in set(anterior) | set(indice)
+            if serie not in indice or serie not in anterior or anterior[serie].etag != indice[serie].etag
+        ]
+        if anterior:
+            for serie in alteradas:
+                cache_series.invalidar(serie)
+        logger.info(f"🗄️ Armazém de séries mapeado (geração {estado[1]}): {len(indice)} séries, "
+                    f"{len(alteradas)} alteradas")
+
+    def estatisticas(self):
+        mapa, geracao, indice = self._estado
+        return {
+            'caminho': self.caminho,
+            'geracao': geracao,
+            'series': len(indice),
+            'bytes': len(mapa) if mapa is not None else 0,
+        }
+
+
+# Leitor compartilhado pelas rotas do processo
+armazem_series = ArmazemSeries()
@@ -0,0 +1,137 @@
+# app/series/derivadas.py
+"""
+Séries derivadas, calculadas pelo ETL depois das séries base.
+
+- ipca_12m: IPCA acumulado em 12 meses
+- juro_real: SELIC acumulada em 12 meses descontada do IPCA em 12 meses
+- pib_pb_yoy: variação anual do PIB da Paraíba
+- cambio_mm21: média móvel de 21 dias úteis do câmbio
+
+Os cálculos são vetorizados (pandas/NumPy). Cada execução recalcula apenas
+a cauda da série: a partir da última data derivada menos a janela de
+revisão da série base (a mesma sobreposição usada na busca incremental, o
+único trecho em que o ETL pode ter alterado valores), lendo da base só o
+histórico necessário para as janelas móveis.
+"""
+import logging
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.sql import column, table
+
+from app.data_apis.bcb import SOBREPOSICAO_INCREMENTAL
+from app.data_apis.conect_post.conect_post_cambio import SOBREPOSICAO_CAMBIO
+from app.data_apis.conect_post.conect_post_derivadas import ultima_data_derivada, upsert_serie_derivada
+from app.data_apis.conect_post.database import engine
+from app.data_apis.conect_post.leitura import Intervalo, ler_serie
+from app.series.serie import Serie
+
+logger = logging.getLogger(__name__)
+
+
+# ----------------- Transformações ------------------------------------------
+
+def acumulado_12m(taxas):
+    """Taxa acumulada em 12 meses (%) a partir de taxas mensais (%)"""
+    return np.expm1(np.log1p(taxas / 100).rolling(12, min_periods=12).sum()) * 100
+
+
+def variacao_anual(valores):
+    """Variação (%) em relação ao mesmo período do ano anterior"""
+    ano_anterior = valores.shift(freq=pd.DateOffset(years=1)).reindex(valores.index)
+    return (valores / ano_anterior - 1) * 100
+
+
+def juro_real(selic, ipca):
+    """Juro real ex-post (%): SELIC e IPCA acumulados em 12 meses, pela equação de Fisher"""
+    selic_12m, ipca_12m = acumulado_12m(selic).align(acumulado_12m(ipca), join='inner')
+    return ((1 + selic_12m / 100) / (1 + ipca_12m / 100) - 1) * 100
+
+
+def media_movel(valores, janela):
+    return valores.rolling(janela, min_periods=janela).mean()
+
+
+# Série derivada -> séries base, função, histórico necessário antes da cauda
+# (janelas móveis) e janela de revisão das bases
+DERIVADAS = {
+    'ipca_12m': {
+        'bases': ('ipca',),
+        'calcular': acumulado_12m,
+        'historico': timedelta(days=400),
+        'revisao': SOBREPOSICAO_INCREMENTAL,
+        'label': 'IPCA acumulado em 12 meses',
+        'unit': '%',
+    },
+    'juro_real': {
+        'bases': ('selic', 'ipca'),
+        'calcular': juro_real,
+        'historico': timedelta(days=400),
+        'revisao': SOBREPOSICAO_INCREMENTAL,
+        'label': 'Juro real (SELIC 12 meses descontada do IPCA 12 meses)',
+        'unit': '%',
+    },
+    'pib_pb_yoy': {
+        'bases': ('pib_pb',),
+        'calcular': variacao_anual,
+        'historico': timedelta(days=400),
+        # O SIDRA é buscado com sobreposição de 2 períodos anuais
+        'revisao': timedelta(days=2 * 366),
+        'label': 'PIB da Paraíba - variação anual',
+        'unit': '%',
+    },
+    'cambio_mm21': {
+        'bases': ('cambio',),
+        'calcular': lambda cambio: media_movel(cambio, 21),
+        'historico': timedelta(days=60),
+        'revisao': SOBREPOSICAO_CAMBIO,
+        'label': 'Câmbio - média móvel de 21 dias úteis',
+        'unit': 'U$/R$',
+    },
+}
+
+
+def _ler_base(conexao, serie, inicio):
+    """Série base como pd.Series indexada por data (tabela e coluna têm o nome da série)"""
+    tabela = table(serie, column('data'), column(serie))
+    data = ler_serie(conexao, tabela, serie, Intervalo(inicio=inicio) if inicio else None)
+    if data is None:
+        return pd.Series(dtype='float64')
+    return Serie.de_payload(data).como_pandas()
+
+
+def atualizar_serie_derivada(serie, backfill=False):
+    """
+    Recalcula e grava a cauda de uma série derivada.
+
+    Args:
+        serie (str): Id da série derivada (chave de DERIVADAS)
+        backfill (bool): Recalcula a série inteira
+
+    Returns:
+        bool: True em caso de sucesso
+    """
+    definicao = DERIVADAS[serie]
+    try:
+        with engine.connect() as conexao:
+            ultima_data = None if backfill else ultima_data_derivada(conexao, serie)
+            inicio_cauda = ultima_data - definicao['revisao'] if ultima_data else None
+            inicio_leitura = inicio_cauda - definicao['historico'] if inicio_cauda else None
+            bases = [_ler_base(conexao, base, inicio_leitura) for base in definicao['bases']]
+
+        if any(base.empty for base in bases):
+            logger.warning(f"⚠️ {serie}: série base sem dados ({', '.join(definicao['bases'])})")
+            return False
+
+        valores = definicao['calcular'](*bases).replace([np.inf, -np.inf], np.nan).dropna()
+        if inicio_cauda is not None:
+            valores = valores[valores.index >= pd.Timestamp(inicio_cauda)]
+
+        alterados = upsert_serie_derivada(serie, valores)
+        logger.info(f"✅ Série derivada {serie}: {len(valores)} valores recalculados "
+                    f"(desde {inicio_cauda or 'o início'}), {alterados} alterados")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Erro ao calcular série derivada {serie}: {e}", exc_info=True)
+        return False
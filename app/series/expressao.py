@@ -0,0 +1,210 @@
+# app/series/expressao.py
+"""
+Avaliador de expressões sobre séries (ex.: 'selic - ipca_12m',
+'pib_pb / pib_br', 'rolling(diff(cambio), 21)').
+
+A expressão é lida com o parser do próprio Python (ast), mas só um
+subconjunto mínimo é aceito: números, ids de séries, + - * / **, sinal e
+as funções de FUNCOES. Nada é executado com eval; cada nó aceito vira uma
+função que opera sobre pd.Series (montadas sobre os arrays das Series em
+cache), de modo que a avaliação é vetorizada e as operações binárias
+alinham as séries pelas datas (datas ausentes em uma das séries resultam
+em valor nulo, descartado no final).
+
+A compilação fica em cache (lru_cache) pelo texto da expressão.
+"""
+import ast
+import operator
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+from app.series.serie import Serie
+
+# Limites para que uma expressão não custe mais que uma consulta comum
+MAX_TAMANHO = 200
+MAX_NOS = 60
+MAX_PERIODOS = 1000
+# O expoente de ** precisa ser um número literal pequeno: sem isso,
+# 2**2**2**2**2 seria aceito e só falharia na avaliação
+MAX_EXPOENTE = 10
+
+AGREGACOES_ROLLING = ('mean', 'sum', 'min', 'max', 'std')
+
+_OPERADORES = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Pow: operator.pow,
+}
+
+_UNARIOS = {
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+
+
+def _lag(serie, periodos=1):
+    return serie.shift(periodos)
+
+
+def _diff(serie, periodos=1):
+    return serie.diff(periodos)
+
+
+def _pct_change(serie, periodos=1):
+    """Variação percentual (%) em relação a 'periodos' observações antes"""
+    return (serie / serie.shift(periodos) - 1) * 100
+
+
+def _rolling(serie, janela, agg='mean'):
+    return serie.rolling(janela, min_periods=janela).agg(agg)
+
+
+# Nome -> (função, número mínimo de argumentos, número máximo de argumentos)
+FUNCOES = {
+    'lag': (_lag, 1, 2),
+    'diff': (_diff, 1, 2),
+    'pct_change': (_pct_change, 1, 2),
+    'rolling': (_rolling, 2, 3),
+}
+
+
+class Expressao(namedtuple('Expressao', ['texto', 'series', 'avaliar'])):
+    """
+    Expressão compilada.
+
+    Args:
+        texto (str): Forma normalizada (usada nas chaves de cache)
+        series (tuple): Ids das séries referenciadas, em ordem de aparição
+        avaliar (callable): dict id -> pd.Series -> pd.Series
+    """
+
+    __slots__ = ()
+
+
+def _inteiro(no, nome):
+    if not (isinstance(no, ast.Constant) and type(no.value) is int and 1 <= no.value <= MAX_PERIODOS):
+        raise ValueError(f"{nome} deve ser um inteiro entre 1 e {MAX_PERIODOS}")
+    return no.value
+
+
+def _expoente(no):
+    literal = no.operand if isinstance(no, ast.UnaryOp) and type(no.op) in _UNARIOS else no
+    if not (isinstance(literal, ast.Constant) and type(literal.value) in (int, float)
+            and abs(literal.value) <= MAX_EXPOENTE):
+        raise ValueError(f"O expoente de ** deve ser um número entre -{MAX_EXPOENTE} e {MAX_EXPOENTE}")
+
+
+def _compilar_chamada(no, series):
+    if not isinstance(no.func, ast.Name) or no.func.id not in FUNCOES:
+        raise ValueError(f"Função não permitida (use {', '.join(FUNCOES)})")
+    if no.keywords:
+        raise ValueError("Argumentos nomeados não são aceitos")
+
+    nome = no.func.id
+    funcao, minimo, maximo = FUNCOES[nome]
+    if not minimo <= len(no.args) <= maximo:
+        raise ValueError(f"{nome} recebe de {minimo} a {maximo} argumentos")
+
+    avaliar_serie, eh_serie = _compilar(no.args[0], series)
+    if not eh_serie:
+        raise ValueError(f"O primeiro argumento de {nome} deve ser uma série")
+
+    argumentos = []
+    if len(no.args) > 1:
+        argumentos.append(_inteiro(no.args[1], f"O segundo argumento de {nome}"))
+    if len(no.args) > 2:
+        agg = no.args[2]
+        if not (isinstance(agg, ast.Constant) and agg.value in AGREGACOES_ROLLING):
+            raise ValueError(f"Agregação de {nome} deve ser uma de: {', '.join(AGREGACOES_ROLLING)}")
+        argumentos.append(agg.value)
+
+    return (lambda operandos: funcao(avaliar_serie(operandos), *argumentos)), True
+
+
+def _compilar(no, series):
+    """
+    Converte um nó da ast em uma função dos operandos.
+
+    Returns:
+        tuple: (função dict -> valor, True se o valor é uma série)
+    """
+    if isinstance(no, ast.Constant):
+        if type(no.value) not in (int, float):
+            raise ValueError("Apenas constantes numéricas são aceitas")
+        valor = float(no.value)
+        return (lambda operandos: valor), False
+
+    if isinstance(no, ast.Name):
+        nome = no.id
+        if nome not in series:
+            series.append(nome)
+        return (lambda operandos: operandos[nome]), True
+
+    if isinstance(no, ast.BinOp) and type(no.op) in _OPERADORES:
+        if isinstance(no.op, ast.Pow):
+            _expoente(no.right)
+        operacao = _OPERADORES[type(no.op)]
+        esquerda, serie_esquerda = _compilar(no.left, series)
+        direita, serie_direita = _compilar(no.right, series)
+        return (lambda operandos: operacao(esquerda(operandos), direita(operandos))), \
+            serie_esquerda or serie_direita
+
+    if isinstance(no, ast.UnaryOp) and type(no.op) in _UNARIOS:
+        operacao = _UNARIOS[type(no.op)]
+        operando, eh_serie = _compilar(no.operand, series)
+        return (lambda operandos: operacao(operando(operandos))), eh_serie
+
+    if isinstance(no, ast.Call):
+        return _compilar_chamada(no, series)
+
+    raise ValueError(f"Construção não permitida na expressão: {type(no).__name__}")
+
+
+@lru_cache(maxsize=256)
+def compilar(texto):
+    """
+    Valida e compila uma expressão.
+
+    Returns:
+        Expressao
+
+    Raises:
+        ValueError: Expressão vazia, longa demais, com sintaxe inválida ou
+            com construções fora da linguagem aceita
+    """
+    texto = (texto or '').strip()
+    if not texto:
+        raise ValueError("Informe a expressão em q")
+    if len(texto) > MAX_TAMANHO:
+        raise ValueError(f"Expressão com mais de {MAX_TAMANHO} caracteres")
+    try:
+        arvore = ast.parse(texto, mode='eval')
+    except SyntaxError:
+        raise ValueError(f"Expressão inválida: {texto}")
+    if sum(1 for _ in ast.walk(arvore)) > MAX_NOS:
+        raise ValueError("Expressão complexa demais")
+
+    series = []
+    avaliar, eh_serie = _compilar(arvore.body, series)
+    if not eh_serie:
+        raise ValueError("A expressão deve usar ao menos uma série")
+
+    def avaliar_expressao(operandos):
+        try:
+            with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+                resultado = avaliar(operandos)
+        except (ZeroDivisionError, OverflowError) as e:
+            # Só ocorrem entre constantes (as séries resultam em inf/NaN)
+            raise ValueError(f"Erro aritmético na expressão: {e}")
+        return resultado.replace([np.inf, -np.inf], np.nan).dropna()
+
+    return Expressao(ast.unparse(arvore), tuple(series), avaliar_expressao)
+
+
+def serie_expressao(expressao, resultado):
+    """Serie do resultado avaliado, com a expressão normalizada como label"""
+    return Serie.de_pandas(resultado, {'label': expressao.texto, 'unit': '', 'expr': expressao.texto})
@@ -0,0 +1,86 @@
+# app/series/lttb.py
+"""
+Redução de pontos para gráficos: Largest-Triangle-Three-Buckets (LTTB).
+
+Mantém o primeiro e o último ponto e, de cada balde intermediário, o ponto
+que forma o maior triângulo com o ponto escolhido no balde anterior e a
+média do balde seguinte, preservando picos e vales que uma amostragem
+simples perderia. As médias dos baldes e as áreas de cada balde são
+calculadas com NumPy; só a escolha sequencial balde a balde fica em Python
+(um passo por ponto de saída, não por ponto de entrada).
+"""
+import numpy as np
+
+# Menor max_points aceito: primeiro, último e ao menos um ponto intermediário
+MIN_PONTOS = 3
+
+
+def lttb(x, y, limite):
+    """
+    Índices dos pontos selecionados pelo LTTB.
+
+    Args:
+        x (array): Abscissas crescentes (ex.: dias desde a época)
+        y (array): Valores (sem NaN)
+        limite (int): Número máximo de pontos na saída (>= 3)
+
+    Returns:
+        np.ndarray: Índices crescentes (int64) dos pontos mantidos
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if limite < MIN_PONTOS:
+        raise ValueError(f"limite deve ser >= {MIN_PONTOS}")
+    if n <= limite:
+        return np.arange(n, dtype=np.int64)
+
+    # limite - 2 baldes não vazios com os pontos 1 .. n-2 (mesma divisão do
+    # algoritmo original: balde i = [floor(i * passo) + 1, floor((i + 1) * passo) + 1))
+    passo = (n - 2) / (limite - 2)
+    bordas = np.floor(np.arange(limite - 1) * passo).astype(np.int64) + 1
+    bordas[-1] = n - 1  # evita erro de arredondamento no último balde
+    inicios, fins = bordas[:-1], bordas[1:]
+
+    # Média de cada balde (vetorizado); o "balde seguinte" do último é o ponto final
+    contagens = fins - inicios
+    medias_x = np.add.reduceat(x[1:n - 1], inicios - 1) / contagens
+    medias_y = np.add.reduceat(y[1:n - 1], inicios - 1) / contagens
+    proximo_x = np.append(medias_x[1:], x[n - 1])
+    proximo_y = np.append(medias_y[1:], y[n - 1])
+
+    indices = np.empty(limite, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    anterior = 0
+    for balde in range(limite - 2):
+        inicio, fim = inicios[balde], fins[balde]
+        ax, ay = x[anterior], y[anterior]
+        # Dobro da área do triângulo (anterior, candidato, média do próximo balde)
+        areas = np.abs(
+            (ax - proximo_x[balde]) * (y[inicio:fim] - ay)
+            - (ax - x[inicio:fim]) * (proximo_y[balde] - ay)
+        )
+        anterior = inicio + int(np.argmax(areas))
+        indices[balde + 1] = anterior
+
+    return indices
+
+
+def reduzir(serie, max_pontos):
+    """
+    Aplica o LTTB a uma Serie.
+
+    Valores nulos são descartados antes da redução. Os metadados são
+    preservados e 'original_points' informa o tamanho da série completa.
+
+    Returns:
+        Serie: A própria série, se já cabe no limite, ou uma nova série reduzida
+    """
+    if len(serie) <= max_pontos:
+        return serie
+
+    validos = serie.sem_nulos()
+    indices = lttb(validos.dias, validos.valores, max_pontos)
+    return validos.com(validos.dias[indices], validos.valores[indices], original_points=len(serie))
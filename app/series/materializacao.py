@@ -0,0 +1,83 @@
+# app/series/materializacao.py
+"""
+Materialização dos payloads da API, etapa final do ETL.
+
+Depois de uma atualização bem-sucedida, o payload da série é renderizado
+uma única vez (JSON + gzip) e gravado em payloads_series; as rotas servem
+esses bytes diretamente. Se o conteúdo mudou, a série é notificada (uma
+única vez, depois do commit do payload) para que os caches descartem a
+versão anterior; a gravação dos dados em si não notifica ninguém.
+
+A série também é publicada no armazém compartilhado (app.series.armazem),
+de onde os workers web da mesma máquina a leem sem ir ao banco.
+"""
+import json
+import logging
+
+from app.cache import notificar_atualizacao
+from app.data_apis.conect_post.conect_post_payloads import gravar_payload, remover_payload, ler_payloads
+from app.series.armazem import atualizar_armazem
+from app.series.payload import Payload, ultima_data
+from app.series.registro import SERIES
+from app.series.serie import Serie
+
+logger = logging.getLogger(__name__)
+
+
+def materializar_serie(serie):
+    """
+    Renderiza e grava o payload de uma série.
+
+    Em caso de falha o payload antigo é removido, para que as rotas não
+    sirvam uma versão desatualizada (voltam a ler a tabela de dados).
+
+    Returns:
+        bool: True se o payload foi gravado (alterado ou não)
+    """
+    try:
+        data = SERIES[serie]['carregar']()
+        if data is None:
+            raise ValueError("leitura da tabela retornou None")
+
+        payload = Payload.renderizar(serie, data)
+        if gravar_payload(payload, ultima_data(data)):
+            logger.info(f"📦 Payload de {serie} materializado: {len(payload.corpo)} bytes "
+                        f"({len(payload.corpo_gzip)} em gzip), etag {payload.etag}")
+            notificar_atualizacao(serie)
+        else:
+            logger.info(f"📦 Payload de {serie} inalterado")
+        atualizar_armazem({serie: (Serie.de_payload(data), payload.etag)})
+        return True
+    except Exception as e:
+        logger.error(f"❌ Erro ao materializar payload de {serie}: {e}", exc_info=True)
+        remover_payload(serie)
+        atualizar_armazem({}, removidas=[serie])
+        notificar_atualizacao(serie)
+        return False
+
+
+def publicar_armazem():
+    """
+    Publica no armazém compartilhado todas as séries já materializadas.
+
+    Usado ao iniciar o gunicorn (antes de criar os workers) e pela linha de
+    comando do ETL; séries sem payload materializado ficam de fora e são
+    lidas do banco pelos workers.
+
+    Returns:
+        int | None: Número de séries publicadas (0 com o banco ainda sem
+            payloads) ou None se a leitura falhou
+    """
+    try:
+        payloads = ler_payloads(list(SERIES))
+    except Exception as e:
+        logger.error(f"❌ Erro ao ler os payloads para o armazém: {e}", exc_info=True)
+        return None
+
+    series = {
+        serie: (Serie.de_payload(json.loads(payload.corpo)), payload.etag)
+        for serie, payload in payloads.items()
+    }
+    atualizar_armazem(series, substituir=True)
+    return len(series)
+
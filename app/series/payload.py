@@ -0,0 +1,100 @@
+# app/series/payload.py
+"""
+Payload de uma série pronto para envio: corpo JSON já serializado (e
+comprimido em gzip) mais os validadores HTTP.
+
+É gerado uma vez, pelo ETL (materialização) ou na primeira leitura, e
+depois servido byte a byte pelas rotas, sem consultar o banco nem
+serializar de novo.
+"""
+import gzip
+import hashlib
+import json
+from datetime import datetime, timezone
+
+
+def ultima_data(data):
+    """Última data do payload (datetime UTC), ou None se a série está vazia"""
+    datas = data.get('dates') or []
+    if not datas:
+        return None
+    try:
+        return datetime.strptime(str(datas[-1])[:10], '%Y-%m-%d').replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+
+class Payload:
+    """
+    Args:
+        serie (str): Id da série
+        corpo (bytes): JSON em UTF-8
+        corpo_gzip (bytes): corpo comprimido em gzip
+        etag (str): id + última data + hash do corpo (igual em todos os workers)
+        last_modified (datetime, optional): Quando o conteúdo mudou pela
+            última vez (payloads_series.atualizado_em, UTC). Não é a última
+            data da série: a busca incremental pode revisar pontos
+            anteriores sem mudar a última data. None quando a versão não
+            vem de um payload materializado (só o ETag vale)
+        idade (int, optional): Só no modo degradado: segundos desde que a
+            versão servida foi lida do banco
+    """
+
+    __slots__ = ('serie', 'corpo', 'corpo_gzip', 'etag', 'last_modified', 'idade')
+
+    def __init__(self, serie, corpo, corpo_gzip, etag, last_modified=None, idade=None):
+        self.serie = serie
+        self.corpo = corpo
+        self.corpo_gzip = corpo_gzip
+        self.etag = etag
+        self.last_modified = last_modified
+        self.idade = idade
+
+    @property
+    def degradado(self):
+        """True se é uma versão antiga servida porque o banco não respondeu"""
+        return self.idade is not None
+
+    @classmethod
+    def renderizar(cls, serie, data):
+        """Serializa o dicionário devolvido por get_*_data_from_db"""
+        corpo = json.dumps(data, ensure_ascii=False, sort_keys=True,
+                           separators=(',', ':'), default=str).encode('utf-8')
+        ultima = ultima_data(data)
+        sufixo = ultima.strftime('%Y%m%d') if ultima else 'vazia'
+        versao = hashlib.blake2b(corpo, digest_size=8).hexdigest()
+        return cls(
+            serie,
+            corpo,
+            # mtime fixo: mesmo corpo gera sempre os mesmos bytes comprimidos
+            gzip.compress(corpo, compresslevel=9, mtime=0),
+            f"{serie}-{sufixo}-{versao}"
+        )
+
+    @classmethod
+    def de_serie(cls, serie, valores, etag=None, last_modified=None):
+        """
+        Serializa uma Serie (app.series.serie).
+
+        etag mantém o ETag do payload materializado de que a Serie veio (ex.:
+        armazém compartilhado), para que a mesma versão tenha o mesmo ETag em
+        todos os workers. last_modified é o do payload de origem: recortes e
+        transformações só mudam quando ele muda.
+        """
+        payload = cls.renderizar(serie, valores.para_payload())
+        if etag is not None:
+            payload.etag = etag
+        payload.last_modified = last_modified
+        return payload
+
+    @property
+    def nbytes(self):
+        """Memória ocupada pelos corpos (usada no limite do cache)"""
+        return len(self.corpo) + len(self.corpo_gzip)
+
+    @property
+    def validadores(self):
+        return {'etag': self.etag, 'last_modified': self.last_modified}
+
+    def __repr__(self):
+        return f"Payload({self.serie!r}, {len(self.corpo)} bytes, etag={self.etag!r})"
@@ -0,0 +1,117 @@
+# app/series/reamostragem.py
+"""
+Reamostragem de séries para outra frequência (ex.: câmbio diário -> mensal).
+
+Cada período é rotulado pela sua data inicial (primeiro dia da semana,
+mês, trimestre ou ano), o mesmo formato das séries mensais gravadas
+('%Y-%m-01'), de modo que séries de frequências diferentes fiquem
+alinhadas. Como as datas da Serie são crescentes, cada período é um trecho
+contíguo dos arrays e a agregação é feita com reduceat do NumPy, sem laços
+em Python nem conversão para pandas.
+"""
+import numpy as np
+
+# Frequências aceitas no parâmetro freq (mesmos códigos de período do pandas)
+FREQUENCIAS = {
+    'W': 'semanal',
+    'M': 'mensal',
+    'Q': 'trimestral',
+    'Y': 'anual',
+}
+
+# Sinônimos aceitos na API
+_ALIASES_FREQ = {
+    'week': 'W', 'weekly': 'W', 'semanal': 'W',
+    'month': 'M', 'monthly': 'M', 'mensal': 'M',
+    'quarter': 'Q', 'quarterly': 'Q', 'trimestral': 'Q',
+    'year': 'Y', 'yearly': 'Y', 'annual': 'Y', 'anual': 'Y', 'a': 'Y',
+}
+
+AGREGACOES = ('mean', 'last', 'sum', 'min', 'max')
+AGREGACAO_PADRAO = 'mean'
+
+
+def normalizar_reamostragem(freq=None, agg=None):
+    """
+    Interpreta os parâmetros freq e agg da API.
+
+    Returns:
+        tuple | None: (freq, agg) normalizados, ou None sem freq
+
+    Raises:
+        ValueError: Frequência ou agregação inválida, ou agg sem freq
+    """
+    if not freq:
+        if agg:
+            raise ValueError("agg exige freq")
+        return None
+
+    freq = freq.strip()
+    freq_normalizada = freq.upper() if freq.upper() in FREQUENCIAS else _ALIASES_FREQ.get(freq.lower())
+    if freq_normalizada is None:
+        raise ValueError(f"freq inválido: {freq} (use {', '.join(FREQUENCIAS)})")
+
+    agg = (agg or AGREGACAO_PADRAO).lower()
+    if agg not in AGREGACOES:
+        raise ValueError(f"agg inválido: {agg} (use {'|'.join(AGREGACOES)})")
+
+    return freq_normalizada, agg
+
+
+# 1970-01-01 foi uma quinta-feira: a semana (segunda a domingo) que o contém
+# começa 3 dias antes
+_DESLOCAMENTO_SEMANA = 3
+
+
+def _periodos(dias, freq):
+    """
+    Código de período de cada data e a data inicial (em dias) de um código.
+
+    Returns:
+        tuple: (array de códigos crescentes, função códigos -> dias iniciais)
+    """
+    if freq == 'W':
+        codigos = (dias.astype(np.int64) + _DESLOCAMENTO_SEMANA) // 7
+        return codigos, lambda c: c * 7 - _DESLOCAMENTO_SEMANA
+
+    meses = dias.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+    if freq == 'M':
+        return meses, lambda c: c.astype('datetime64[M]').astype('datetime64[D]').astype(np.int64)
+    if freq == 'Q':
+        return meses // 3, lambda c: (c * 3).astype('datetime64[M]').astype('datetime64[D]').astype(np.int64)
+    # Y: meses desde 1970 // 12 = anos desde 1970
+    return meses // 12, lambda c: c.astype('datetime64[Y]').astype('datetime64[D]').astype(np.int64)
+
+
+def reamostrar(serie, freq, agg):
+    """
+    Agrega uma Serie por período.
+
+    Valores nulos são ignorados na agregação; períodos sem dados não
+    aparecem na saída. Os metadados são preservados e 'freq'/'agg'
+    registram a transformação.
+
+    Returns:
+        Serie: Nova série (a original não é alterada)
+    """
+    validos = serie.sem_nulos()
+    if not len(validos):
+        return validos.com(validos.dias, validos.valores, freq=freq, agg=agg)
+
+    codigos, inicio_do_periodo = _periodos(validos.dias, freq)
+    # Início de cada trecho contíguo com o mesmo período
+    inicios = np.flatnonzero(np.diff(codigos, prepend=codigos[0] - 1))
+    valores = validos.valores
+
+    if agg == 'mean':
+        agregados = np.add.reduceat(valores, inicios) / np.diff(inicios, append=len(valores))
+    elif agg == 'sum':
+        agregados = np.add.reduceat(valores, inicios)
+    elif agg == 'min':
+        agregados = np.minimum.reduceat(valores, inicios)
+    elif agg == 'max':
+        agregados = np.maximum.reduceat(valores, inicios)
+    else:  # last
+        agregados = valores[np.append(inicios[1:], len(valores)) - 1]
+
+    return validos.com(inicio_do_periodo(codigos[inicios]), agregados, freq=freq, agg=agg)
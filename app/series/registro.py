@@ -0,0 +1,595 @@
+# app/series/registro.py
+"""
+Registro das séries servidas pela API.
+
+O id de cada série é o nome da sua tabela no banco, o mesmo usado pelo ETL
+ao notificar atualizações, de modo que as chaves do cache e as
+invalidações falam a mesma língua.
+"""
+import json
+import logging
+import time
+
+from app.cache import cache_series
+from app.data_apis.conect_post.database import SessionLeitura
+from app.data_apis.conect_post.conect_post_payloads import ler_versoes, ler_payloads
+from app.series.alinhamento import alinhar
+from app.series.armazem import armazem_series, atualizar_armazem
+from app.series.expressao import compilar, serie_expressao
+from app.series.lttb import reduzir
+from app.series.reamostragem import reamostrar
+from app.series.payload import Payload
+from app.series.serie import Serie
+from app.data_apis.conect_post.conect_post import get_pib_data_from_db
+from app.data_apis.conect_post.condect_post_desocupacao import get_desocupacao_data_from_db
+from app.data_apis.conect_post.conect_post_ipca import get_ipca_data_from_db
+from app.data_apis.conect_post.conect_post_selic import get_selic_data_from_db
+from app.data_apis.conect_post.conect_post_cambio import get_cambio_data_from_db
+from app.data_apis.conect_post.conect_post_pib_pb import get_pib_pb_data_from_db
+from app.data_apis.conect_post.conect_post_sbcpb import get_bcpb_data_from_db
+from app.data_apis.conect_post.conect_post_desocupacao_pb import get_desocupacao_pb_data_from_db
+from app.data_apis.conect_post.conect_post_divliq_pb import get_divliq_data_from_db
+from app.data_apis.conect_post.conect_post_derivadas import carregador_serie_derivada
+from app.series.derivadas import DERIVADAS
+
+# id -> carregar (função get_*_data_from_db), nome (usado nas mensagens),
+# label e unit (usados no payload de erro)
+SERIES = {
+    'pib_br': {
+        'carregar': get_pib_data_from_db,
+        'nome': 'do PIB',
+        'label': 'PIB do Brasil',
+        'unit': '%',
+    },
+    'pib_pb': {
+        'carregar': get_pib_pb_data_from_db,
+        'nome': 'do PIB da Paraíba',
+        'label': 'PIB da Paraíba',
+        'unit': 'Milhões de Reais',
+    },
+    'desocupacao': {
+        'carregar': get_desocupacao_data_from_db,
+        'nome': 'da Desocupação',
+        'label': 'Taxa de Desocupação',
+        'unit': '%',
+    },
+    'desocupacao_pb': {
+        'carregar': get_desocupacao_pb_data_from_db,
+        'nome': 'da Desocupação da Paraíba',
+        'label': 'Taxa de Desocupação da Paraíba',
+        'unit': '%',
+    },
+    'ipca': {
+        'carregar': get_ipca_data_from_db,
+        'nome': 'do IPCA',
+        'label': 'IPCA do Brasil',
+        'unit': '%',
+    },
+    'selic': {
+        'carregar': get_selic_data_from_db,
+        'nome': 'da SELIC',
+        'label': 'SELIC',
+        'unit': '%',
+    },
+    'cambio': {
+        'carregar': get_cambio_data_from_db,
+        'nome': 'do CAMBIO',
+        'label': 'CAMBIO',
+        'unit': 'U$/R$',
+    },
+    'bcpb': {
+        'carregar': get_bcpb_data_from_db,
+        'nome': 'do BCPB',
+        'label': 'BCPB do Brasil',
+        'unit': '',
+    },
+    'divliq': {
+        'carregar': get_divliq_data_from_db,
+        'nome': 'do DIVPUB',
+        'label': 'Dívida Pública do Governo do Estado da Paraíba',
+        'unit': '',
+    },
+}
+
+# Séries derivadas (tabela series_derivadas), calculadas pelo ETL
+for _serie, _definicao in DERIVADAS.items():
+    SERIES[_serie] = {
+        'carregar': carregador_serie_derivada(_serie, _definicao['label'], _definicao['unit']),
+        'nome': f"de {_definicao['label']}",
+        'label': _definicao['label'],
+        'unit': _definicao['unit'],
+    }
+
+
+# id -> (Payload do período padrão, instante da leitura no banco): a última
+# versão boa de cada série, que sobrevive ao TTL, ao descarte e às
+# invalidações do cache e é servida no modo degradado
+_reservas = {}
+
+
+def obter_config(serie):
+    """Configuração de uma série registrada (KeyError se não existir)"""
+    return SERIES[serie]
+
+
+def _etapas(reamostragem=None, max_pontos=None):
+    """
+    Transformações pedidas, na ordem em que são aplicadas.
+
+    Returns:
+        list: Pares (sufixo da chave de cache, função Serie -> Serie)
+    """
+    etapas = []
+    if reamostragem is not None:
+        freq, agg = reamostragem
+        etapas.append((('freq', freq, agg), lambda valores: reamostrar(valores, freq, agg)))
+    if max_pontos is not None:
+        etapas.append((('max_points', max_pontos), lambda valores: reduzir(valores, max_pontos)))
+    return etapas
+
+
+def chave_cache(serie, intervalo=None, reamostragem=None, max_pontos=None):
+    """Chave do cache para a série no período (normalizado) e transformações pedidos"""
+    chave = (serie,) if intervalo is None else (serie, 'intervalo') + intervalo.chave()
+    for sufixo, _ in _etapas(reamostragem, max_pontos):
+        chave += sufixo
+    return chave
+
+
+def _arrays(chave, payload):
+    """
+    Serie (arrays NumPy) de um payload em cache.
+
+    A série do período padrão vem do armazém compartilhado, quando ele
+    tem a mesma versão (ETag) do payload. Nos demais casos o JSON é
+    decodificado uma vez e a Serie fica no cache sob a chave do payload
+    mais o sufixo 'arrays', para as transformações seguintes.
+    """
+    if len(chave) == 1:
+        valores = armazem_series.obter(chave[0], payload.etag)
+        if valores is not None:
+            return valores
+
+    valores = cache_series.get(chave + ('arrays',))
+    if valores is None:
+        valores = Serie.de_payload(json.loads(payload.corpo))
+        cache_series.set(chave + ('arrays',), valores)
+    return valores
+
+
+def _recortar_do_cache(serie, intervalo):
+    """
+    Payload do intervalo recortado em memória (busca binária) da série do
+    período padrão, se ela está no cache e cobre o início do intervalo.
+
+    Returns:
+        Payload | None: None se o intervalo precisa ser lido do banco
+    """
+    chave = chave_cache(serie)
+    payload = cache_series.get(chave)
+    if payload is None:
+        return None
+    recorte = _arrays(chave, payload).recortar(intervalo)
+    return None if recorte is None else Payload.de_serie(serie, recorte, last_modified=payload.last_modified)
+
+
+def _do_armazem(series, session):
+    """
+    Séries do armazém compartilhado que estão na versão materializada.
+
+    O armazém é local à máquina e só muda quando alguém nela o regrava; com
+    o ETL em outro processo ou máquina ele fica atrás do banco. Por isso
+    só as versões de payloads_series são lidas (sem os corpos) e a série do
+    armazém é usada apenas quando o ETag é o mesmo.
+
+    Returns:
+        tuple: (dict id -> Serie confirmada, dict id -> (etag, last_modified) gravados)
+    """
+    versoes = ler_versoes(series, session)
+    confirmadas = {}
+    for serie, (etag, _) in versoes.items():
+        valores = armazem_series.obter(serie, etag)
+        if valores is not None:
+            confirmadas[serie] = valores
+    return confirmadas, versoes
+
+
+def _ler_materializados(series, session):
+    """
+    Payloads materializados do período padrão.
+
+    Os que estão atualizados no armazém são montados a partir dele; os
+    demais são lidos de payloads_series e republicados no armazém, para
+    que os outros workers da máquina não os leiam de novo.
+
+    Returns:
+        dict: id -> Payload (séries sem payload gravado ficam de fora)
+    """
+    confirmadas, versoes = _do_armazem(series, session)
+    payloads = {
+        serie: Payload.de_serie(serie, valores, *versoes[serie])
+        for serie, valores in confirmadas.items()
+    }
+    faltando = [serie for serie in versoes if serie not in confirmadas]
+    if faltando:
+        payloads.update(_republicar(faltando, session))
+    return payloads
+
+
+def _republicar(series, session):
+    """Lê os payloads de payloads_series e os grava no armazém compartilhado"""
+    lidos = ler_payloads(series, session)
+    atualizar_armazem({
+        serie: (Serie.de_payload(json.loads(payload.corpo)), payload.etag)
+        for serie, payload in lidos.items()
+    })
+    return lidos
+
+
+def sincronizar_armazem(series):
+    """
+    Regrava no armazém compartilhado as séries que estão atrás de
+    payloads_series (ouvinte de NOTIFY: a atualização pode ter sido feita
+    pelo ETL de outra máquina, que não grava o armazém desta).
+    """
+    session = SessionLeitura()
+    try:
+        confirmadas, versoes = _do_armazem(series, session)
+        atrasadas = [serie for serie in versoes if serie not in confirmadas]
+        if atrasadas:
+            _republicar(atrasadas, session)
+        return atrasadas
+    finally:
+        session.close()
+
+
+def _recortar_do_armazem(series, intervalo, session):
+    """Payloads do intervalo recortados das séries confirmadas do armazém que o cobrem"""
+    confirmadas, versoes = _do_armazem(series, session)
+    recortes = {}
+    for serie, valores in confirmadas.items():
+        recorte = valores.recortar(intervalo)
+        if recorte is not None:
+            recortes[serie] = Payload.de_serie(serie, recorte, last_modified=versoes[serie][1])
+    return recortes
+
+
+def carregar_payload(serie, session=None, intervalo=None):
+    """
+    Payload pronto de uma série.
+
+    No período padrão usa o payload materializado pelo ETL (montado a
+    partir do armazém compartilhado quando ele está na mesma versão). Um
+    intervalo é recortado da série do período padrão em cache ou no
+    armazém, quando ela o cobre. Nos demais casos (série ainda não
+    materializada, intervalo fora da série em memória) renderiza a partir
+    da tabela de dados.
+
+    Returns:
+        Payload | None: None se a leitura falhou
+    """
+    if intervalo is not None:
+        payload = _recortar_do_cache(serie, intervalo)
+        if payload is not None:
+            return payload
+
+    sessao_propria = session is None
+    if sessao_propria:
+        session = SessionLeitura()
+    try:
+        if intervalo is None:
+            payload = _ler_materializados([serie], session).get(serie)
+            if payload is None:
+                logging.info(f"Série {serie} sem payload materializado; lendo a tabela de dados")
+        else:
+            payload = _recortar_do_armazem([serie], intervalo, session).get(serie)
+        if payload is None:
+            data = SERIES[serie]['carregar'](session=session, intervalo=intervalo)
+            payload = None if data is None else Payload.renderizar(serie, data)
+    finally:
+        if sessao_propria:
+            session.close()
+
+    if payload is not None and intervalo is None:
+        _guardar_reserva(serie, payload)
+    return payload
+
+
+def _guardar_reserva(serie, payload):
+    _reservas[serie] = (payload, time.time())
+
+
+def _reserva(serie, intervalo=None):
+    """
+    Última versão boa da série, para o modo degradado: a reserva em memória
+    ou a série do armazém compartilhado, a que for mais recente. Um
+    intervalo é recortado dela quando ela o cobre.
+
+    Returns:
+        tuple | None: (Serie, idade em segundos) ou None se não há versão
+            que atenda ao pedido
+    """
+    candidatos = []
+    if serie in _reservas:
+        payload, instante = _reservas[serie]
+        candidatos.append((instante, lambda: Serie.de_payload(json.loads(payload.corpo))))
+    geracao = armazem_series.geracao
+    if geracao is not None:
+        candidatos.append((geracao / 1e9, lambda: armazem_series.obter(serie)))
+
+    for instante, obter in sorted(candidatos, key=lambda candidato: candidato[0], reverse=True):
+        valores = obter()
+        if valores is not None and intervalo is not None:
+            valores = valores.recortar(intervalo)
+        if valores is not None:
+            return valores, max(0, int(time.time() - instante))
+    return None
+
+
+def payload_degradado(serie, intervalo=None, reamostragem=None, max_pontos=None):
+    """
+    Modo degradado: com o banco indisponível (pool esgotado, prazo de
+    conexão ou de consulta estourado), serve a última versão boa da série
+    com as transformações pedidas, marcada com stale e age (segundos).
+
+    Nada aqui vai para o cache: quando o banco voltar, a próxima
+    requisição lê a versão atual.
+
+    Returns:
+        Payload | None: None se não há versão guardada que atenda ao pedido
+    """
+    reserva = _reserva(serie, intervalo)
+    if reserva is None:
+        return None
+    valores, idade = reserva
+    for _, transformar in _etapas(reamostragem, max_pontos):
+        valores = transformar(valores)
+
+    logging.warning(f"⚠️ Modo degradado: servindo {serie} com {idade}s de idade")
+    payload = Payload.de_serie(serie, valores.com(valores.dias, valores.valores, stale=True, age=idade))
+    payload.idade = idade
+    return payload
+
+
+def _derivar(serie, chave, base, etapas):
+    """
+    Aplica as transformações ao payload base, uma etapa por vez.
+
+    Cada resultado intermediário fica no cache sob a chave da base mais os
+    sufixos das etapas já aplicadas (ex.: a série mensal é reaproveitada
+    por pedidos com e sem max_points).
+    """
+    payload = base
+    for sufixo, transformar in etapas:
+        def calcular(chave=chave, payload=payload, transformar=transformar):
+            return Payload.de_serie(serie, transformar(_arrays(chave, payload)),
+                                    last_modified=payload.last_modified)
+
+        chave += sufixo
+        payload = cache_series.obter(chave, calcular)
+    return payload
+
+
+def obter_payload(serie, intervalo=None, reamostragem=None, max_pontos=None):
+    """
+    Payload de uma série no período e nas transformações pedidos, via cache.
+
+    A série completa do período fica em cache sob sua própria chave; cada
+    combinação de freq/agg e max_points gera entradas derivadas dela.
+
+    Se o banco falhar, serve a última versão boa (payload_degradado).
+
+    Returns:
+        Payload | None: None se a leitura falhou e não há versão guardada
+    """
+    etapas = _etapas(reamostragem, max_pontos)
+    if etapas:
+        payload = cache_series.get(chave_cache(serie, intervalo, reamostragem, max_pontos))
+        if payload is not None:
+            return payload
+
+    chave = chave_cache(serie, intervalo)
+    try:
+        base = cache_series.obter(chave, lambda: carregar_payload(serie, intervalo=intervalo))
+    except Exception as e:
+        logging.error(f"Erro ao carregar {serie}: {e}")
+        base = None
+    if base is None:
+        return payload_degradado(serie, intervalo, reamostragem, max_pontos)
+    return _derivar(serie, chave, base, etapas)
+
+
+def carregar_series(ids, intervalo=None, reamostragem=None, max_pontos=None):
+    """
+    Resolve várias séries de uma vez, para o endpoint em lote.
+
+    As que estão no cache não tocam o banco; para as demais, os payloads
+    materializados são lidos em uma única consulta (ou montados a partir
+    do armazém compartilhado, quando ele está na mesma versão) e só as
+    séries ainda não materializadas são lidas das tabelas de dados, tudo
+    na mesma sessão (uma única conexão do pool). Os
+    resultados vão para o cache. Séries que outra requisição já está
+    carregando não são lidas de novo: o lote espera o resultado dela. As
+    que não puderem ser lidas (banco indisponível) saem no modo degradado.
+
+    Args:
+        ids (list): Ids de séries registradas
+        intervalo (Intervalo, optional): Período aplicado a todas as séries
+        reamostragem (tuple, optional): (freq, agg) aplicado a todas as séries
+        max_pontos (int, optional): Limite de pontos por série (LTTB)
+
+    Returns:
+        dict: id -> Payload da série, ou None se a leitura falhou e não há
+            versão guardada
+    """
+    etapas = _etapas(reamostragem, max_pontos)
+    resultado = {}
+    bases = {}
+    faltando = []
+    for serie in ids:
+        if etapas:
+            payload = cache_series.get(chave_cache(serie, intervalo, reamostragem, max_pontos))
+            if payload is not None:
+                resultado[serie] = payload
+                continue
+        base = cache_series.consultar(
+            chave_cache(serie, intervalo),
+            revalidar=lambda serie=serie: carregar_payload(serie, intervalo=intervalo)
+        )
+        if base is None and intervalo is not None:
+            base = _recortar_do_cache(serie, intervalo)
+            if base is not None:
+                cache_series.set(chave_cache(serie, intervalo), base)
+        if base is None:
+            faltando.append(serie)
+        else:
+            bases[serie] = base
+
+    if faltando:
+        voos = {serie: cache_series.iniciar_voo(chave_cache(serie, intervalo)) for serie in faltando}
+        carregar = [serie for serie in faltando if voos[serie][1]]
+        try:
+            if carregar:
+                _carregar_lote(carregar, intervalo, voos, bases)
+        except Exception as e:
+            logging.error(f"Erro ao carregar o lote {', '.join(carregar)}: {e}")
+            for serie in carregar:
+                voo = voos[serie][0]
+                if not voo.evento.is_set():
+                    cache_series.concluir_voo(chave_cache(serie, intervalo), voo, erro=e)
+
+        for serie in faltando:
+            voo, lider = voos[serie]
+            if lider:
+                continue
+            try:
+                bases[serie] = cache_series.aguardar_voo(voo)
+            except Exception as e:
+                logging.error(f"Erro na carga de {serie} feita por outra requisição: {e}")
+                bases[serie] = None
+
+        logging.info(f"📦 Lote de séries: {len(ids) - len(faltando)} do cache, {len(carregar)} do banco, "
+                     f"{len(faltando) - len(carregar)} de cargas em andamento")
+
+    for serie in ids:
+        if serie in resultado:
+            continue
+        base = bases.get(serie)
+        if base is None:
+            resultado[serie] = payload_degradado(serie, intervalo, reamostragem, max_pontos)
+        else:
+            resultado[serie] = _derivar(serie, chave_cache(serie, intervalo), base, etapas)
+    return resultado
+
+
+def _carregar_lote(series, intervalo, voos, bases):
+    """Lê do banco, em uma única sessão, as séries cujo voo (single-flight) é deste lote"""
+    session = SessionLeitura()
+    try:
+        if intervalo is None:
+            materializados = _ler_materializados(series, session)
+        else:
+            materializados = _recortar_do_armazem(series, intervalo, session)
+        for serie in series:
+            payload = materializados.get(serie)
+            if payload is None:
+                data = SERIES[serie]['carregar'](session=session, intervalo=intervalo)
+                if data is None:
+                    # Descarta uma eventual transação abortada antes da próxima série
+                    session.rollback()
+                    logging.error(f"Dados {SERIES[serie]['nome']} retornaram None")
+                else:
+                    payload = Payload.renderizar(serie, data)
+            if payload is not None and intervalo is None:
+                _guardar_reserva(serie, payload)
+            cache_series.concluir_voo(chave_cache(serie, intervalo), voos[serie][0], payload)
+            bases[serie] = payload
+    finally:
+        session.close()
+
+
+def obter_alinhamento(ids, modo, base=None, intervalo=None, reamostragem=None):
+    """
+    Várias séries alinhadas em um índice de datas comum, via cache.
+
+    O resultado fica em cache sob uma chave cujo primeiro elemento é a
+    tupla de ids (a assinatura do pedido), de modo que a atualização de
+    qualquer uma das séries o invalida. As séries em si vêm de
+    carregar_series, reaproveitando as entradas já em cache.
+
+    Returns:
+        Payload | None: None se a leitura de alguma série falhou
+
+    Raises:
+        ValueError: Série sem dados no período base do rebase
+    """
+    chave = (tuple(ids), 'alinhar', modo, base)
+    chave += chave_cache(None, intervalo, reamostragem)[1:]
+
+    def calcular():
+        series = obter_arrays(ids, intervalo, reamostragem)
+        if series is None:
+            return None
+        return Payload.renderizar('+'.join(ids), alinhar(series, modo, base))
+
+    return cache_series.obter(chave, calcular)
+
+
+def obter_arrays(ids, intervalo=None, reamostragem=None):
+    """
+    Várias séries como Serie (arrays NumPy), para alinhamento e expressões.
+
+    Versões do modo degradado não são usadas: o resultado seria guardado
+    no cache como se fosse atual.
+
+    Returns:
+        dict | None: id -> Serie, ou None se a leitura de alguma série falhou
+    """
+    series = {}
+    faltando = []
+    for serie in ids:
+        valores = cache_series.get(chave_cache(serie, intervalo, reamostragem) + ('arrays',))
+        if valores is None:
+            faltando.append(serie)
+        else:
+            series[serie] = valores
+
+    if faltando:
+        payloads = carregar_series(faltando, intervalo, reamostragem)
+        for serie in faltando:
+            if payloads[serie] is None or payloads[serie].degradado:
+                return None
+            series[serie] = _arrays(chave_cache(serie, intervalo, reamostragem), payloads[serie])
+    return {serie: series[serie] for serie in ids}
+
+
+def obter_expressao(texto, intervalo=None, reamostragem=None):
+    """
+    Avalia uma expressão sobre as séries registradas, via cache.
+
+    A reamostragem (freq/agg) e o intervalo são aplicados a cada operando
+    antes da avaliação. O resultado fica em cache sob a tupla de séries
+    usadas, e é invalidado quando qualquer uma delas é atualizada.
+
+    Returns:
+        Payload | None: None se a leitura de alguma série falhou
+
+    Raises:
+        ValueError: Expressão inválida ou com séries desconhecidas
+    """
+    expressao = compilar(texto)
+    desconhecidas = [serie for serie in expressao.series if serie not in SERIES]
+    if desconhecidas:
+        raise ValueError(f"Séries desconhecidas: {', '.join(desconhecidas)}")
+
+    chave = (expressao.series, 'expr', expressao.texto)
+    chave += chave_cache(None, intervalo, reamostragem)[1:]
+
+    def calcular():
+        series = obter_arrays(expressao.series, intervalo, reamostragem)
+        if series is None:
+            return None
+        resultado = expressao.avaliar({serie: valores.como_pandas() for serie, valores in series.items()})
+        return Payload.de_serie('expr', serie_expressao(expressao, resultado))
+
+    return cache_series.obter(chave, calcular)
@@ -0,0 +1,130 @@
+# app/series/serie.py
+"""
+Representação compacta de uma série em memória.
+
+Em vez de listas Python de strings e floats, a série guarda dois arrays
+NumPy: dias desde 1970-01-01 (int32, 4 bytes por data) e valores (float64,
+nulos como NaN), mais os metadados do payload (label, unit...). É a forma
+usada no cache e nas transformações (intervalo, reamostragem, LTTB,
+alinhamento, expressões); listas e JSON só são montados na serialização.
+
+Recortes por data usam busca binária (searchsorted) e devolvem views dos
+arrays originais, sem cópia.
+"""
+import numpy as np
+import pandas as pd
+
+_CAMPOS_DADOS = ('dates', 'values')
+
+
+def dia_epoca(valor):
+    """Data (date, datetime64, Timestamp ou 'AAAA-MM-DD') em dias desde 1970-01-01"""
+    return int(np.datetime64(valor, 'D').astype(np.int64))
+
+
+class Serie:
+    """
+    Args:
+        dias (array): Datas crescentes em dias desde a época (int32)
+        valores (array): Valores (float64, NaN para nulos)
+        meta (dict, optional): Demais campos do payload (label, unit, ...)
+    """
+
+    __slots__ = ('dias', 'valores', 'meta')
+
+    def __init__(self, dias, valores, meta=None):
+        # asarray não copia arrays que já têm o tipo certo (views continuam views)
+        self.dias = np.asarray(dias, dtype=np.int32)
+        self.valores = np.asarray(valores, dtype=np.float64)
+        self.meta = meta if meta is not None else {}
+
+    @classmethod
+    def de_payload(cls, data):
+        """Converte um payload {'dates': [...], 'values': [...], ...}"""
+        dias = np.array(data.get('dates') or [], dtype='datetime64[D]').astype(np.int32)
+        # None vira NaN na conversão para float64
+        valores = np.array(data.get('values') or [], dtype=np.float64)
+        meta = {campo: valor for campo, valor in data.items() if campo not in _CAMPOS_DADOS}
+        return cls(dias, valores, meta)
+
+    @classmethod
+    def de_pandas(cls, serie, meta=None):
+        """Converte uma pd.Series indexada por data"""
+        dias = pd.DatetimeIndex(serie.index).to_numpy(dtype='datetime64[D]').astype(np.int32)
+        return cls(dias, serie.to_numpy(dtype=np.float64), meta)
+
+    def __len__(self):
+        return len(self.dias)
+
+    def __repr__(self):
+        return f"Serie({len(self)} pontos, {self.meta.get('label')!r})"
+
+    @property
+    def nbytes(self):
+        """Memória ocupada pelos arrays (usada no limite do cache)"""
+        return self.dias.nbytes + self.valores.nbytes
+
+    @property
+    def datas(self):
+        return self.dias.astype('datetime64[D]')
+
+    def com(self, dias, valores, **meta):
+        """Nova série com outros arrays e os metadados desta atualizados por meta"""
+        return Serie(dias, valores, {**self.meta, **meta})
+
+    def fatiar(self, inicio=None, fim=None):
+        """
+        Recorte [inicio, fim] (limites inclusivos, em dias desde a época).
+
+        Busca binária nas datas; os arrays do resultado são views destes.
+        """
+        i = 0 if inicio is None else int(np.searchsorted(self.dias, inicio, side='left'))
+        j = len(self.dias) if fim is None else int(np.searchsorted(self.dias, fim, side='right'))
+        return Serie(self.dias[i:j], self.valores[i:j], self.meta)
+
+    def sem_nulos(self):
+        validos = ~np.isnan(self.valores)
+        if validos.all():
+            return self
+        return Serie(self.dias[validos], self.valores[validos], self.meta)
+
+    def recortar(self, intervalo):
+        """
+        Aplica um Intervalo em memória, com a mesma semântica do SQL
+        (Intervalo.condicoes), supondo que esta série contém todos os
+        registros da tabela a partir da sua primeira data.
+
+        Returns:
+            Serie | None: None se o intervalo começa antes da primeira data
+                desta série (ou não tem início), e precisa ir ao banco
+        """
+        if not len(self):
+            return None
+
+        inicio = dia_epoca(intervalo.inicio) if intervalo.inicio is not None else None
+        fim = dia_epoca(intervalo.fim) if intervalo.fim is not None else None
+        if intervalo.janela is not None:
+            quantidade, unidade = int(intervalo.janela[:-1]), intervalo.janela[-1]
+            ancora = pd.Timestamp(intervalo.fim if intervalo.fim is not None else self.datas[-1])
+            # Meses como no Postgres: 31/03 - 1 mês = 29/02
+            deslocamento = pd.DateOffset(months=quantidade) if unidade == 'm' else pd.DateOffset(days=quantidade)
+            inicio_janela = dia_epoca((ancora - deslocamento).date())
+            inicio = inicio_janela if inicio is None else max(inicio, inicio_janela)
+
+        if inicio is None or inicio < self.dias[0]:
+            return None
+        return self.fatiar(inicio, fim)
+
+    def como_pandas(self):
+        """pd.Series indexada por data (os valores não são copiados)"""
+        return pd.Series(self.valores, index=pd.DatetimeIndex(self.datas), copy=False)
+
+    def para_payload(self):
+        """Payload {'dates': ['AAAA-MM-DD', ...], 'values': [...], **meta} (NaN -> None)"""
+        valores = self.valores.astype(object)
+        valores[np.isnan(self.valores)] = None
+        return {
+            **self.meta,
+            'dates': np.datetime_as_string(self.datas, unit='D').tolist(),
+            'values': valores.tolist(),
+        }
@@ -72,6 +72,61 @@ function formatChartLabels(dates, formatType = 'trimester') {
 
 
 
+// Endpoints individuais -> ids do endpoint em lote /api/series
+const SERIES_ENDPOINTS = {
+    '/api/pib_db': 'pib_br',
+    '/api/pib_pb': 'pib_pb',
+    '/api/desocupacao': 'desocupacao',
+    '/api/desocupacao_pb': 'desocupacao_pb',
+    '/api/ipca': 'ipca',
+    '/api/selic': 'selic',
+    '/api/cambio': 'cambio',
+    '/api/bcpb': 'bcpb',
+    '/api/divpub': 'divliq'
+};
+
+// Promessa com o lote de séries pré-carregado pelo painel (ou null)
+let seriesPreCarregadas = null;
+
+// Busca todas as séries do painel em uma única requisição
+function preloadSeries(ids) {
+    console.log(`📦 Pré-carregando séries: ${ids.join(', ')}`);
+
+    seriesPreCarregadas = fetch(`/api/series?ids=${ids.join(',')}`)
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`Erro na requisição: ${response.status}`);
+            }
+            return response.json();
+        })
+        .catch(error => {
+            // Sem o lote, cada gráfico volta a buscar o seu endpoint
+            console.error('❌ Erro ao pré-carregar séries:', error);
+            return {};
+        });
+
+    return seriesPreCarregadas;
+}
+
+// Substitui fetch(endpoint) nos gráficos: usa o lote pré-carregado quando
+// a série está nele e recorre ao endpoint individual caso contrário
+function fetchSerie(endpoint) {
+    const serie = SERIES_ENDPOINTS[endpoint];
+    if (!seriesPreCarregadas || !serie) {
+        return fetch(endpoint);
+    }
+
+    return seriesPreCarregadas.then(lote => {
+        const data = lote[serie];
+        if (!data || data.error) {
+            return fetch(endpoint);
+        }
+        return { ok: true, status: 200, json: () => Promise.resolve(data) };
+    });
+}
+
+
+
 // Função compartilhada para buscar dados do PIB e montar o gráfico full
 function fetchPIBData() {
     console.log('🚀 Iniciando fetchPIBData()');
@@ -86,7 +141,7 @@ function fetchPIBData() {
 
     console.log('✅ Elemento do canvas encontrado:', ctx);
 
-    fetch('/api/pib_db')
+    fetchSerie('/api/pib_db')
         .then(response => {
             console.log('✅ Resposta recebida da API de PIB');
             if (!response.ok) {
@@ -263,7 +318,7 @@ function fetchPIBData() {
 function fetchPIBPBData(chartId = 'pibPBChartFull', endpoint = '/api/pib_pb') {
     console.log(`Iniciando busca de dados do PIB da Paraíba no endpoint: ${endpoint}`);
     
-    fetch(endpoint)
+    fetchSerie(endpoint)
         .then(response => {
             console.log('Resposta do PIB da Paraiba:', response);
             if (!response.ok) {
@@ -370,7 +425,7 @@ function fetchPIBPBData(chartId = 'pibPBChartFull', endpoint = '/api/pib_pb') {
         return;
     }
 
-    fetch(endpoint)
+    fetchSerie(endpoint)
         .then(response => {
             console.log('📡 Resposta recebida:', response);
             if (!response.ok) {
@@ -490,7 +545,7 @@ function fetchPIBPBData(chartId = 'pibPBChartFull', endpoint = '/api/pib_pb') {
 function fetchDesocupacaoPbData(chartId = 'desocupacaoPbChartFull', endpoint = '/api/desocupacao_pb', dynamicRange = true   ) {
     console.log(`Iniciando busca de dados de Desocupação da Paraíba no endpoint: ${endpoint}`);
     
-    fetch(endpoint)
+    fetchSerie(endpoint)
         .then(response => {
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
@@ -617,7 +672,7 @@ function fetchDesocupacaoPbData(chartId = 'desocupacaoPbChartFull', endpoint = '
 function fetchIpcaData(chartId = 'IpcaChartFull', endpoint = '/api/ipca', dynamicRange = true) {
     console.log(`Iniciando busca de dados do IPCA no endpoint: ${endpoint}`);
     
-    fetch(endpoint)
+    fetchSerie(endpoint)
         .then(response => {
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
@@ -729,7 +784,7 @@ function fetchSelicData(chartId = 'SelicChartFull', endpoint = '/api/selic', dyn
     console.log(`Iniciando busca de dados da SELIC no endpoint: ${endpoint}`);
 
 
-    fetch(endpoint)
+    fetchSerie(endpoint)
         .then(response => {
             console.log('Resposta para Selic:', response);
             if (!response.ok) {
@@ -856,7 +911,7 @@ function fetchSelicData(chartId = 'SelicChartFull', endpoint = '/api/selic', dyn
 function fetchCambioData(chartId = 'CambioChartFull', endpoint = '/api/cambio') {
     console.log(`Iniciando busca de dados do CAMBIO no endpoint: ${endpoint}`);
     
-    fetch(endpoint)
+    fetchSerie(endpoint)
         .then(response => {
             console.log('Resposta para o Cambio:', response);
             if (!response.ok) {
@@ -951,7 +1006,7 @@ function fetchCambioData(chartId = 'CambioChartFull', endpoint = '/api/cambio')
 function fetchBcpbData(chartId = 'BcpbChartFull', endpoint = '/api/bcpb') {
     console.log(`Iniciando busca de dados do BCPB no endpoint: ${endpoint}`);
     
-    fetch(endpoint)
+    fetchSerie(endpoint)
         .then(response => {
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
@@ -1082,7 +1137,7 @@ function fetchBcpbData(chartId = 'BcpbChartFull', endpoint = '/api/bcpb') {
 function fetchDivpubData(chartId = 'dividaPbChartFull', endpoint = '/api/divpub', dynamicRange = true) {
     console.log(`Iniciando busca de dados do DIVPUB no endpoint: ${endpoint}`);
     
-    fetch(endpoint)
+    fetchSerie(endpoint)
         .then(response => {
             console.log('Resposta para divpub:', response);
             if (!response.ok) {
@@ -0,0 +1,68 @@
+# app/utils/condicional.py
+"""
+Requisições condicionais (ETag / Last-Modified / 304) para as séries.
+
+Os validadores vêm do Payload da série (ver app/series/payload.py), que
+fica no cache. Assim um If-None-Match ou If-Modified-Since é respondido
+com 304 antes de qualquer acesso ao banco.
+"""
+import hashlib
+
+from flask import Response
+
+# O navegador guarda a resposta, mas sempre revalida antes de reutilizar
+CACHE_CONTROL = 'public, no-cache'
+
+
+def combinar_validadores(validadores):
+    """Validadores de uma resposta com várias séries (endpoint em lote)"""
+    etags = ','.join(v['etag'] for v in validadores)
+    datas = [v['last_modified'] for v in validadores]
+    return {
+        'etag': 'lote-' + hashlib.blake2b(etags.encode('utf-8'), digest_size=8).hexdigest(),
+        # Uma série sem Last-Modified pode mudar sem que a data do lote mude
+        'last_modified': max(datas) if datas and None not in datas else None,
+    }
+
+
+def nao_modificado(request, validadores):
+    """
+    Verifica se o cliente já tem a versão atual.
+
+    If-None-Match tem precedência; If-Modified-Since só é considerado
+    quando o cliente não envia ETag (RFC 9110).
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(validadores['etag'])
+    if request.if_modified_since and validadores['last_modified'] is not None:
+        return validadores['last_modified'] <= request.if_modified_since
+    return False
+
+
+def aplicar_validadores(response, validadores):
+    """
+    Adiciona ETag, Last-Modified e Cache-Control à resposta.
+
+    O ETag é fraco: a mesma versão é servida com ou sem gzip.
+    """
+    response.set_etag(validadores['etag'], weak=True)
+    if validadores['last_modified'] is not None:
+        response.last_modified = validadores['last_modified']
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    return response
+
+
+def resposta_nao_modificada(validadores):
+    """Resposta 304 sem corpo"""
+    return aplicar_validadores(Response(status=304), validadores)
+
+
+def marcar_degradado(response, idade):
+    """
+    Resposta do modo degradado (versão antiga servida com o banco fora):
+    sem validadores, com Age e sem ser guardada, para que o cliente busque
+    a versão atual quando o banco voltar.
+    """
+    response.headers['Age'] = str(idade)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
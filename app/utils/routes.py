@@ -1,17 +1,113 @@
-from flask import render_template, jsonify
+from flask import render_template, jsonify, request, Response
+import json
 import logging
-from app.data_apis.bcb import get_selic_data
-from app.data_apis.conect_post.conect_post import get_pib_data_from_db
-from app.data_apis.conect_post.condect_post_desocupacao import get_desocupacao_data_from_db
-from app.data_apis.conect_post.conect_post_ipca import get_ipca_data_from_db
-from app.data_apis.conect_post.conect_post_selic import get_selic_data_from_db
-from app.data_apis.conect_post.conect_post_cambio import get_cambio_data_from_db
-from app.data_apis.conect_post.conect_post_pib_pb import get_pib_pb_data_from_db
-from app.data_apis.conect_post.conect_post_sbcpb import get_bcpb_data_from_db
-from app.data_apis.conect_post.conect_post_desocupacao_pb import get_desocupacao_pb_data_from_db
-from app.data_apis.conect_post.conect_post_divliq_pb import get_divliq_data_from_db
+from app.cache import cache_series
+from app.data_apis.conect_post.leitura import Intervalo
+from app.series.alinhamento import normalizar_alinhamento
+from app.series.armazem import armazem_series
+from app.series.lttb import MIN_PONTOS
+from app.series.reamostragem import normalizar_reamostragem
+from app.series.registro import SERIES, chave_cache, obter_config, obter_payload, carregar_series, obter_alinhamento, obter_expressao
+from app.utils.condicional import (
+    combinar_validadores, nao_modificado, aplicar_validadores, resposta_nao_modificada, marcar_degradado
+)
 
 
+def _payload_erro(config, erro):
+    return {
+        'error': erro,
+        'dates': [],
+        'values': [],
+        'label': config['label'],
+        'unit': config['unit']
+    }
+
+
+def _intervalo_da_requisicao():
+    """Intervalo pedido via ?start=AAAA-MM-DD&end=AAAA-MM-DD&window=1y (ValueError se inválido)"""
+    return Intervalo.normalizar(
+        request.args.get('start'), request.args.get('end'), request.args.get('window')
+    )
+
+
+def _max_pontos_da_requisicao():
+    """?max_points=N (inteiro >= 3) ou None; ValueError se inválido"""
+    valor = request.args.get('max_points')
+    if not valor:
+        return None
+    try:
+        max_pontos = int(valor)
+    except ValueError:
+        raise ValueError(f"max_points inválido: {valor}")
+    if max_pontos < MIN_PONTOS:
+        raise ValueError(f"max_points deve ser >= {MIN_PONTOS}")
+    return max_pontos
+
+
+def _resposta_payload(payload):
+    """Envia os bytes já serializados do payload (em gzip se o cliente aceitar)"""
+    if request.accept_encodings['gzip']:
+        response = Response(payload.corpo_gzip, mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(payload.corpo, mimetype='application/json')
+    response.vary.add('Accept-Encoding')
+    if payload.degradado:
+        return marcar_degradado(response, payload.idade)
+    return aplicar_validadores(response, payload.validadores)
+
+
+def _responder_serie(serie):
+    """
+    Responde com os dados de uma série, servidos do cache quando possível.
+
+    O banco só é consultado em um miss (primeiro acesso, TTL expirado ou
+    invalidação feita pelo ETL após gravar novos dados), e mesmo assim é
+    uma leitura do payload materializado, feita uma única vez mesmo com
+    várias requisições simultâneas (as demais esperam o resultado). Depois
+    do TTL a versão anterior continua sendo servida enquanto uma única
+    recarga roda em segundo plano. Se o cliente já tem a versão
+    atual (If-None-Match / If-Modified-Since), responde 304 sem corpo;
+    quando a entrada em cache ainda é válida, a comparação é feita com
+    ela, sem carregar nem transformar a série.
+
+    Com o banco indisponível, a espera por conexão é curta e a resposta é
+    a última versão boa da série, com stale e age no JSON (modo degradado).
+
+    start, end e window (ex.: 1y, 5y, 36m, max) limitam o período no SQL;
+    freq (W, M, Q, Y) e agg (mean|last|sum|min|max) reamostram a série e
+    max_points a reduz com LTTB. Cada combinação normalizada tem sua
+    própria entrada no cache.
+    """
+    config = obter_config(serie)
+    try:
+        intervalo = _intervalo_da_requisicao()
+        reamostragem = normalizar_reamostragem(request.args.get('freq'), request.args.get('agg'))
+        max_pontos = _max_pontos_da_requisicao()
+    except ValueError as e:
+        return jsonify(_payload_erro(config, str(e))), 400
+
+    try:
+        payload = None
+        if request.if_none_match or request.if_modified_since:
+            payload = cache_series.get(chave_cache(serie, intervalo, reamostragem, max_pontos))
+            if payload is not None and nao_modificado(request, payload.validadores):
+                return resposta_nao_modificada(payload.validadores)
+
+        if payload is None:
+            payload = obter_payload(serie, intervalo, reamostragem, max_pontos)
+
+        if payload is None:
+            logging.error(f"Dados {config['nome']} retornaram None")
+            return jsonify(_payload_erro(config, f"Não foi possível obter os dados {config['nome']}")), 500
+
+        if not payload.degradado and nao_modificado(request, payload.validadores):
+            return resposta_nao_modificada(payload.validadores)
+
+        return _resposta_payload(payload)
+    except Exception as e:
+        logging.error(f"Erro ao buscar dados {config['nome']}: {e}", exc_info=True)
+        return jsonify(_payload_erro(config, str(e))), 500
 
 
 def init_routes(app):
@@ -41,276 +137,149 @@ def init_routes(app):
 
     @app.route('/api/pib_db')
     def pib_db_api():
-        try:
-            logging.info("Iniciando busca de dados do PIB")
-            
-            data = get_pib_data_from_db()
-            
-            if data is None:
-                logging.error("Dados do PIB retornaram None")
-                return jsonify({
-                    'error': 'Não foi possível obter os dados do PIB',
-                    'dates': [],
-                    'values': [],
-                    'label': 'PIB do Brasil',
-                    'unit': '%'
-                }), 500
-            
-            logging.info(f"Dados do PIB obtidos: {len(data.get('dates', []))} registros")
-            return jsonify(data)
-        except Exception as e:
-            logging.error(f"Erro ao buscar dados do PIB: {e}", exc_info=True)
-            return jsonify({
-                'error': str(e),
-                'dates': [],
-                'values': [],
-                'label': 'PIB do Brasil',
-                'unit': '%'
-            }), 500
+        return _responder_serie('pib_br')
 
     @app.route('/api/pib_pb')
     def pib_pb_api():
-        try:
-            logging.info("Iniciando busca de dados do PIB da Paraiba")
-            
-            data = get_pib_pb_data_from_db()
-            
-            if data is None:
-                logging.error("Dados do PIB da Paraíba retornaram None")
-                return jsonify({
-                    'error': 'Não foi possível obter os dados do PIB da Paraíba',
-                    'dates': [],
-                    'values': [],
-                    'label': 'PIB da Paraíba',
-                    'unit': 'Milhões de Reais'
-                }), 500
-            
-            logging.info(f"Dados do PIB da Paraíba obtidos: {len(data.get('dates', []))} registros")
-            return jsonify(data)
-        except Exception as e:
-            logging.error(f"Erro ao buscar dados do PIB da Paraíba: {e}", exc_info=True)
-            return jsonify({
-                'error': str(e),
-                'dates': [],
-                'values': [],
-                'label': 'PIB da Paraíba',
-                'unit': 'Milhores de Reais%'
-            }), 500
-
+        return _responder_serie('pib_pb')
 
     @app.route('/api/desocupacao')
     def desocupacao_api():
-        try:
-            logging.info("Iniciando busca de dados da Desocupação")
-            
-            data = get_desocupacao_data_from_db()
-            
-            if data is None:
-                logging.error("Dados da Desocupação retornaram None")
-                return jsonify({
-                    'error': 'Não foi possível obter os dados da Desocupação',
-                    'dates': [],
-                    'values': [],
-                    'label': 'Taxa de Desocupação',
-                    'unit': '%'
-                }), 500
-            
-            logging.info(f"Dados da Desocupação obtidos: {len(data.get('dates', []))} registros")
-            logging.info(f"Primeiras 5 datas: {data['dates'][:5]}")
-            logging.info(f"Primeiros 5 valores: {data['values'][:5]}")
-            
-            return jsonify(data)
-        except Exception as e:
-            logging.error(f"Erro ao buscar dados da Desocupação: {e}", exc_info=True)
-            return jsonify({
-                'error': str(e),
-                'dates': [],
-                'values': [],
-                'label': 'Taxa de Desocupação',
-                'unit': '%'
-            }), 500
-
-
+        return _responder_serie('desocupacao')
 
     @app.route('/api/desocupacao_pb')
     def desocupacao_pb_api():
-            try:
-                logging.info("Iniciando busca de dados da Desocupação PB")
-                
-                data = get_desocupacao_pb_data_from_db()
-                
-                if data is None:
-                    logging.error("Dados da Desocupação da Paraíba retornaram None")
-                    return jsonify({
-                        'error': 'Não foi possível obter os dados da Desocupação da Paraíba',
-                        'dates': [],
-                        'values': [],
-                        'label': 'Taxa de Desocupação da Paraíba',
-                        'unit': '%'
-                    }), 500
-                
-                logging.info(f"Dados da Desocupação da Paraíba obtidos: {len(data.get('dates', []))} registros")
-                logging.info(f"Primeiras 5 datas: {data['dates'][:5]}")
-                logging.info(f"Primeiros 5 valores: {data['values'][:5]}")
-                
-                return jsonify(data)
-            except Exception as e:
-                logging.error(f"Erro ao buscar dados da Desocupação da Paraíba: {e}", exc_info=True)
-                return jsonify({
-                    'error': str(e),
-                    'dates': [],
-                    'values': [],
-                    'label': 'Taxa de Desocupação da Paraíba',
-                    'unit': '%'
-                }), 500    
-
+        return _responder_serie('desocupacao_pb')
 
     @app.route('/api/ipca')
     def ipca_pb():
-        try:
-            logging.info("Iniciando busca de dados do IPCA")
-            
-            data = get_ipca_data_from_db()
-            
-            if data is None:
-                logging.error("Dados do IPCA retornaram None")
-                return jsonify({
-                    'error': 'Não foi possível obter os dados do IPCA',
-                    'dates': [],
-                    'values': [],
-                    'label': 'IPCA do Brasil',
-                    'unit': '%'
-                }), 500
-            
-            logging.info(f"Dados do IPCA obtidos: {len(data.get('dates', []))} registros")
-            return jsonify(data)
-        except Exception as e:
-            logging.error(f"Erro ao buscar dados do IPCA: {e}", exc_info=True)
-            return jsonify({
-                'error': str(e),
-                'dates': [],
-                'values': [],
-                'label': 'IPCA do Brasil',
-                'unit': '%'
-            }), 500
+        return _responder_serie('ipca')
 
     @app.route('/api/selic')
     def selic_api():
-        try:
-            logging.info("Iniciando busca de dados da SELIC")
-            
-            data = get_selic_data_from_db()
-            
-            if data is None:
-                logging.error("Dados da SELIC retornaram None")
-                return jsonify({
-                    'error': 'Não foi possível obter os dados da SELIC',
-                    'dates': [],
-                    'values': [],
-                    'label': 'SELIC',
-                    'unit': '%'
-                }), 500
-            
-            logging.info(f"Dados da SELIC obtidos: {len(data.get('dates', []))} registros")
-            return jsonify(data)
-        except Exception as e:
-            logging.error(f"Erro ao buscar dados da SELIC: {e}", exc_info=True)
-            return jsonify({
-                'error': str(e),
-                'dates': [],
-                'values': [],
-                'label': 'SELIC',
-                'unit': '%'
-            }), 500        
-
+        return _responder_serie('selic')
 
     @app.route('/api/cambio')
     def cambio_api():
-        try:
-            logging.info("Iniciando busca de dados do CAMBIO")
-            
-            data = get_cambio_data_from_db()
-            
-            if data is None:
-                logging.error("Dados do Cambio retornaram None")
-                return jsonify({
-                    'error': 'Não foi possível obter os dados da CAMBIO',
-                    'dates': [],
-                    'values': [],
-                    'label': 'CAMBIO',
-                    'unit': 'U$/R$'
-                }), 500
-            
-            logging.info(f"Dados do Cambio obtidos: {len(data.get('dates', []))} registros")
-            return jsonify(data)
-        except Exception as e:
-            logging.error(f"Erro ao buscar dados do Cambio: {e}", exc_info=True)
-            return jsonify({
-                'error': str(e),
-                'dates': [],
-                'values': [],
-                'label': 'CAMBIO',
-                'unit': 'U$/R$'
-            }), 500
-
+        return _responder_serie('cambio')
 
 # Rota para o BCPB
     @app.route('/api/bcpb')
     def bcpb_api():
-        try:
-            logging.info("Iniciando busca de dados do BCPB")
-            
-            data = get_bcpb_data_from_db()
-            
-            if data is None:
-                logging.error("Dados do BCPB retornaram None")
-                return jsonify({
-                    'error': 'Não foi possível obter os dados do BCPB',
-                    'dates': [],
-                    'values': [],
-                    'label': 'BCPB do Brasil',
-                    'unit': ''
-                }), 500
-            
-            logging.info(f"Dados do bcpb obtidos: {len(data.get('dates', []))} registros")
-            return jsonify(data)
-        except Exception as e:
-            logging.error(f"Erro ao buscar dados do bcpb: {e}", exc_info=True)
-            return jsonify({
-                'error': str(e),
-                'dates': [],
-                'values': [],
-                'label': 'BCPB do Brasil',
-                'unit': ''
-            }), 500
-
+        return _responder_serie('bcpb')
 
 # Rota para o Dívida Pública DIVPUB
     @app.route('/api/divpub')
     def divpub_api():
+        return _responder_serie('divliq')
+
+# Várias séries em uma única requisição: /api/series?ids=pib_br,ipca,selic&window=5y
+    @app.route('/api/series')
+    def series_api():
+        parametro = request.args.get('ids', '')
+        ids = list(dict.fromkeys(i.strip() for i in parametro.split(',') if i.strip())) or list(SERIES)
+
+        desconhecidas = [serie for serie in ids if serie not in SERIES]
+        if desconhecidas:
+            return jsonify({
+                'error': f"Séries desconhecidas: {', '.join(desconhecidas)}",
+                'disponiveis': list(SERIES)
+            }), 400
+
+        try:
+            intervalo = _intervalo_da_requisicao()
+            reamostragem = normalizar_reamostragem(request.args.get('freq'), request.args.get('agg'))
+            max_pontos = _max_pontos_da_requisicao()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
         try:
-            logging.info("Iniciando busca de dados do DIVPUB")
-            
-            data = get_divliq_data_from_db()
-            
-            if data is None:
-                logging.error("Dados do DIVPUB retornaram None")
-                return jsonify({
-                    'error': 'Não foi possível obter os dados do DIVPUB',
-                    'dates': [],
-                    'values': [],
-                    'label': 'Dívida Pública do Governo do Estado da Paraíba',
-                    'unit': ''
-                }), 500
-            
-            logging.info(f"Dados do DIVPUB obtidos: {len(data.get('dates', []))} registros")
-            return jsonify(data)
+            payloads = carregar_series(ids, intervalo, reamostragem, max_pontos)
         except Exception as e:
-            logging.error(f"Erro ao buscar dados do DIVPUB: {e}", exc_info=True)
+            logging.error(f"Erro ao buscar lote de séries {ids}: {e}", exc_info=True)
+            return jsonify({serie: _payload_erro(SERIES[serie], str(e)) for serie in ids}), 500
+
+        # Monta o JSON do lote juntando os corpos já serializados
+        partes = []
+        for serie in ids:
+            payload = payloads[serie]
+            if payload is None:
+                corpo = json.dumps(_payload_erro(
+                    SERIES[serie], f"Não foi possível obter os dados {SERIES[serie]['nome']}"
+                )).encode('utf-8')
+            else:
+                corpo = payload.corpo
+            partes.append(json.dumps(serie).encode('utf-8') + b':' + corpo)
+        response = Response(b'{' + b','.join(partes) + b'}', mimetype='application/json')
+
+        if any(payloads[serie] is None for serie in ids):
+            # Resposta parcial: sem validadores, para não ser reaproveitada
+            return response
+
+        idades = [payloads[serie].idade for serie in ids if payloads[serie].degradado]
+        if idades:
+            return marcar_degradado(response, max(idades))
+
+        combinados = combinar_validadores([payloads[serie].validadores for serie in ids])
+        if nao_modificado(request, combinados):
+            return resposta_nao_modificada(combinados)
+        return aplicar_validadores(response, combinados)
+
+# Séries alinhadas em datas comuns: /api/comparar?ids=desocupacao,desocupacao_pb&mode=inner&rebase=2020
+    @app.route('/api/comparar')
+    def comparar_api():
+        parametro = request.args.get('ids', '')
+        ids = list(dict.fromkeys(i.strip() for i in parametro.split(',') if i.strip()))
+        if len(ids) < 2:
+            return jsonify({'error': "Informe ao menos duas séries em ids", 'disponiveis': list(SERIES)}), 400
+
+        desconhecidas = [serie for serie in ids if serie not in SERIES]
+        if desconhecidas:
             return jsonify({
-                'error': str(e),
-                'dates': [],
-                'values': [],
-                'label': 'Dívida Pública do Governo do Estado da Paraíba',
-                'unit': ''
-            }), 500            
\ No newline at end of file
+                'error': f"Séries desconhecidas: {', '.join(desconhecidas)}",
+                'disponiveis': list(SERIES)
+            }), 400
+
+        try:
+            modo, base = normalizar_alinhamento(request.args.get('mode'), request.args.get('rebase'))
+            intervalo = _intervalo_da_requisicao()
+            reamostragem = normalizar_reamostragem(request.args.get('freq'), request.args.get('agg'))
+            payload = obter_alinhamento(ids, modo, base, intervalo, reamostragem)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            logging.error(f"Erro ao alinhar séries {ids}: {e}", exc_info=True)
+            return jsonify({'error': str(e)}), 500
+
+        if payload is None:
+            return jsonify({'error': f"Não foi possível obter as séries {', '.join(ids)}"}), 500
+
+        if nao_modificado(request, payload.validadores):
+            return resposta_nao_modificada(payload.validadores)
+        return _resposta_payload(payload)
+
+# Expressão sobre as séries: /api/expr?q=selic - ipca_12m, q=rolling(diff(cambio), 21)
+    @app.route('/api/expr')
+    def expr_api():
+        texto = request.args.get('q', '')
+        try:
+            intervalo = _intervalo_da_requisicao()
+            reamostragem = normalizar_reamostragem(request.args.get('freq'), request.args.get('agg'))
+            payload = obter_expressao(texto, intervalo, reamostragem)
+        except ValueError as e:
+            return jsonify({'error': str(e), 'expr': texto, 'disponiveis': list(SERIES)}), 400
+        except Exception as e:
+            logging.error(f"Erro ao avaliar a expressão {texto!r}: {e}", exc_info=True)
+            return jsonify({'error': str(e), 'expr': texto}), 500
+
+        if payload is None:
+            return jsonify({'error': f"Não foi possível obter as séries da expressão {texto}", 'expr': texto}), 500
+
+        if nao_modificado(request, payload.validadores):
+            return resposta_nao_modificada(payload.validadores)
+        return _resposta_payload(payload)
+
+# Estatísticas do cache das séries (hits, misses, bytes em uso)
+    @app.route('/api/cache')
+    def cache_api():
+        return jsonify({**cache_series.estatisticas(), 'armazem': armazem_series.estatisticas()})
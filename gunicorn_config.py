@@ -1,5 +1,8 @@
 # gunicorn_config.py
 import multiprocessing
+import os
+import subprocess
+import sys
 
 # Número de workers (geralmente 2-4 * número de núcleos de CPU)
 workers = multiprocessing.cpu_count() * 2
@@ -7,6 +10,15 @@ workers = multiprocessing.cpu_count() * 2
 # Tipo de worker (gevent para I/O bound, sync para CPU bound)
 worker_class = 'gevent'
 
+# Requisições simultâneas (greenlets) por worker gevent. O psycopg2 roda em
+# modo cooperativo (app/data_apis/conect_post/database.py) e o pool de
+# leitura de cada worker é dimensionado a partir destes valores
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 100))
+raw_env = [
+    f"WEB_WORKERS={workers}",
+    f"WEB_WORKER_CONNECTIONS={worker_connections}",
+]
+
 # Porta para bind
 bind = "0.0.0.0:8000"
 
@@ -19,4 +31,38 @@ max_requests = 1000
 # Logging
 accesslog = '-'  # stdout
 errorlog = '-'   # stderr
-loglevel = 'info'
\ No newline at end of file
+loglevel = 'info'
+
+# Tempo máximo (segundos) para publicar o armazém de séries ao iniciar
+PRAZO_ARMAZEM = float(os.getenv('GUNICORN_PRAZO_ARMAZEM', 20))
+
+
+
+def on_starting(server):
+    """
+    Publica o armazém compartilhado de séries (app.series.armazem) antes de
+    criar os workers, para que todos comecem com as séries já em memória.
+
+    Roda em um processo separado: o master não importa a aplicação nem abre
+    conexões com o banco que seriam herdadas pelos workers. É opcional: se
+    o banco estiver fora ou lento, o gunicorn sobe mesmo assim e os workers
+    leem as séries do banco.
+    """
+    comando = [sys.executable, '-m', 'app.etl_worker', 'armazem']
+    try:
+        subprocess.run(comando, check=True, timeout=PRAZO_ARMAZEM)
+    except subprocess.TimeoutExpired:
+        server.log.warning(f"Armazém de séries não publicado em {PRAZO_ARMAZEM}s; seguindo sem ele")
+    except subprocess.CalledProcessError as e:
+        server.log.warning(f"Armazém de séries não publicado (código {e.returncode}); seguindo sem ele")
+    except Exception as e:
+        server.log.error(f"Erro ao publicar o armazém de séries: {e}")
+
+
+def post_worker_init(worker):
+    """
+    Inicia o ouvinte de NOTIFY (invalidação do cache entre processos) em
+    cada worker, depois do monkey patching do gevent.
+    """
+    from app.data_apis.conect_post.notificacoes import iniciar_ouvinte
+    iniciar_ouvinte()
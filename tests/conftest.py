@@ -0,0 +1,71 @@
+# tests/conftest.py
+"""
+Configuração comum dos testes.
+
+O banco é um SQLite temporário (os upserts com ON CONFLICT do dialeto
+postgresql também compilam nele) e o armazém de séries fica em um
+diretório temporário; as variáveis são definidas antes de importar o app.
+"""
+import os
+import tempfile
+
+_DIRETORIO = tempfile.mkdtemp(prefix='indicadores-testes-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_DIRETORIO, 'testes.db')}"
+os.environ['SERIES_ARMAZEM'] = os.path.join(_DIRETORIO, 'armazem.bin')
+os.environ['SERIES_ARMAZEM_VERIFICACAO'] = '0'
+
+import pytest
+
+from app import cache
+from app.cache import cache_series
+from app.data_apis.conect_post.conect_post_payloads import PayloadSerieModel
+from app.data_apis.conect_post.database import Session
+from app.data_apis.conect_post.notificacoes import enviar_notificacao
+from app.series import registro
+from app.series.armazem import armazem_series
+
+
+def dados_serie(valores, inicio='2020-01-01', label='Série de teste'):
+    """Dicionário no formato devolvido por get_*_data_from_db (uma data por mês)"""
+    import pandas as pd
+    datas = pd.date_range(inicio, periods=len(valores), freq='MS')
+    return {
+        'dates': [d.strftime('%Y-%m-%d') for d in datas],
+        'values': [float(v) for v in valores],
+        'label': label,
+        'unit': '%',
+    }
+
+
+@pytest.fixture
+def banco(monkeypatch):
+    """payloads_series vazia; as leituras da API usam o mesmo SQLite"""
+    session = Session()
+    session.query(PayloadSerieModel).delete()
+    session.commit()
+    session.close()
+    # O engine de leitura passa opções do libpq que o SQLite não aceita
+    monkeypatch.setattr(registro, 'SessionLeitura', Session)
+    yield
+
+
+@pytest.fixture(autouse=True)
+def estado_limpo():
+    """Cache, reservas do modo degradado e armazém zerados a cada teste"""
+    # O import do app.etl_worker registra o NOTIFY do Postgres como hook
+    if enviar_notificacao in cache._hooks_atualizacao:
+        cache._hooks_atualizacao.remove(enviar_notificacao)
+
+    def limpar():
+        cache_series.invalidar(None)
+        registro._reservas.clear()
+        for caminho in (armazem_series.caminho, armazem_series.caminho + '.lock'):
+            if os.path.exists(caminho):
+                os.remove(caminho)
+        armazem_series._estado = (None, None, {})
+        armazem_series._identidade = None
+        armazem_series._verificado_em = float('-inf')
+
+    limpar()
+    yield
+    limpar()
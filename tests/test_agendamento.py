@@ -0,0 +1,132 @@
+import threading
+from contextlib import contextmanager
+
+import pytest
+
+from app import agendamento_atualizacao as agendamento
+from app.data_apis.conect_post import database
+from app.data_apis.conect_post.database import NAO_EXECUTADA, concluiu, executar_se_lider
+from app.executor_etl import SUCESSO
+
+
+@pytest.fixture
+def lock(monkeypatch):
+    """Controla se o advisory lock é obtido (sem banco)"""
+    estado = {'obtido': True}
+
+    @contextmanager
+    def lock_consultivo(nome):
+        yield estado['obtido']
+
+    monkeypatch.setattr(database, 'lock_consultivo', lock_consultivo)
+    return estado
+
+
+def test_concluiu():
+    assert concluiu(None)
+    assert concluiu(True)
+    assert not concluiu(False)
+    assert not concluiu(NAO_EXECUTADA)
+
+
+def test_executar_se_lider(lock):
+    chamadas = []
+    funcao = executar_se_lider('etl:teste')(lambda: chamadas.append(1) or 'ok')
+    assert funcao() == 'ok'
+    lock['obtido'] = False
+    assert funcao() is NAO_EXECUTADA
+    assert chamadas == [1]
+
+
+class _Agendador:
+    """BlockingScheduler sem laço: só registra os jobs"""
+
+    def __init__(self):
+        self.jobs = []
+
+    def add_job(self, funcao, *args, **kwargs):
+        self.jobs.append((funcao, kwargs))
+
+    def start(self):
+        pass
+
+
+def test_com_derivadas():
+    assert agendamento.com_derivadas(['pib_pb']) == ['pib_pb', 'pib_pb_yoy']
+    assert agendamento.com_derivadas(['ipca', 'selic']) == ['ipca', 'selic', 'ipca_12m', 'juro_real']
+
+
+def test_agendador_atualiza_todas_as_series_ao_iniciar(monkeypatch):
+    from app import etl_worker
+
+    rodadas = []
+    agendador = _Agendador()
+    monkeypatch.setattr(etl_worker, 'executar_etl', lambda series=None, parallel=4: rodadas.append(series) or {})
+    monkeypatch.setattr(agendamento, 'BlockingScheduler', lambda: agendador)
+
+    agendamento._executar_agendador(agendamento.logger)
+
+    # Rodada completa (todas as séries) ao iniciar
+    assert rodadas == [None]
+    # As séries sem job próprio são atualizadas pela rodada diária
+    agendadas = [kwargs['args'][0] for _, kwargs in agendador.jobs]
+    assert agendamento.com_derivadas(agendamento.SERIES_SIDRA) in agendadas
+    assert any('pib_pb_yoy' in series for series in agendadas)
+
+
+def test_todos_os_jobs_passam_pelo_executor(monkeypatch):
+    from app import etl_worker
+
+    agendador = _Agendador()
+    monkeypatch.setattr(etl_worker, 'executar_etl', lambda series=None, parallel=4: {})
+    monkeypatch.setattr(agendamento, 'BlockingScheduler', lambda: agendador)
+
+    agendamento._executar_agendador(agendamento.logger)
+
+    assert all(funcao is agendamento.executar_rodada for funcao, _ in agendador.jobs)
+    agendadas = {serie for _, kwargs in agendador.jobs for serie in kwargs['args'][0]}
+    assert agendadas == set(etl_worker.SERIES_ETL)
+
+
+def test_falha_da_rodada_nao_derruba_o_agendador(monkeypatch):
+    from app import etl_worker
+
+    def falhar(series=None, parallel=4):
+        raise RuntimeError('banco fora')
+    monkeypatch.setattr(etl_worker, 'executar_etl', falhar)
+
+    assert agendamento.executar_rodada(['ipca']) is None
+
+
+def test_series_do_bcb_sao_baixadas_ao_mesmo_tempo(monkeypatch):
+    from app import etl_worker
+
+    agendador = _Agendador()
+    monkeypatch.setattr(etl_worker, 'executar_etl', lambda series=None, parallel=4: {})
+    monkeypatch.setattr(agendamento, 'BlockingScheduler', lambda: agendador)
+    agendamento._executar_agendador(agendamento.logger)
+    monkeypatch.undo()
+
+    (funcao, job), = [(funcao, kwargs) for funcao, kwargs in agendador.jobs if kwargs['name'].endswith('BCB')]
+
+    # Cada série base só termina quando todas estão baixando ao mesmo tempo
+    barreira = threading.Barrier(len(agendamento.SERIES_BCB), timeout=5)
+
+    def baixar(backfill=False):
+        barreira.wait()
+        return True
+
+    @contextmanager
+    def lock(nome):
+        yield True
+
+    for serie in job['args'][0]:
+        eh_base = serie in agendamento.SERIES_BCB
+        monkeypatch.setitem(etl_worker.SERIES_ETL, serie, baixar if eh_base else (lambda backfill=False: True))
+    monkeypatch.setattr(etl_worker, 'lock_consultivo', lock)
+    monkeypatch.setattr(etl_worker, 'materializar_serie', lambda serie: None)
+
+    resultados = funcao(*job['args'], **job['kwargs'])
+
+    assert {resultado['status'] for resultado in resultados.values()} == {SUCESSO}
+    assert set(resultados) == set(agendamento.com_derivadas(agendamento.SERIES_BCB))
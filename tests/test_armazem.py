@@ -0,0 +1,88 @@
+import json
+
+import numpy as np
+
+from app.data_apis.conect_post.conect_post_payloads import gravar_payload
+from app.series import registro
+from app.series.armazem import armazem_series, atualizar_armazem, escrever_armazem, ler_armazem
+from app.series.materializacao import publicar_armazem
+from app.series.payload import Payload
+from app.series.serie import Serie
+
+from conftest import dados_serie
+
+
+def _serie(valores, **meta):
+    return Serie(np.arange(len(valores), dtype=np.int32) * 30, np.asarray(valores, dtype=float), meta)
+
+
+def test_ida_e_volta(tmp_path):
+    caminho = str(tmp_path / 'armazem.bin')
+    serie = _serie([1.5, np.nan, 3.0], label='IPCA', unit='%')
+    escrever_armazem({'ipca': (serie, 'ipca-v1'), 'selic': (_serie([10.0]), 'selic-v1')}, caminho)
+
+    lidas = ler_armazem(caminho)
+    assert set(lidas) == {'ipca', 'selic'}
+    valores, etag = lidas['ipca']
+    assert etag == 'ipca-v1'
+    np.testing.assert_array_equal(valores.dias, serie.dias)
+    np.testing.assert_array_equal(valores.valores, serie.valores)
+    assert valores.meta == {'label': 'IPCA', 'unit': '%'}
+
+
+def test_arquivo_ausente_ou_invalido(tmp_path):
+    assert ler_armazem(str(tmp_path / 'nao_existe.bin')) == {}
+    invalido = tmp_path / 'invalido.bin'
+    invalido.write_bytes(b'\0' * 64)
+    assert ler_armazem(str(invalido)) == {}
+
+
+def test_atualizar_so_grava_quando_a_versao_muda(tmp_path):
+    caminho = str(tmp_path / 'armazem.bin')
+    assert atualizar_armazem({'ipca': (_serie([1.0]), 'v1')}, caminho=caminho)
+    assert not atualizar_armazem({'ipca': (_serie([1.0]), 'v1')}, caminho=caminho)
+    assert atualizar_armazem({'selic': (_serie([2.0]), 'v1')}, caminho=caminho)
+    assert set(ler_armazem(caminho)) == {'ipca', 'selic'}
+    assert atualizar_armazem({}, removidas=['ipca'], caminho=caminho)
+    assert set(ler_armazem(caminho)) == {'selic'}
+
+
+def test_leitor_percebe_nova_geracao():
+    atualizar_armazem({'ipca': (_serie([1.0, 2.0]), 'v1')})
+    antiga = armazem_series.obter('ipca')
+    assert armazem_series.obter('ipca', 'v2') is None
+
+    atualizar_armazem({'ipca': (_serie([1.0, 2.0, 3.0]), 'v2')})
+    assert len(armazem_series.obter('ipca', 'v2')) == 3
+    # Views do mapeamento anterior continuam válidas
+    assert antiga.valores.tolist() == [1.0, 2.0]
+
+
+def test_armazem_em_dia_evita_ler_o_corpo(banco, monkeypatch):
+    gravar_payload(Payload.renderizar('ipca', dados_serie([1, 2, 3])))
+    assert publicar_armazem() == 1
+
+    def proibido(*args, **kwargs):
+        raise AssertionError("o corpo não deveria ser lido do banco")
+
+    monkeypatch.setattr(registro, 'ler_payloads', proibido)
+    payload = registro.obter_payload('ipca')
+    assert json.loads(payload.corpo)['values'] == [1.0, 2.0, 3.0]
+
+
+def test_armazem_atrasado_nao_e_servido(banco):
+    """ETL em outra máquina: o banco tem uma versão que o armazém local não tem"""
+    gravar_payload(Payload.renderizar('ipca', dados_serie([1, 2, 3])))
+    publicar_armazem()
+
+    nova = Payload.renderizar('ipca', dados_serie([1, 2, 3, 4]))
+    gravar_payload(nova)
+
+    payload = registro.obter_payload('ipca')
+    assert payload.etag == nova.etag
+    assert json.loads(payload.corpo)['values'] == [1.0, 2.0, 3.0, 4.0]
+    # O worker republica a versão lida para os demais da máquina
+    assert armazem_series.obter('ipca', nova.etag) is not None
+
+    lote = registro.carregar_series(['ipca'])
+    assert lote['ipca'].etag == nova.etag
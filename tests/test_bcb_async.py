@@ -0,0 +1,41 @@
+from datetime import date
+
+import pandas as pd
+
+from app.data_apis import bcb_async
+from app.data_apis.bcb_async import buscar_serie_sgs, dataframe_sgs, janelas_sgs
+
+
+def test_janelas_de_dez_anos():
+    janelas = janelas_sgs('2000-01-01', '2024-06-30')
+    assert janelas == [
+        (date(2000, 1, 1), date(2009, 12, 31)),
+        (date(2010, 1, 1), date(2019, 12, 31)),
+        (date(2020, 1, 1), date(2024, 6, 30)),
+    ]
+    assert janelas_sgs(None, '2024-06-30') == [(None, date(2024, 6, 30))]
+
+
+def test_dataframe_sgs():
+    df = dataframe_sgs([
+        {'data': '02/01/2020', 'valor': '2,5'},
+        {'data': '01/01/2020', 'valor': '1.5'},
+        {'data': '02/01/2020', 'valor': '3'},
+        {'data': 'inválida', 'valor': '1'},
+    ])
+    assert df['data'].tolist() == [pd.Timestamp('2020-01-01'), pd.Timestamp('2020-01-02')]
+    assert df['valor'].tolist() == [1.5, 3.0]
+    assert dataframe_sgs([]).empty
+
+
+def test_buscar_serie_junta_as_janelas(monkeypatch):
+    pedidas = []
+
+    def baixar(codigo, inicio, fim):
+        pedidas.append((inicio, fim))
+        return [{'data': inicio.strftime('%d/%m/%Y'), 'valor': str(inicio.year)}]
+
+    monkeypatch.setattr(bcb_async, '_baixar_janela', baixar)
+    df = buscar_serie_sgs(433, '2000-01-01', '2024-06-30')
+    assert len(pedidas) == 3
+    assert df['valor'].tolist() == [2000.0, 2010.0, 2020.0]
@@ -0,0 +1,72 @@
+import time
+
+import pytest
+
+from app.cache import CacheSeries, tamanho_serializado
+
+
+def test_tamanho_serializado():
+    assert tamanho_serializado(b'abc') == 3
+    assert tamanho_serializado({'a': 'ç'}) == len('{"a": "ç"}'.encode('utf-8'))
+
+
+def test_descarta_as_menos_usadas_ao_passar_do_limite():
+    cache = CacheSeries(max_bytes=10, stale=0)
+    cache.set(('a',), b'1234')
+    cache.set(('b',), b'1234')
+    assert cache.get(('a',)) == b'1234'  # 'a' passa a ser a mais recente
+    cache.set(('c',), b'1234')
+
+    assert cache.get(('b',)) is None
+    assert cache.get(('a',)) == b'1234'
+    assert cache.get(('c',)) == b'1234'
+    estatisticas = cache.estatisticas()
+    assert estatisticas['bytes'] == 8
+    assert estatisticas['descartes'] == 1
+
+
+def test_valor_maior_que_o_limite_nao_e_guardado():
+    cache = CacheSeries(max_bytes=4)
+    cache.set(('a',), b'12345')
+    assert cache.get(('a',)) is None
+    assert cache.estatisticas()['bytes'] == 0
+
+
+def test_substituir_entrada_atualiza_bytes():
+    cache = CacheSeries(max_bytes=100)
+    cache.set(('a',), b'1234')
+    cache.set(('a',), b'12')
+    assert cache.estatisticas()['bytes'] == 2
+
+
+def test_entrada_vence_no_ttl(monkeypatch):
+    agora = [1000.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: agora[0])
+    cache = CacheSeries(ttl=10, stale=0)
+    cache.set(('a',), b'x')
+    cache.set(('b',), b'x', ttl=100)
+
+    agora[0] += 11
+    assert cache.get(('a',)) is None
+    assert cache.get(('b',)) == b'x'
+    assert cache.estatisticas()['entradas'] == 1
+
+
+def test_invalidar_por_serie():
+    cache = CacheSeries()
+    cache.set(('ipca',), b'x')
+    cache.set(('ipca', 'intervalo', '2020-01-01', None), b'x')
+    cache.set((('ipca', 'selic'), 'M'), b'x')
+    cache.set(('selic',), b'x')
+
+    assert cache.invalidar('ipca') == 3
+    assert cache.get(('selic',)) == b'x'
+    assert cache.invalidar() == 1
+    assert cache.estatisticas()['bytes'] == 0
+
+
+def test_obter_nao_guarda_none():
+    cache = CacheSeries()
+    assert cache.obter(('a',), lambda: None) is None
+    assert cache.obter(('a',), lambda: b'x') == b'x'
+    assert cache.obter(('a',), lambda: pytest.fail('não deveria recarregar')) == b'x'
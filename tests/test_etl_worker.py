@@ -0,0 +1,28 @@
+from contextlib import contextmanager
+
+import pytest
+
+from app import etl_worker
+from app.executor_etl import IGNORADA, PULADA
+
+
+@pytest.fixture
+def lock_em_outro_processo(monkeypatch):
+    @contextmanager
+    def lock(nome):
+        yield False
+
+    monkeypatch.setattr(etl_worker, 'lock_consultivo', lock)
+
+
+def test_serie_com_lock_em_outro_processo_e_pulada(lock_em_outro_processo, monkeypatch):
+    executadas = []
+    monkeypatch.setitem(etl_worker.SERIES_ETL, 'ipca', lambda backfill=False: executadas.append('ipca'))
+    monkeypatch.setitem(etl_worker.SERIES_ETL, 'ipca_12m', lambda backfill=False: executadas.append('ipca_12m'))
+
+    resultados = etl_worker.executar_etl(['ipca', 'ipca_12m'])
+
+    assert executadas == []
+    assert resultados['ipca']['status'] == PULADA
+    # A derivada não roda sobre a base que outro processo ainda está gravando
+    assert resultados['ipca_12m']['status'] == IGNORADA
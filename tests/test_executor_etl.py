@@ -0,0 +1,78 @@
+import threading
+import time
+
+import pytest
+
+from app.executor_etl import FALHA, IGNORADA, PULADA, SUCESSO, TIMEOUT, Tarefa, TarefaPulada, executar_tarefas
+
+
+def test_respeita_dependencias():
+    ordem = []
+    tarefas = [
+        Tarefa('derivada', lambda: ordem.append('derivada'), dependencias=['base']),
+        Tarefa('base', lambda: ordem.append('base')),
+    ]
+    resultados = executar_tarefas(tarefas, max_workers=2)
+    assert ordem == ['base', 'derivada']
+    assert {nome: r['status'] for nome, r in resultados.items()} == {'base': SUCESSO, 'derivada': SUCESSO}
+
+
+def test_falha_ignora_so_as_dependentes():
+    def falhar():
+        raise RuntimeError('API fora')
+
+    tarefas = [
+        Tarefa('base', falhar),
+        Tarefa('derivada', lambda: None, dependencias=['base']),
+        Tarefa('outra', lambda: 42),
+    ]
+    resultados = executar_tarefas(tarefas)
+    assert resultados['base']['status'] == FALHA
+    assert resultados['base']['erro'] == 'API fora'
+    assert resultados['derivada']['status'] == IGNORADA
+    assert resultados['outra']['status'] == SUCESSO
+    assert resultados['outra']['resultado'] == 42
+
+
+@pytest.mark.parametrize('tarefas, mensagem', [
+    ([Tarefa('a', None), Tarefa('a', None)], 'duplicada'),
+    ([Tarefa('a', None, dependencias=['x'])], 'desconhecidas'),
+    ([Tarefa('a', None, dependencias=['b']), Tarefa('b', None, dependencias=['a'])], 'circular'),
+])
+def test_valida_tarefas(tarefas, mensagem):
+    with pytest.raises(ValueError, match=mensagem):
+        executar_tarefas(tarefas)
+
+
+def test_tarefa_travada_nao_prende_as_seguintes():
+    """Com uma única vaga, a tarefa que estoura o timeout não consome o prazo das próximas"""
+    liberar = threading.Event()
+    try:
+        tarefas = [
+            Tarefa('travada', liberar.wait, timeout=0.2),
+            Tarefa('dependente_da_travada', lambda: None, dependencias=['travada']),
+            Tarefa('seguinte', lambda: time.sleep(0.1), timeout=0.5),
+            Tarefa('dependente', lambda: 'ok', dependencias=['seguinte'], timeout=0.5),
+        ]
+        resultados = executar_tarefas(tarefas, max_workers=1)
+    finally:
+        liberar.set()
+
+    assert resultados['travada']['status'] == TIMEOUT
+    assert resultados['dependente_da_travada']['status'] == IGNORADA
+    assert resultados['seguinte']['status'] == SUCESSO
+    assert resultados['dependente']['status'] == SUCESSO
+    assert resultados['dependente']['resultado'] == 'ok'
+
+
+def test_tarefa_pulada_nao_libera_as_dependentes():
+    def pular():
+        raise TarefaPulada('em execução em outro processo')
+
+    tarefas = [
+        Tarefa('base', pular),
+        Tarefa('derivada', lambda: None, dependencias=['base']),
+    ]
+    resultados = executar_tarefas(tarefas)
+    assert resultados['base']['status'] == PULADA
+    assert resultados['derivada']['status'] == IGNORADA
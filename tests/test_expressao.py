@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app import app as aplicacao
+from app.series.expressao import compilar, serie_expressao
+
+
+def _operandos():
+    datas = pd.date_range('2020-01-01', periods=5, freq='MS')
+    return {
+        'selic': pd.Series([10.0, 11.0, 12.0, 13.0, 14.0], index=datas),
+        'ipca': pd.Series([4.0, 4.0, 5.0, 5.0], index=datas[1:]),
+    }
+
+
+def test_operacoes_alinham_pelas_datas():
+    expressao = compilar('selic - ipca')
+    assert expressao.series == ('selic', 'ipca')
+    resultado = expressao.avaliar(_operandos())
+    # A primeira data só existe na selic: o valor nulo é descartado
+    assert resultado.tolist() == [7.0, 8.0, 8.0, 9.0]
+
+
+def test_funcoes():
+    operandos = _operandos()
+    assert compilar('diff(selic)').avaliar(operandos).tolist() == [1.0] * 4
+    assert compilar('lag(selic, 2)').avaliar(operandos).tolist() == [10.0, 11.0, 12.0]
+    assert compilar("rolling(selic, 3, 'max')").avaliar(operandos).tolist() == [12.0, 13.0, 14.0]
+    variacao = compilar('pct_change(selic)').avaliar(operandos)
+    np.testing.assert_allclose(variacao.to_numpy(), [10.0, 100 / 11, 100 / 12, 100 / 13])
+
+
+def test_divisao_por_zero_vira_nulo():
+    resultado = compilar('selic / (ipca - ipca)').avaliar(_operandos())
+    assert resultado.empty
+
+
+def test_normaliza_texto_e_metadados():
+    expressao = compilar('  selic-ipca ')
+    assert expressao.texto == 'selic - ipca'
+    serie = serie_expressao(expressao, expressao.avaliar(_operandos()))
+    assert serie.meta['label'] == 'selic - ipca'
+    assert len(serie) == 4
+
+
+@pytest.mark.parametrize('texto', [
+    '',
+    'x' * 201,
+    'selic +',
+    '__import__("os")',
+    'selic.real',
+    'selic[0]',
+    'lambda: 1',
+    '1 + 2',
+    "'a' + selic",
+    'abs(selic)',
+    'lag(selic, 0)',
+    'lag(selic, periods=2)',
+    "rolling(selic, 3, 'median')",
+    'selic ** selic',
+    '2**2**2**2**2 + selic',
+    'selic ** 11',
+    'selic ** -11',
+    ' + '.join(['selic'] * 40),
+])
+def test_rejeita_expressoes_fora_da_linguagem(texto):
+    with pytest.raises(ValueError):
+        compilar(texto)
+
+
+def test_expoente_literal_pequeno_e_aceito():
+    assert compilar('selic ** 2').avaliar(_operandos()).iloc[0] == 100.0
+    assert compilar('selic ** -1').avaliar(_operandos()).iloc[0] == 0.1
+
+
+def test_torre_de_potencias_responde_400():
+    resposta = aplicacao.test_client().get('/api/expr', query_string={'q': '2**2**2**2**2+ipca'})
+    assert resposta.status_code == 400
+    assert 'expoente' in resposta.get_json()['error']
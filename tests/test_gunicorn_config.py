@@ -0,0 +1,44 @@
+import importlib.util
+import os
+import subprocess
+
+import pytest
+
+_CAMINHO = os.path.join(os.path.dirname(__file__), '..', 'gunicorn_config.py')
+
+
+@pytest.fixture
+def config():
+    spec = importlib.util.spec_from_file_location('gunicorn_config_teste', _CAMINHO)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+class _Log:
+    def __init__(self):
+        self.mensagens = []
+
+    def warning(self, mensagem):
+        self.mensagens.append(mensagem)
+
+    error = warning
+
+
+class _Servidor:
+    def __init__(self):
+        self.log = _Log()
+
+
+@pytest.mark.parametrize('erro', [
+    subprocess.TimeoutExpired(['armazem'], 20),
+    subprocess.CalledProcessError(1, ['armazem']),
+])
+def test_publicacao_do_armazem_nao_impede_o_inicio(config, monkeypatch, erro):
+    def falhar(*args, **kwargs):
+        raise erro
+
+    monkeypatch.setattr(config.subprocess, 'run', falhar)
+    servidor = _Servidor()
+    config.on_starting(servidor)
+    assert len(servidor.log.mensagens) == 1
@@ -0,0 +1,32 @@
+from app.data_apis.conect_post import conect_post_cambio, conect_post_selic
+from app.data_apis.conect_post.leitura import Intervalo
+
+
+def _intervalo_padrao(modulo, funcao, monkeypatch):
+    pedidos = []
+
+    def ler_serie(session, tabela, coluna, intervalo=None, **kwargs):
+        pedidos.append(intervalo)
+        return {'dates': [], 'values': []}
+    monkeypatch.setattr(modulo, 'ler_serie', ler_serie)
+    funcao(session=object())
+    return pedidos[0]
+
+
+def test_periodo_padrao_da_selic_e_ancorado_na_ultima_data(monkeypatch):
+    padrao = _intervalo_padrao(conect_post_selic, conect_post_selic.get_selic_data_from_db, monkeypatch)
+    # Mesmo período de ?window=36m, sem depender da data em que o ETL rodou
+    assert padrao == Intervalo.normalizar(window='36m')
+    assert padrao.inicio is None and padrao.fim is None
+
+
+def test_periodo_padrao_do_cambio(monkeypatch):
+    padrao = _intervalo_padrao(conect_post_cambio, conect_post_cambio.get_cambio_data_from_db, monkeypatch)
+    assert padrao == Intervalo.normalizar(window='30d')
+
+
+def test_normalizar_janela():
+    assert Intervalo.normalizar() is None
+    assert Intervalo.normalizar(window='3y') == Intervalo.normalizar(window='36m')
+    assert Intervalo.normalizar(window='2w') == Intervalo(janela='14d')
+    assert Intervalo.normalizar(window='max') == Intervalo()
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from app.series.lttb import lttb, reduzir
+from app.series.serie import Serie
+
+
+def _lttb_referencia(x, y, limite):
+    """Implementação ponto a ponto do algoritmo original, para comparação"""
+    n = len(x)
+    passo = (n - 2) / (limite - 2)
+    indices = [0]
+    anterior = 0
+    for balde in range(limite - 2):
+        inicio = int(np.floor(balde * passo)) + 1
+        fim = min(int(np.floor((balde + 1) * passo)) + 1, n - 1)
+        if balde == limite - 3:
+            fim = n - 1
+            proximo_x, proximo_y = x[n - 1], y[n - 1]
+        else:
+            seguinte = min(int(np.floor((balde + 2) * passo)) + 1, n - 1)
+            proximo_x, proximo_y = np.mean(x[fim:seguinte]), np.mean(y[fim:seguinte])
+        melhor, maior_area = inicio, -1.0
+        for i in range(inicio, fim):
+            area = abs((x[anterior] - proximo_x) * (y[i] - y[anterior])
+                       - (x[anterior] - x[i]) * (proximo_y - y[anterior]))
+            if area > maior_area:
+                melhor, maior_area = i, area
+        indices.append(melhor)
+        anterior = melhor
+    indices.append(n - 1)
+    return indices
+
+
+@pytest.mark.parametrize('n, limite', [(100, 10), (1000, 37), (51, 50), (10, 3)])
+def test_igual_ao_algoritmo_original(n, limite):
+    gerador = np.random.default_rng(n)
+    x = np.cumsum(gerador.integers(1, 5, n)).astype(float)
+    y = gerador.normal(size=n).cumsum()
+    assert lttb(x, y, limite).tolist() == _lttb_referencia(x, y, limite)
+
+
+def test_mantem_extremos_e_picos():
+    y = np.zeros(100)
+    y[40] = 10.0
+    y[70] = -10.0
+    indices = lttb(np.arange(100), y, 10)
+    assert len(indices) == 10
+    assert indices[0] == 0 and indices[-1] == 99
+    assert 40 in indices and 70 in indices
+    assert np.all(np.diff(indices) > 0)
+
+
+def test_serie_que_cabe_no_limite_nao_muda():
+    assert lttb(np.arange(5), np.arange(5), 10).tolist() == [0, 1, 2, 3, 4]
+    with pytest.raises(ValueError):
+        lttb(np.arange(5), np.arange(5), 2)
+
+
+def test_reduzir_descarta_nulos_e_registra_tamanho_original():
+    valores = np.sin(np.arange(200) / 10.0)
+    valores[5] = np.nan
+    serie = Serie(np.arange(200), valores, {'label': 'Teste'})
+
+    reduzida = reduzir(serie, 20)
+    assert len(reduzida) == 20
+    assert not np.isnan(reduzida.valores).any()
+    assert reduzida.meta == {'label': 'Teste', 'original_points': 200}
+    assert reduzir(serie, 500) is serie
@@ -0,0 +1,76 @@
+import json
+
+import pandas as pd
+
+from app.data_apis.conect_post.conect_post_payloads import gravar_payload
+from app.data_apis.conect_post.notificacoes import OuvinteNotificacoes, interpretar_mensagem
+from app.series import registro
+from app.series.armazem import armazem_series
+from app.series.materializacao import publicar_armazem
+from app.series.payload import Payload
+
+from conftest import dados_serie
+
+
+def test_interpretar_mensagem():
+    assert interpretar_mensagem('ipca:123') == ('ipca', 123)
+    assert interpretar_mensagem('ipca') == ('ipca', None)
+    assert interpretar_mensagem('ipca:x') == ('ipca:x', None)
+
+
+def test_notificacao_repetida_e_ignorada():
+    invalidadas = []
+    ouvinte = OuvinteNotificacoes(invalidar=invalidadas.append)
+    ouvinte._tratar('ipca:1')
+    ouvinte._tratar('ipca:1')
+    ouvinte._tratar('ipca:2')
+    assert invalidadas == ['ipca', 'ipca']
+
+
+def test_notify_entrega_a_nova_versao_em_outro_no(banco):
+    """Nó web que não rodou o ETL: armazém local e cache com a versão antiga"""
+    gravar_payload(Payload.renderizar('ipca', dados_serie([1, 2, 3])))
+    publicar_armazem()
+    assert json.loads(registro.obter_payload('ipca').corpo)['values'] == [1.0, 2.0, 3.0]
+
+    # ETL de outra máquina grava a nova versão e envia o NOTIFY
+    nova = Payload.renderizar('ipca', dados_serie([1, 2, 3, 4]))
+    gravar_payload(nova)
+    OuvinteNotificacoes()._tratar('ipca:1')
+
+    assert armazem_series.obter('ipca', nova.etag) is not None
+    payload = registro.obter_payload('ipca')
+    assert payload.etag == nova.etag
+    assert json.loads(payload.corpo)['values'] == [1.0, 2.0, 3.0, 4.0]
+
+
+def test_etl_notifica_uma_vez_depois_de_materializar(banco, monkeypatch):
+    """Quem recebe o aviso já encontra o payload novo em payloads_series"""
+    from app.cache import _hooks_atualizacao
+    from app.data_apis.conect_post.conect_post_ipca import IpcaModel
+    from app.data_apis.conect_post.database import Session
+    from app.data_apis.conect_post.conect_post_payloads import ler_payloads
+    from app.data_apis.otimizacao import bulk_upsert
+    from app.series.materializacao import materializar_serie
+
+    dados = dados_serie([1.0, 2.0])
+    monkeypatch.setitem(registro.SERIES['ipca'], 'carregar', lambda **kwargs: dados)
+    avisos = []
+
+    def aviso(serie):
+        avisos.append((serie, ler_payloads([serie])[serie].etag))
+    _hooks_atualizacao.append(aviso)
+    try:
+        with Session() as session:
+            session.query(IpcaModel).delete()
+            bulk_upsert(session, IpcaModel, [{'data': d, 'ipca': v} for d, v in
+                                             zip(pd.to_datetime(dados['dates']).date, dados['values'])], 'ipca')
+        assert avisos == []
+
+        materializar_serie('ipca')
+        assert avisos == [('ipca', Payload.renderizar('ipca', dados).etag)]
+    finally:
+        _hooks_atualizacao.remove(aviso)
+        with Session() as session:
+            session.query(IpcaModel).delete()
+            session.commit()
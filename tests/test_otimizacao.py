@@ -0,0 +1,82 @@
+import pandas as pd
+import pytest
+from sqlalchemy import Column, Date, Float
+from sqlalchemy.orm import declarative_base
+
+from app.cache import _hooks_atualizacao
+from app.data_apis.conect_post.database import Session, engine
+from app.data_apis.otimizacao import bulk_upsert, preparar_registros
+
+Base = declarative_base()
+
+
+class SerieTeste(Base):
+    __tablename__ = 'serie_teste'
+    data = Column(Date, primary_key=True)
+    valor = Column(Float)
+
+
+@pytest.fixture
+def session():
+    Base.metadata.create_all(engine)
+    with Session() as session:
+        yield session
+    Base.metadata.drop_all(engine)
+
+
+@pytest.fixture
+def notificadas():
+    series = []
+    _hooks_atualizacao.append(series.append)
+    yield series
+    _hooks_atualizacao.remove(series.append)
+
+
+def _dados(valores):
+    return pd.DataFrame({
+        'data': pd.date_range('2020-01-01', periods=len(valores), freq='MS'),
+        'valor': valores,
+    })
+
+
+def test_preparar_registros_converte_datas_e_nulos():
+    registros = preparar_registros(_dados([1.0, float('nan')]), ['data', 'valor'])
+    assert registros[0]['data'] == pd.Timestamp('2020-01-01').date()
+    assert registros[1]['valor'] is None
+
+
+def test_so_conta_linhas_alteradas(session, notificadas):
+    assert bulk_upsert(session, SerieTeste, _dados([1.0, 2.0]), 'valor') == 2
+
+    # Mesmos valores: nenhuma escrita
+    assert bulk_upsert(session, SerieTeste, _dados([1.0, 2.0]), 'valor') == 0
+
+    # Um valor alterado e uma linha nova
+    assert bulk_upsert(session, SerieTeste, _dados([1.0, 2.5, 3.0]), 'valor') == 2
+    gravados = [linha.valor for linha in session.query(SerieTeste).order_by(SerieTeste.data)]
+    assert gravados == [1.0, 2.5, 3.0]
+    # Sem notificar, a gravação não chama os hooks (o ETL notifica depois
+    # de materializar o payload)
+    assert notificadas == []
+
+
+def test_notificar_so_quando_alguma_linha_muda(session, notificadas):
+    assert bulk_upsert(session, SerieTeste, _dados([1.0]), 'valor', notificar='ipca') == 1
+    assert bulk_upsert(session, SerieTeste, _dados([1.0]), 'valor', notificar='ipca') == 0
+    assert notificadas == ['ipca']
+
+
+def test_nulo_conta_como_mudanca(session, notificadas):
+    bulk_upsert(session, SerieTeste, _dados([1.0]), 'valor')
+    assert bulk_upsert(session, SerieTeste, _dados([float('nan')]), 'valor') == 1
+    assert bulk_upsert(session, SerieTeste, _dados([float('nan')]), 'valor') == 0
+
+
+def test_lotes_menores_que_os_dados(session, notificadas):
+    assert bulk_upsert(session, SerieTeste, _dados([float(i) for i in range(7)]), 'valor', tamanho_lote=3) == 7
+    assert session.query(SerieTeste).count() == 7
+
+
+def test_sem_dados_nao_escreve(session, notificadas):
+    assert bulk_upsert(session, SerieTeste, [], 'valor') == 0
+    assert notificadas == []
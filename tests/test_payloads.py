@@ -0,0 +1,54 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import update
+
+from app.data_apis.conect_post.conect_post_payloads import (
+    PayloadSerieModel, gravar_payload, ler_payloads, ler_versoes
+)
+from app.data_apis.conect_post.database import Session
+from app.series.payload import Payload, ultima_data
+from app.utils.condicional import combinar_validadores
+
+from conftest import dados_serie
+
+ANTES = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+def _envelhecer(serie):
+    """Recua atualizado_em, para comparar com a próxima gravação"""
+    with Session() as session:
+        session.execute(update(PayloadSerieModel).where(PayloadSerieModel.serie == serie)
+                        .values(atualizado_em=ANTES))
+        session.commit()
+
+
+def test_last_modified_e_o_instante_da_materializacao(banco):
+    dados = dados_serie([1.0, 2.0, 3.0])
+    assert Payload.renderizar('ipca', dados).last_modified is None
+
+    gravar_payload(Payload.renderizar('ipca', dados), ultima_data(dados))
+    lido = ler_payloads(['ipca'])['ipca']
+    assert lido.last_modified.tzinfo is not None
+    assert lido.last_modified.microsecond == 0
+    assert ler_versoes(['ipca']) == {'ipca': (lido.etag, lido.last_modified)}
+
+
+def test_revisao_sem_nova_data_avanca_last_modified(banco):
+    gravar_payload(Payload.renderizar('ipca', dados_serie([1.0, 2.0, 3.0])))
+    _envelhecer('ipca')
+    assert ler_payloads(['ipca'])['ipca'].last_modified == ANTES
+
+    # Mesmo conteúdo: nada é regravado e a data não muda
+    gravar_payload(Payload.renderizar('ipca', dados_serie([1.0, 2.0, 3.0])))
+    assert ler_payloads(['ipca'])['ipca'].last_modified == ANTES
+
+    # A busca incremental revisa um ponto anterior; a última data é a mesma
+    gravar_payload(Payload.renderizar('ipca', dados_serie([1.0, 2.5, 3.0])))
+    assert ler_payloads(['ipca'])['ipca'].last_modified > ANTES
+
+
+def test_lote_sem_last_modified_se_alguma_serie_nao_tem():
+    validadores = [{'etag': 'a', 'last_modified': ANTES}, {'etag': 'b', 'last_modified': None}]
+    assert combinar_validadores(validadores)['last_modified'] is None
+    validadores[1]['last_modified'] = ANTES.replace(year=2021)
+    assert combinar_validadores(validadores)['last_modified'] == ANTES.replace(year=2021)
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.series.reamostragem import normalizar_reamostragem, reamostrar
+from app.series.serie import Serie
+
+# Regras do pandas com o período rotulado pela data inicial
+_REGRAS_PANDAS = {'W': 'W-SUN', 'M': 'MS', 'Q': 'QS', 'Y': 'YS'}
+
+
+def _diaria():
+    datas = pd.bdate_range('2019-12-20', '2021-03-10')
+    gerador = np.random.default_rng(7)
+    valores = gerador.normal(5.0, 1.0, len(datas))
+    valores[gerador.integers(0, len(datas), 30)] = np.nan
+    return pd.Series(valores, index=datas)
+
+
+@pytest.mark.parametrize('freq', ['W', 'M', 'Q', 'Y'])
+@pytest.mark.parametrize('agg', ['mean', 'last', 'sum', 'min', 'max'])
+def test_igual_ao_resample_do_pandas(freq, agg):
+    diaria = _diaria()
+    resultado = reamostrar(Serie.de_pandas(diaria), freq, agg)
+
+    regra = _REGRAS_PANDAS[freq]
+    if freq == 'W':
+        esperado = getattr(diaria.dropna().resample(regra, label='left', closed='left'), agg)()
+        # Semana rotulada pela segunda-feira
+        esperado.index = esperado.index + pd.Timedelta(days=1)
+    else:
+        esperado = getattr(diaria.dropna().resample(regra), agg)()
+    esperado = esperado.dropna()
+
+    np.testing.assert_array_equal(resultado.datas, esperado.index.to_numpy(dtype='datetime64[D]'))
+    np.testing.assert_allclose(resultado.valores, esperado.to_numpy())
+    assert resultado.meta == {'freq': freq, 'agg': agg}
+
+
+def test_serie_vazia():
+    vazia = Serie([], [])
+    assert len(reamostrar(vazia, 'M', 'mean')) == 0
+
+
+@pytest.mark.parametrize('freq, agg, esperado', [
+    (None, None, None),
+    ('m', None, ('M', 'mean')),
+    ('mensal', 'LAST', ('M', 'last')),
+    (' quarterly ', 'sum', ('Q', 'sum')),
+    ('a', 'max', ('Y', 'max')),
+])
+def test_normalizar_reamostragem(freq, agg, esperado):
+    assert normalizar_reamostragem(freq, agg) == esperado
+
+
+@pytest.mark.parametrize('freq, agg', [(None, 'mean'), ('D', None), ('M', 'median')])
+def test_normalizar_rejeita_parametros_invalidos(freq, agg):
+    with pytest.raises(ValueError):
+        normalizar_reamostragem(freq, agg)
@@ -0,0 +1,51 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app import app as aplicacao
+from app.cache import cache_series
+from app.series.payload import Payload
+from app.utils import routes
+
+from conftest import dados_serie
+
+
+@pytest.fixture
+def cliente_sem_banco(monkeypatch):
+    """Cliente em que qualquer carga da série falha: só o cache responde"""
+    def carregar(*args, **kwargs):
+        raise AssertionError('a série não deveria ser carregada')
+    monkeypatch.setattr(routes, 'obter_payload', carregar)
+
+    payload = Payload.renderizar('ipca', dados_serie([4.0, 4.5, 5.0], label='IPCA'))
+    payload.last_modified = datetime(2024, 5, 10, 12, 0, tzinfo=timezone.utc)
+    cache_series.set(('ipca',), payload)
+    return aplicacao.test_client(), payload
+
+
+def test_if_none_match_responde_304_sem_carregar(cliente_sem_banco):
+    cliente, payload = cliente_sem_banco
+    resposta = cliente.get('/api/ipca', headers={'If-None-Match': f'"{payload.etag}"'})
+    assert resposta.status_code == 304
+    assert resposta.data == b''
+    assert resposta.headers['ETag'] == f'W/"{payload.etag}"'
+
+
+def test_if_modified_since_responde_304_sem_carregar(cliente_sem_banco):
+    cliente, _ = cliente_sem_banco
+    resposta = cliente.get('/api/ipca', headers={'If-Modified-Since': 'Fri, 10 May 2024 12:00:00 GMT'})
+    assert resposta.status_code == 304
+
+
+def test_etag_diferente_serve_a_entrada_do_cache(cliente_sem_banco):
+    cliente, payload = cliente_sem_banco
+    resposta = cliente.get('/api/ipca', headers={'If-None-Match': '"ipca-antiga"'})
+    assert resposta.status_code == 200
+    assert resposta.headers['ETag'] == f'W/"{payload.etag}"'
+
+
+def test_if_modified_since_anterior_serve_o_corpo(cliente_sem_banco):
+    cliente, _ = cliente_sem_banco
+    resposta = cliente.get('/api/ipca', headers={'If-Modified-Since': 'Fri, 10 May 2024 11:59:59 GMT'})
+    assert resposta.status_code == 200
+    assert resposta.headers['Last-Modified'] == 'Fri, 10 May 2024 12:00:00 GMT'
@@ -0,0 +1,72 @@
+from contextlib import contextmanager
+
+import pandas as pd
+import pytest
+
+from app import etl_worker
+from app.data_apis.conect_post import condect_post_desocupacao as desocupacao
+from app.data_apis.conect_post import conect_post_desocupacao_pb as desocupacao_pb
+from app.data_apis.conect_post.database import Session
+from app.executor_etl import FALHA, SUCESSO
+
+
+def _trimestres(valores, coluna='des'):
+    datas = pd.date_range('2023-01-01', periods=len(valores), freq='QS', name='data')
+    return pd.DataFrame({coluna: valores}, index=datas)
+
+
+@pytest.fixture
+def tabela_desocupacao():
+    with Session() as session:
+        session.query(desocupacao.DesocupacaoModel).delete()
+        session.commit()
+    yield
+    with Session() as session:
+        session.query(desocupacao.DesocupacaoModel).delete()
+        session.commit()
+
+
+def test_rodada_sem_trimestre_novo_e_sucesso(tabela_desocupacao, monkeypatch):
+    monkeypatch.setattr(desocupacao, 'get_desocupacao_data', lambda periodos='all': _trimestres([8.0, 7.5]))
+
+    assert desocupacao.verificar_dados_desocupacao() is True
+    # A API devolve os mesmos trimestres: nada muda, mas não é falha
+    assert desocupacao.verificar_dados_desocupacao() is True
+
+
+def test_falha_da_api_nao_conta_como_sucesso(monkeypatch):
+    def falhar(**kwargs):
+        raise ConnectionError('SIDRA fora do ar')
+    monkeypatch.setattr(desocupacao_pb, 'get_desocupacao_pb_data', falhar)
+
+    assert desocupacao_pb.verificar_dados_desocupacao_pb() is False
+
+
+def test_erro_ao_gravar_nao_conta_como_sucesso(monkeypatch):
+    def falhar(*args, **kwargs):
+        raise RuntimeError('banco fora')
+    monkeypatch.setattr(desocupacao_pb, 'get_desocupacao_pb_data', lambda **kwargs: _trimestres([9.0]))
+    monkeypatch.setattr(desocupacao_pb, 'bulk_upsert', falhar)
+
+    assert desocupacao_pb.verificar_dados_desocupacao_pb() is False
+
+
+@pytest.fixture
+def lock_obtido(monkeypatch):
+    @contextmanager
+    def lock(nome):
+        yield True
+
+    monkeypatch.setattr(etl_worker, 'lock_consultivo', lock)
+
+
+@pytest.mark.parametrize('retorno, status', [(True, SUCESSO), (False, FALHA), (None, FALHA)])
+def test_worker_so_materializa_com_sucesso(retorno, status, lock_obtido, monkeypatch):
+    materializadas = []
+    monkeypatch.setitem(etl_worker.SERIES_ETL, 'desocupacao', lambda backfill=False: retorno)
+    monkeypatch.setattr(etl_worker, 'materializar_serie', materializadas.append)
+
+    resultados = etl_worker.executar_etl(['desocupacao'])
+
+    assert resultados['desocupacao']['status'] == status
+    assert materializadas == (['desocupacao'] if retorno else [])
@@ -0,0 +1,110 @@
+import threading
+import time
+
+from app.cache import CacheSeries
+
+
+def _esperar(condicao, prazo=2.0):
+    # perf_counter: alguns testes fixam time.monotonic
+    limite = time.perf_counter() + prazo
+    while not condicao():
+        assert time.perf_counter() < limite, 'condição não atingida no prazo'
+        time.sleep(0.01)
+
+
+def test_cargas_simultaneas_da_mesma_chave_sao_coalescidas():
+    cache = CacheSeries()
+    liberar = threading.Event()
+    cargas = []
+
+    def carregar():
+        cargas.append(1)
+        liberar.wait(2)
+        return b'valor'
+
+    resultados = []
+    threads = [threading.Thread(target=lambda: resultados.append(cache.obter(('ipca',), carregar)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    _esperar(lambda: cache.estatisticas()['coalescidas'] == 4)
+    liberar.set()
+    for thread in threads:
+        thread.join(2)
+
+    assert len(cargas) == 1
+    assert resultados == [b'valor'] * 5
+    assert cache.get(('ipca',)) == b'valor'
+
+
+def test_erro_da_carga_chega_a_quem_espera():
+    cache = CacheSeries()
+    voo, lider = cache.iniciar_voo(('ipca',))
+    assert lider
+    espera, lider_espera = cache.iniciar_voo(('ipca',))
+    assert espera is voo and not lider_espera
+
+    cache.concluir_voo(('ipca',), voo, erro=RuntimeError('banco fora'))
+    try:
+        cache.aguardar_voo(espera)
+    except RuntimeError as e:
+        assert str(e) == 'banco fora'
+    else:
+        raise AssertionError('o erro deveria ser re-lançado')
+    assert cache.estatisticas()['cargas_em_andamento'] == 0
+
+
+def test_invalidacao_durante_a_carga_descarta_o_resultado():
+    cache = CacheSeries()
+    voo, _ = cache.iniciar_voo(('ipca',))
+    cache.invalidar('ipca')
+    cache.concluir_voo(('ipca',), voo, b'anterior')
+
+    assert voo.valor == b'anterior'
+    assert cache.get(('ipca',)) is None
+
+
+def test_entrada_vencida_e_servida_enquanto_recarrega(monkeypatch):
+    agora = [1000.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: agora[0])
+    cache = CacheSeries(ttl=10, stale=10)
+    cache.set(('ipca',), b'antigo')
+    agora[0] += 15
+
+    liberar = threading.Event()
+    cargas = []
+
+    def carregar():
+        cargas.append(1)
+        liberar.wait(2)
+        return b'novo'
+
+    assert cache.obter(('ipca',), carregar) == b'antigo'
+    assert cache.obter(('ipca',), carregar) == b'antigo'
+    liberar.set()
+    _esperar(lambda: cache.estatisticas()['cargas_em_andamento'] == 0)
+
+    assert len(cargas) == 1
+    assert cache.get(('ipca',)) == b'novo'
+    assert cache.estatisticas()['antigas'] == 2
+
+
+def test_entrada_fora_da_janela_stale_nao_e_servida(monkeypatch):
+    agora = [1000.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: agora[0])
+    cache = CacheSeries(ttl=10, stale=10)
+    cache.set(('ipca',), b'antigo')
+    agora[0] += 25
+
+    assert cache.obter(('ipca',), lambda: b'novo') == b'novo'
+
+
+def test_entrada_invalidada_nao_e_servida_como_antiga(monkeypatch):
+    agora = [1000.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: agora[0])
+    cache = CacheSeries(ttl=10, stale=10)
+    cache.set(('ipca',), b'antigo')
+    agora[0] += 15
+    cache.invalidar('ipca')
+
+    assert cache.obter(('ipca',), lambda: b'novo') == b'novo'